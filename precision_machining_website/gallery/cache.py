@@ -0,0 +1,62 @@
+"""
+作品展示页面缓存
+作品列表和详情页的渲染结果缓存在Django缓存中，缓存键包含作品内容版本号；
+作品或分类保存、删除时（以及工作进程生成预览和图片版本后）更新版本号，旧缓存随之失效
+"""
+
+import hashlib
+import uuid
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+GALLERY_VERSION_KEY = 'gallery:version'
+# 页面缓存有效期（秒），内容变化时通过版本号失效，这里只是清理旧版本的上限
+GALLERY_PAGE_TIMEOUT = 24 * 60 * 60
+
+
+def gallery_version():
+    """
+    当前作品内容版本号
+    """
+    version = cache.get(GALLERY_VERSION_KEY)
+    if version is None:
+        version = bump_gallery_version()
+    return version
+
+
+def bump_gallery_version():
+    """
+    作品内容变化后更新版本号
+    使用随机值而不是自增，多个进程同时更新时不会得到相同的版本号
+    """
+    version = uuid.uuid4().hex[:12]
+    cache.set(GALLERY_VERSION_KEY, version, None)
+    return version
+
+
+def cache_gallery_page(*query_params):
+    """
+    缓存作品展示页面的视图装饰器
+    :param query_params: 影响页面内容的查询参数，其他参数不参与缓存键
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            variant = '&'.join(f'{name}={request.GET.get(name, "")}' for name in query_params)
+            digest = hashlib.md5(f'{request.path}?{variant}'.encode('utf-8')).hexdigest()
+            key = f'gallery:page:{gallery_version()}:{digest}'
+            content = cache.get(key)
+            if content is not None:
+                return HttpResponse(content)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, response.content, GALLERY_PAGE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
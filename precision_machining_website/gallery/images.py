@@ -0,0 +1,142 @@
+"""
+作品展示图片的响应式版本
+上传的原图由分析工作进程在后台按宽度生成 card / detail / full 三个版本，每个版本各有WebP和JPEG两种格式，
+生成时按EXIF方向摆正后丢弃EXIF等元数据；文件路径包含原图内容哈希，可长期缓存
+"""
+
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .cache import bump_gallery_version
+from .models import Work
+
+logger = logging.getLogger(__name__)
+
+# 版本名称及最大宽度（像素），从小到大
+IMAGE_VARIANTS = (
+    ('card', 480),
+    ('detail', 960),
+    ('full', 1920),
+)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+VARIANTS_DIR = 'works/images/variants'
+
+
+def _encode(image, file_format):
+    buffer = io.BytesIO()
+    if file_format == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # JPEG不支持透明，合成到白色背景上
+            from PIL import Image
+
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+        image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def generate_image_variants(image_file):
+    """
+    生成并保存各版本图片
+    :param image_file: 打开的原图文件
+    :return: {版本名称: {'width', 'height', 'webp', 'jpeg'}}，webp/jpeg为存储中的文件名
+    """
+    from PIL import Image, ImageOps
+
+    data = image_file.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        # 按EXIF方向摆正，之后保存的图片不再带EXIF
+        original = ImageOps.exif_transpose(original)
+    # 调色板（P）和LA等模式缩放时Pillow只能使用NEAREST，先转换为RGB/RGBA
+    if original.mode not in ('RGB', 'RGBA', 'L'):
+        has_alpha = 'A' in original.getbands() or 'transparency' in original.info
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    previous = None
+    for name, max_width in IMAGE_VARIANTS:
+        width = min(max_width, original.width)
+        if previous is not None and previous['width'] == width:
+            # 原图不够宽时，更大的版本与上一版本相同
+            variants[name] = previous
+            continue
+
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        entry = {'width': width, 'height': height}
+        for key, file_format, extension in (('webp', 'WEBP', 'webp'), ('jpeg', 'JPEG', 'jpg')):
+            file_name = f'{VARIANTS_DIR}/{digest}/{name}.{extension}'
+            if not default_storage.exists(file_name):
+                file_name = default_storage.save(file_name, ContentFile(_encode(resized, file_format)))
+            entry[key] = file_name
+        variants[name] = entry
+        previous = entry
+    return variants
+
+
+def responsive_image(variants):
+    """
+    模板使用的图片地址
+    :return: {'webp_srcset', 'jpeg_srcset', 版本名称: {'url', 'width', 'height'}}，没有版本时返回None
+    """
+    if not variants:
+        return None
+    widths = {}
+    result = {}
+    for name, _ in IMAGE_VARIANTS:
+        entry = variants.get(name)
+        if entry is None:
+            continue
+        widths[entry['width']] = entry
+        result[name] = {
+            'url': default_storage.url(entry['jpeg']),
+            'width': entry['width'],
+            'height': entry['height'],
+        }
+    for key in ('webp', 'jpeg'):
+        result[f'{key}_srcset'] = ', '.join(
+            f"{default_storage.url(entry[key])} {width}w" for width, entry in sorted(widths.items())
+        )
+    return result
+
+
+def build_next_work_image_variants():
+    """
+    为一个尚未处理的作品图片生成响应式版本
+    :return: 是否处理了作品
+    """
+    work = Work.objects.exclude(image='').filter(image_variants__isnull=True).only('id', 'image').first()
+    if work is None:
+        return False
+
+    try:
+        with work.image.open('rb') as image_file:
+            variants = generate_image_variants(image_file)
+        logger.info('作品 #%s 图片版本生成完成: %s', work.id, list(variants))
+    except Exception as e:
+        # 记录为空，模板使用原图，不再反复处理
+        logger.warning('作品 #%s 图片版本生成失败: %s', work.id, e)
+        variants = {}
+
+    # 处理期间图片被替换时不写入旧图片的版本
+    Work.objects.filter(id=work.id, image=work.image.name).update(image_variants=variants)
+    # update()不触发post_save信号，需要手动使页面缓存失效
+    bump_gallery_version()
+    return True
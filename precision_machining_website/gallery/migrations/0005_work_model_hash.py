@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0004_alter_category_slug'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='work',
+            name='model_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='模型文件SHA-256'),
+        ),
+    ]
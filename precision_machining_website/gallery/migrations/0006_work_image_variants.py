@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0005_work_model_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='work',
+            name='image_variants',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='展示图片响应式版本'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0006_work_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['-created_at', '-id'], name='gallery_work_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='gallery_work_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='work',
+            index=models.Index(fields=['is_featured'], name='gallery_work_featured_idx'),
+        ),
+    ]
@@ -80,6 +80,8 @@ class Work(models.Model):
     image = models.ImageField(upload_to='works/images/', blank=True, verbose_name='展示图片')
     project_background = models.TextField(verbose_name='项目背景')
     model_file = models.FileField(upload_to='works/models/', blank=True, verbose_name='3D模型文件')
+    image_variants = models.JSONField(null=True, blank=True, editable=False, verbose_name='展示图片响应式版本')
+    model_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name='模型文件SHA-256')
     process_difficulties = models.TextField(verbose_name='加工难点与解决方案')
     equipment_used = models.TextField(verbose_name='使用设备')
     materials = models.TextField(verbose_name='材料')
@@ -94,6 +96,34 @@ class Work(models.Model):
         verbose_name = '作品'
         verbose_name_plural = '作品'
         ordering = ['-created_at']
+        indexes = [
+            # 作品列表按 (created_at, id) 键集分页，全部作品和按分类两种查询各用一个索引
+            models.Index(fields=['-created_at', '-id'], name='gallery_work_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='gallery_work_cat_created_idx'),
+            models.Index(fields=['is_featured'], name='gallery_work_featured_idx'),
+        ]
         
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+        
+    @property
+    def responsive_image(self):
+        """
+        展示图片各版本的URL与srcset，尚未生成时为None
+        """
+        from .images import responsive_image
+
+        return responsive_image(self.image_variants)
+
+    def save(self, *args, **kwargs):
+        # 模型文件变化时清空哈希，由分析工作进程重新生成网页预览；
+        # 展示图片变化时同样清空已生成的图片版本
+        if self.pk:
+            old = Work.objects.filter(pk=self.pk).values_list('model_file', 'image').first()
+            if old is not None:
+                old_model_file, old_image = old
+                if old_model_file != self.model_file.name:
+                    self.model_hash = ''
+                if old_image != self.image.name:
+                    self.image_variants = None
+        super().save(*args, **kwargs)
@@ -0,0 +1,46 @@
+"""
+作品模型文件的网页预览
+由分析工作进程在任务队列空闲时逐个处理，预览的生成与存储与报价模型共用
+"""
+
+import logging
+import os
+
+from quotation.feature_cache import compute_content_hash
+from quotation.isolation import AnalysisFailed, run_previews
+
+from .cache import bump_gallery_version
+from .models import Work
+
+# 模型文件不存在时记录的哈希，避免反复处理
+MISSING_FILE_HASH = 'missing'
+
+logger = logging.getLogger(__name__)
+
+
+def build_next_work_preview():
+    """
+    为一个尚未处理的作品模型文件生成网页预览
+    :return: 是否处理了作品
+    """
+    work = Work.objects.exclude(model_file='').filter(model_hash='').only('id', 'model_file').first()
+    if work is None:
+        return False
+
+    file_path = work.model_file.path
+    if os.path.exists(file_path):
+        content_hash = compute_content_hash(file_path)
+        try:
+            lods = run_previews(file_path, None, content_hash)
+            logger.info('作品 #%s 预览生成完成: %s', work.id, lods)
+        except AnalysisFailed as e:
+            logger.warning('作品 #%s 预览生成失败: %s %s', work.id, e.reason, e.message)
+    else:
+        logger.warning('作品 #%s 模型文件不存在: %s', work.id, file_path)
+        content_hash = MISSING_FILE_HASH
+
+    # 处理期间模型文件被替换时不写入旧文件的哈希
+    Work.objects.filter(id=work.id, model_file=work.model_file.name).update(model_hash=content_hash)
+    # update()不触发post_save信号，需要手动使页面缓存失效
+    bump_gallery_version()
+    return True
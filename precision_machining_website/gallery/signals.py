@@ -0,0 +1,19 @@
+"""
+作品内容变化时使页面缓存失效
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_gallery_version
+from .models import Category, Work
+
+
+@receiver(post_save, sender=Work)
+@receiver(post_delete, sender=Work)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_gallery_cache(sender, **kwargs):
+    # 事务提交后再更新版本号，否则其他请求可能在提交前按新版本号缓存旧内容
+    transaction.on_commit(bump_gallery_version)
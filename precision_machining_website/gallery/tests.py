@@ -0,0 +1,297 @@
+import datetime
+import io
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from gallery.images import build_next_work_image_variants, generate_image_variants, responsive_image
+from gallery.models import Category, Work
+from machining_platform.pagination import decode_cursor, encode_cursor, keyset_paginate
+from gallery.views import WORKS_PER_PAGE
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+START = datetime.datetime(2024, 3, 1, 8, 0, tzinfo=datetime.timezone.utc)
+
+
+def create_work(category, created_at, **fields):
+    values = {
+        'title': '作品', 'description': '描述', 'category': category, 'project_background': '背景',
+        'process_difficulties': '难点', 'equipment_used': '设备', 'materials': '材料',
+        'process_techniques': '工艺', 'project_duration': '1周',
+    }
+    values.update(fields)
+    work = Work.objects.create(**values)
+    # created_at 为 auto_now_add，创建后再改为指定时间
+    Work.objects.filter(pk=work.pk).update(created_at=created_at)
+    work.created_at = created_at
+    return work
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class KeysetPaginationTests(TestCase):
+    """作品列表键集分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='精密零件')
+        # 同一创建时间有多个作品，顺序由ID决定
+        offsets = [0, 0, 0, 5, 5, 9, 12, 12, 12, 12, 20]
+        cls.works = [create_work(cls.category, START + datetime.timedelta(seconds=offset, microseconds=7))
+                     for offset in offsets]
+        cls.expected = [work.id for work in sorted(cls.works, key=lambda work: (work.created_at, work.id),
+                                                   reverse=True)]
+
+    def walk_forward(self, per_page):
+        pages = [keyset_paginate(Work.objects.all(), per_page)]
+        while pages[-1].has_next():
+            pages.append(keyset_paginate(Work.objects.all(), per_page, after=pages[-1].next_cursor))
+        return pages
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        work = self.works[0]
+
+        self.assertEqual(decode_cursor(encode_cursor(work)), (work.created_at, work.id))
+
+    def test_invalid_cursors(self):
+        for cursor in ('', 'abc', '123', '12-x', '-', '9' * 40 + '-1'):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor))
+
+    def test_next_pages_list_every_work_once_with_ties(self):
+        for per_page in (1, 2, 3, 4, 11, 20):
+            with self.subTest(per_page=per_page):
+                pages = self.walk_forward(per_page)
+
+                self.assertEqual([work.id for page in pages for work in page], self.expected)
+                self.assertTrue(all(len(page) == per_page for page in pages[:-1]))
+                self.assertFalse(pages[0].has_previous())
+                self.assertFalse(pages[-1].has_next())
+
+    def test_previous_pages_return_same_pages(self):
+        for per_page in (1, 2, 3, 4):
+            with self.subTest(per_page=per_page):
+                forward = self.walk_forward(per_page)
+
+                page = forward[-1]
+                backward = [page]
+                while page.has_previous():
+                    page = keyset_paginate(Work.objects.all(), per_page, before=page.previous_cursor)
+                    backward.append(page)
+
+                self.assertEqual([[work.id for work in page] for page in backward[::-1]],
+                                 [[work.id for work in page] for page in forward])
+                self.assertFalse(backward[-1].has_previous())
+
+    def test_previous_from_second_page_returns_full_first_page(self):
+        first = keyset_paginate(Work.objects.all(), 4)
+        second = keyset_paginate(Work.objects.all(), 4, after=first.next_cursor)
+
+        page = keyset_paginate(Work.objects.all(), 4, before=second.previous_cursor)
+
+        self.assertEqual([work.id for work in page], self.expected[:4])
+        self.assertFalse(page.has_previous())
+        self.assertEqual(page.next_cursor, first.next_cursor)
+
+    def test_work_list_view_follows_cursor(self):
+        first = keyset_paginate(Work.objects.all(), WORKS_PER_PAGE)
+        response = self.client.get(reverse('gallery:work_list'), {'after': first.next_cursor})
+
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual([work.id for work in page], self.expected[WORKS_PER_PAGE:])
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class GalleryPageCacheTests(TestCase):
+    """作品页面缓存：按内容版本号缓存，作品保存、删除的事务提交后失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='精密零件')
+        cls.work = create_work(cls.category, START, title='铝合金壳体')
+
+    def setUp(self):
+        cache.clear()
+        self.list_url = reverse('gallery:work_list')
+        self.detail_url = reverse('gallery:work_detail', args=[self.work.id])
+
+    def test_warm_cache_serves_without_queries(self):
+        for url in (self.list_url, self.detail_url):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+
+                self.assertEqual(second.status_code, 200)
+                self.assertEqual(second.content, first.content)
+
+    def test_cursor_pages_are_cached_separately(self):
+        other = create_work(self.category, START + datetime.timedelta(seconds=1), title='不锈钢法兰')
+        cursor = encode_cursor(other)
+
+        first_page = self.client.get(self.list_url)
+        next_page = self.client.get(self.list_url, {'after': cursor})
+
+        self.assertContains(first_page, '不锈钢法兰')
+        self.assertNotContains(next_page, '不锈钢法兰')
+        self.assertContains(next_page, '铝合金壳体')
+
+    def test_save_invalidates_after_commit(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.title = '钛合金支架'
+            self.work.save()
+            # 提交之前仍返回缓存的页面
+            self.assertContains(self.client.get(self.list_url), '铝合金壳体')
+
+        self.assertContains(self.client.get(self.list_url), '钛合金支架')
+        self.assertContains(self.client.get(self.detail_url), '钛合金支架')
+
+    def test_delete_invalidates_after_commit(self):
+        self.assertContains(self.client.get(self.list_url), '铝合金壳体')
+        self.assertEqual(self.client.get(self.detail_url).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Work.objects.get(id=self.work.id).delete()
+
+        self.assertNotContains(self.client.get(self.list_url), '铝合金壳体')
+        self.assertEqual(self.client.get(self.detail_url).status_code, 404)
+
+    def test_category_change_invalidates(self):
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = '工装夹具'
+            self.category.save()
+
+        self.assertContains(self.client.get(self.detail_url), '工装夹具')
+
+
+def image_bytes(size, mode='RGB', file_format='JPEG', color=(200, 60, 30), **save_options):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, format=file_format, **save_options)
+    return buffer.getvalue()
+
+
+def open_stored(name):
+    from PIL import Image
+
+    with default_storage.open(name, 'rb') as f:
+        image = Image.open(io.BytesIO(f.read()))
+        image.load()
+    return image
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='', MEDIA_URL='/media/')
+class ImageVariantTests(TestCase):
+    """作品展示图片：按宽度生成WebP和JPEG版本，摆正方向并去除EXIF"""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_variants_by_width(self):
+        variants = generate_image_variants(io.BytesIO(image_bytes((2400, 1200))))
+
+        self.assertEqual({name: (entry['width'], entry['height']) for name, entry in variants.items()},
+                         {'card': (480, 240), 'detail': (960, 480), 'full': (1920, 960)})
+        for name, entry in variants.items():
+            for key, file_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with self.subTest(name=name, format=file_format):
+                    image = open_stored(entry[key])
+                    self.assertEqual(image.format, file_format)
+                    self.assertEqual(image.size, (entry['width'], entry['height']))
+
+    def test_narrow_image_reuses_variant(self):
+        variants = generate_image_variants(io.BytesIO(image_bytes((600, 400))))
+
+        self.assertEqual((variants['card']['width'], variants['detail']['width']), (480, 600))
+        self.assertIs(variants['full'], variants['detail'])
+
+        image = responsive_image(variants)
+        self.assertEqual(image['detail']['url'], '/media/' + variants['detail']['jpeg'])
+        self.assertEqual(image['webp_srcset'], f"/media/{variants['card']['webp']} 480w, "
+                                               f"/media/{variants['detail']['webp']} 600w")
+        self.assertTrue(image['jpeg_srcset'].endswith('.jpg 600w'))
+        self.assertIsNone(responsive_image(None))
+        self.assertIsNone(responsive_image({}))
+
+    def test_exif_orientation_applied_and_stripped(self):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # 顺时针旋转90°显示
+        exif[0x010F] = 'Camera Maker'
+        data = image_bytes((800, 400), exif=exif.tobytes())
+
+        variants = generate_image_variants(io.BytesIO(data))
+
+        self.assertEqual((variants['card']['width'], variants['card']['height']), (400, 800))
+        for key in ('webp', 'jpeg'):
+            with self.subTest(key):
+                image = open_stored(variants['card'][key])
+                self.assertEqual(image.size, (400, 800))
+                self.assertFalse(dict(image.getexif()))
+                self.assertNotIn('exif', image.info)
+
+    def test_palette_and_alpha_images(self):
+        from PIL import Image
+
+        palette = Image.new('P', (100, 50), 0)
+        palette.putpalette([255, 0, 0, 0, 0, 255] + [0] * 762)
+        palette.paste(1, (50, 0, 100, 50))
+        buffer = io.BytesIO()
+        palette.save(buffer, format='PNG', transparency=0)
+        cases = {
+            'palette': buffer.getvalue(),
+            'rgba': image_bytes((100, 50), 'RGBA', 'PNG', color=(0, 0, 255, 0)),
+        }
+        for name, data in cases.items():
+            with self.subTest(name):
+                variants = generate_image_variants(io.BytesIO(data))
+
+                jpeg = open_stored(variants['card']['jpeg'])
+                webp = open_stored(variants['card']['webp'])
+                # JPEG不支持透明，透明部分合成为白色；WebP保留透明通道
+                self.assertEqual(jpeg.mode, 'RGB')
+                self.assertTrue(all(channel > 240 for channel in jpeg.getpixel((10, 25))))
+                self.assertEqual(webp.mode, 'RGBA')
+                self.assertEqual(webp.getpixel((10, 25))[3], 0)
+
+    def test_build_next_work_image_variants(self):
+        category = Category.objects.create(name='精密零件')
+        work = create_work(category, START, title='铝合金壳体')
+        work.image.save('part.jpg', ContentFile(image_bytes((1200, 900))))
+        broken = create_work(category, START, title='不锈钢法兰')
+        broken.image.save('broken.jpg', ContentFile(b'not an image'))
+
+        with self.assertLogs('gallery.images', level='INFO') as logs:
+            while build_next_work_image_variants():
+                pass
+
+        work.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(list(work.image_variants), ['card', 'detail', 'full'])
+        self.assertEqual(broken.image_variants, {})
+        self.assertIsNone(broken.responsive_image)
+        self.assertEqual(sorted(record.levelname for record in logs.records), ['INFO', 'WARNING'])
+
+        response = self.client.get(reverse('gallery:work_detail', args=[work.id]))
+        self.assertContains(response, f'<source type="image/webp" srcset="{work.responsive_image["webp_srcset"]}"')
+        self.assertContains(response, f'src="/media/{work.image_variants["detail"]["jpeg"]}"')
@@ -1,36 +1,51 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
+from machining_platform.pagination import keyset_paginate
+from quotation.previews import preview_urls
+from .cache import cache_gallery_page, gallery_version
 from .models import Work, Category
 
+# 每页显示的作品数
+WORKS_PER_PAGE = 9
 
+# 作品卡片用到的字段，列表页不加载项目背景、加工难点等大文本字段
+WORK_CARD_FIELDS = (
+    'id', 'title', 'description', 'image', 'image_variants', 'created_at',
+    'category', 'category__name',
+)
+
+
+@cache_gallery_page('after', 'before')
 def work_list(request, category_slug=None):
     """作品列表页面"""
     category = None
-    works = Work.objects.all()
+    works = Work.objects.select_related('category').only(*WORK_CARD_FIELDS)
     categories = Category.objects.all()
     
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
         works = works.filter(category=category)
         
-    # 分页处理
-    paginator = Paginator(works, 9)  # 每页显示9个作品
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # 按游标分页，不统计总数
+    page_obj = keyset_paginate(
+        works, WORKS_PER_PAGE, after=request.GET.get('after'), before=request.GET.get('before')
+    )
     
     context = {
         'page_obj': page_obj,
         'categories': categories,
         'current_category': category,
+        'gallery_version': gallery_version(),
     }
     return render(request, 'gallery/work_list.html', context)
 
 
+@cache_gallery_page()
 def work_detail(request, id):
     """作品详情页面"""
     work = get_object_or_404(Work, id=id)
     
     context = {
         'work': work,
+        'preview_urls': preview_urls(work.model_hash),
     }
     return render(request, 'gallery/work_detail.html', context)
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""
+gunicorn配置
+设置 ANALYZER_WARMUP=1 时，在主进程中预先导入并初始化3D分析库（需要preload_app），
+fork出的工作进程以写时复制方式共享这些内存页，不再各自支付导入开销
+"""
+
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '1'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def on_starting(server):
+    # preload_app时应用（以及Django）已在主进程中加载完成
+    if server.cfg.preload_app and os.environ.get('ANALYZER_WARMUP') == '1':
+        from quotation.engine import warmup_backends
+
+        timings = warmup_backends()
+        server.log.info('分析后端预热完成: %s', timings)
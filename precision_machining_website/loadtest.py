@@ -0,0 +1,498 @@
+"""
+HTTP压力测试
+按设定的比例模拟两类访客，在不同并发数下统计各接口的 p50/p95/p99 延迟、吞吐量和错误率，用于确定gunicorn工作进程数和超时设置：
+    quote   打开报价表单 -> 上传样本模型文件（multipart） -> 轮询结果页直到分析完成
+    gallery 浏览作品列表 -> 作品详情 -> 分类页 -> 下一页
+
+用法:
+    # 在本机启动一套独立的实例（SQLite数据库和媒体文件使用临时副本）后测试
+    python loadtest.py --start --workers 2 --analysis-workers 2 --concurrency 1,4,16 --duration 30
+    # 测试已经运行的实例
+    python loadtest.py --url http://127.0.0.1:8000 --mix quote=1,gallery=4
+
+设置了 DB_HOST 等环境变量时，--start 启动的实例使用该PostgreSQL数据库（需先 migrate），否则使用db.sqlite3的副本。
+只依赖Python标准库
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import math
+import os
+import random
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODEL_EXTENSIONS = ('.step', '.stp', '.stl', '.obj', '.igs', '.iges')
+
+# 报价表单的可选取值
+MATERIALS = ('aluminum', 'steel', 'stainless_steel', 'plastic')
+PROCESSING_TYPES = ('cnc_milling', 'cnc_turning', '3d_printing')
+ACCURACIES = ('±0.1', '±0.05', '±0.01')
+
+_CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+_WORK_LINK = re.compile(r'href="(/gallery/work/\d+/)"')
+_CATEGORY_LINK = re.compile(r'href="(/gallery/category/[^"/]+/)"')
+_NEXT_PAGE_LINK = re.compile(r'href="(\?after=[^"]+)"')
+# 结果页在分析完成前会定时刷新
+_PENDING_MARKER = 'window.location.reload()'
+
+
+class Stats:
+    """
+    线程安全的各接口延迟和错误统计
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.error_samples = {}
+        # 从提交报价到结果页显示价格的时间，以及轮询结束仍在分析的报价数
+        self.turnaround = []
+        self.unfinished_quotes = 0
+
+    def record(self, endpoint, seconds, error=None):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if error:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+                self.error_samples.setdefault(endpoint, error)
+
+    def record_quote(self, seconds):
+        """
+        :param seconds: 分析完成所用时间，None表示轮询结束仍在分析
+        """
+        with self._lock:
+            if seconds is None:
+                self.unfinished_quotes += 1
+            else:
+                self.turnaround.append(seconds)
+
+
+def percentile(sorted_values, fraction):
+    """
+    最近秩法百分位数
+    """
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class Session:
+    """
+    一个访客：保存Cookie，每个请求新建连接（与gunicorn同步工作进程的行为一致），不自动跟随重定向
+    """
+
+    def __init__(self, base_url, stats, timeout):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = {}
+
+    def request(self, endpoint, method, path, body=None, headers=None, expect=(200,)):
+        """
+        发送请求并记录延迟
+        :return: (状态码, 响应头, 响应文本)，连接失败时状态码为None
+        """
+        connection_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={value}' for key, value in self.cookies.items())
+        start = time.perf_counter()
+        connection = connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            content = response.read()
+            status = response.status
+            response_headers = response.headers
+        except (OSError, http.client.HTTPException) as e:
+            self.stats.record(endpoint, time.perf_counter() - start, f'{type(e).__name__}: {e}')
+            return None, None, ''
+        finally:
+            connection.close()
+        elapsed = time.perf_counter() - start
+
+        for header in response_headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie(header)
+            for key, morsel in cookie.items():
+                self.cookies[key] = morsel.value
+        self.stats.record(endpoint, elapsed, None if status in expect else f'HTTP {status}')
+        return status, response_headers, content.decode('utf-8', 'replace')
+
+
+def encode_multipart(fields, files):
+    """
+    :param files: [(字段名, 文件名, 内容)]
+    :return: (请求体, Content-Type)
+    """
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, file_name, content in files:
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{file_name}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+        lines.append(content)
+        lines.append(b'\r\n')
+    lines.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(lines), f'multipart/form-data; boundary={boundary}'
+
+
+def quote_flow(session, rng, samples, options):
+    """
+    报价访客：打开表单、上传模型、轮询结果页
+    """
+    status, _, page = session.request('quote_form', 'GET', '/quotation/request/')
+    match = _CSRF_INPUT.search(page)
+    if status != 200 or match is None:
+        return
+
+    file_name, content = rng.choice(samples)
+    fields = {
+        'csrfmiddlewaretoken': match.group(1),
+        'name': '压力测试',
+        'email': f'loadtest-{rng.randrange(1000)}@example.com',
+        'phone': '13800000000',
+        'processing_type': rng.choice(PROCESSING_TYPES),
+        'material': rng.choice(MATERIALS),
+        'quantity': str(rng.choice((1, 10, 100))),
+        'accuracy': rng.choice(ACCURACIES),
+        'surface_treatment': 'none',
+        'description': '',
+    }
+    body, content_type = encode_multipart(fields, [('model_file', file_name, content)])
+    status, headers, _ = session.request('quote_submit', 'POST', '/quotation/request/', body,
+                                         {'Content-Type': content_type,
+                                          'Referer': urljoin(options.url, '/quotation/request/')},
+                                         expect=(302,))
+    if status != 302:
+        return
+
+    submitted = time.perf_counter()
+    result_path = urlsplit(headers['Location']).path
+    for _ in range(options.max_polls):
+        status, _, page = session.request('quote_result', 'GET', result_path)
+        if status != 200:
+            return
+        if _PENDING_MARKER not in page:
+            session.stats.record_quote(time.perf_counter() - submitted)
+            return
+        time.sleep(options.poll_interval)
+    session.stats.record_quote(None)
+
+
+def gallery_flow(session, rng, samples, options):
+    """
+    作品浏览访客：列表、详情、分类、下一页
+    """
+    status, _, page = session.request('gallery_list', 'GET', '/gallery/')
+    if status != 200:
+        return
+    works = _WORK_LINK.findall(page)
+    if works:
+        session.request('gallery_detail', 'GET', rng.choice(works))
+    list_path = '/gallery/'
+    categories = _CATEGORY_LINK.findall(page)
+    if categories:
+        list_path = rng.choice(categories)
+        status, _, page = session.request('gallery_category', 'GET', list_path)
+    next_page = _NEXT_PAGE_LINK.search(page) if status == 200 else None
+    if next_page:
+        session.request('gallery_list_page', 'GET', list_path + next_page.group(1))
+
+
+FLOWS = {
+    'quote': quote_flow,
+    'gallery': gallery_flow,
+}
+
+
+def run_level(options, concurrency, samples, mix):
+    """
+    以给定并发数持续运行 options.duration 秒
+    :return: (Stats, 实际耗时)
+    """
+    stats = Stats()
+    deadline = time.monotonic() + options.duration
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def user(index):
+        rng = random.Random(options.seed * 1000 + index)
+        session = Session(options.url, stats, options.timeout)
+        while time.monotonic() < deadline:
+            FLOWS[rng.choices(names, weights)[0]](session, rng, samples, options)
+            if options.think_time:
+                time.sleep(rng.uniform(0, 2 * options.think_time))
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.monotonic() - start
+
+
+def summarize(stats, elapsed):
+    """
+    :return: {接口: {requests, errors, error_rate, rps, p50, p95, p99, max}}（延迟单位毫秒）
+    """
+    summary = {}
+    all_latencies = []
+    for endpoint, latencies in sorted(stats.latencies.items()):
+        values = sorted(latencies)
+        all_latencies += values
+        errors = stats.errors.get(endpoint, 0)
+        summary[endpoint] = _row(values, errors, elapsed)
+        if errors:
+            summary[endpoint]['first_error'] = stats.error_samples[endpoint]
+    summary['TOTAL'] = _row(sorted(all_latencies), sum(stats.errors.values()), elapsed)
+    return summary
+
+
+def summarize_quotes(stats):
+    """
+    报价分析完成时间（秒）
+    """
+    values = sorted(stats.turnaround)
+    return {
+        'completed': len(values),
+        'unfinished': stats.unfinished_quotes,
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'max': values[-1] if values else None,
+    }
+
+
+def _row(values, errors, elapsed):
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'error_rate': round(errors / len(values), 4) if values else 0.0,
+        'rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'p50': ms(percentile(values, 0.50)),
+        'p95': ms(percentile(values, 0.95)),
+        'p99': ms(percentile(values, 0.99)),
+        'max': ms(values[-1] if values else None),
+    }
+
+
+def print_summary(concurrency, summary, quotes, elapsed):
+    print(f'\n并发 {concurrency}（{elapsed:.1f}秒）')
+    print(f"{'接口':<24}{'请求数':>8}{'错误率':>9}{'吞吐(req/s)':>13}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"
+          f"{'max(ms)':>10}")
+    for endpoint, row in summary.items():
+        values = [f"{row[key]:.1f}" if row[key] is not None else '-' for key in ('p50', 'p95', 'p99', 'max')]
+        print(f"{endpoint:<24}{row['requests']:>8}{row['error_rate']:>9.1%}{row['rps']:>13.2f}"
+              + ''.join(f'{value:>10}' for value in values))
+    for endpoint, row in summary.items():
+        if row.get('first_error'):
+            print(f"  {endpoint} 错误示例: {row['first_error']}")
+    if quotes['completed'] or quotes['unfinished']:
+        timing = (f"p50 {quotes['p50']:.2f}s / p95 {quotes['p95']:.2f}s / max {quotes['max']:.2f}s"
+                  if quotes['completed'] else '-')
+        print(f"报价分析完成 {quotes['completed']} 个（{timing}），轮询结束仍在分析 {quotes['unfinished']} 个")
+
+
+def load_samples(paths):
+    """
+    读取样本模型文件（目录中的模型文件全部读取）
+    :return: [(文件名, 内容)]
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        else:
+            files.append(path)
+    samples = []
+    for path in files:
+        if os.path.isfile(path) and os.path.splitext(path)[1].lower() in MODEL_EXTENSIONS:
+            with open(path, 'rb') as f:
+                samples.append((os.path.basename(path), f.read()))
+    return samples
+
+
+def parse_mix(value):
+    mix = []
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in FLOWS:
+            raise argparse.ArgumentTypeError(f"未知的访客类型: {name}（可选 {', '.join(FLOWS)}）")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+class LocalInstance:
+    """
+    在临时目录中启动一套独立实例：数据库（SQLite时）、媒体文件、缓存和指标目录都使用副本，
+    Web使用gunicorn（未安装时使用runserver），同时启动分析工作进程
+    """
+
+    def __init__(self, port, workers, analysis_workers):
+        self.port = port
+        self.workers = workers
+        self.analysis_workers = analysis_workers
+        self.processes = []
+        self.directory = None
+        self.log = None
+
+    def __enter__(self):
+        try:
+            self._start()
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def _start(self):
+        self.directory = tempfile.mkdtemp(prefix='loadtest-')
+        env = dict(os.environ,
+                   MEDIA_ROOT=os.path.join(self.directory, 'media'),
+                   CACHE_DIR=os.path.join(self.directory, 'cache'),
+                   METRICS_DIR=os.path.join(self.directory, 'metrics'),
+                   LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'),
+                   PYTHONUNBUFFERED='1')
+        if not env.get('DB_HOST'):
+            env['SQLITE_PATH'] = os.path.join(self.directory, 'db.sqlite3')
+            shutil.copy(os.path.join(BASE_DIR, 'db.sqlite3'), env['SQLITE_PATH'])
+        media_dir = os.path.join(BASE_DIR, 'media')
+        if os.path.isdir(media_dir):
+            shutil.copytree(media_dir, env['MEDIA_ROOT'])
+        self.log = open(os.path.join(self.directory, 'server.log'), 'w')
+
+        manage = [sys.executable, os.path.join(BASE_DIR, 'manage.py')]
+        if not env.get('DB_HOST'):
+            subprocess.run(manage + ['migrate', '--noinput'], env=env, cwd=BASE_DIR, check=True,
+                           stdout=subprocess.DEVNULL)
+
+        if shutil.which('gunicorn'):
+            web = ['gunicorn', '--config', 'gunicorn.conf.py', '--workers', str(self.workers),
+                   '--bind', f'127.0.0.1:{self.port}', 'machining_platform.wsgi:application']
+        else:
+            print('未安装gunicorn，使用runserver（单进程多线程，结果不能代表生产环境）')
+            web = manage + ['runserver', '--noreload', f'127.0.0.1:{self.port}']
+        self._spawn(web, env)
+        if self.analysis_workers:
+            self._spawn(manage + ['run_analysis_workers', '--processes', str(self.analysis_workers)], env)
+
+        self._wait_ready()
+
+    def _spawn(self, command, env):
+        # 每个进程单独成组，结束时连同gunicorn工作进程、分析子进程一起清理
+        self.processes.append(subprocess.Popen(command, env=env, cwd=BASE_DIR, start_new_session=True,
+                                               stdout=self.log, stderr=subprocess.STDOUT))
+
+    def _wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.processes[0].poll() is not None:
+                raise RuntimeError(f'Web进程启动失败，见 {self.log.name}')
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                connection.request('GET', '/quotation/')
+                connection.getresponse().read()
+                connection.close()
+                return
+            except OSError:
+                time.sleep(0.5)
+        raise RuntimeError(f'Web进程{timeout}秒内未就绪，见 {self.log.name}')
+
+    @staticmethod
+    def _signal_group(process, signum):
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def __exit__(self, *exc_info):
+        for process in self.processes:
+            self._signal_group(process, signal.SIGTERM)
+        deadline = time.monotonic() + 10
+        for process in self.processes:
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                pass
+        # 组长已退出时组内仍可能有子进程，统一强制结束
+        for process in self.processes:
+            self._signal_group(process, signal.SIGKILL)
+            process.wait()
+        if self.log is not None:
+            self.log.close()
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='报价和作品展示流程的HTTP压力测试')
+    parser.add_argument('--url', help='被测实例地址，如 http://127.0.0.1:8000（与 --start 二选一）')
+    parser.add_argument('--start', action='store_true', help='在本机启动独立实例后测试，结束后清理')
+    parser.add_argument('--port', type=int, default=8765, help='--start 时的监听端口（默认8765）')
+    parser.add_argument('--workers', type=int, default=2, help='--start 时的gunicorn工作进程数（默认2）')
+    parser.add_argument('--analysis-workers', type=int, default=1,
+                        help='--start 时的分析工作进程数（默认1，0表示不启动）')
+    parser.add_argument('--concurrency', default='1,4,16', help='并发访客数，逗号分隔，依次测试（默认1,4,16）')
+    parser.add_argument('--duration', type=float, default=30, help='每个并发级别的持续秒数（默认30）')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('quote=1,gallery=4'),
+                        help='访客类型比例（默认 quote=1,gallery=4）')
+    parser.add_argument('--samples', nargs='*', default=[os.path.join(BASE_DIR, 'media', 'quotation_models')],
+                        help='上传的样本模型文件或目录（默认 media/quotation_models）')
+    parser.add_argument('--poll-interval', type=float, default=3, help='结果页轮询间隔秒数（默认3，与页面刷新一致）')
+    parser.add_argument('--max-polls', type=int, default=20, help='结果页最多轮询次数（默认20）')
+    parser.add_argument('--think-time', type=float, default=0, help='访客每轮之间的平均停顿秒数（默认0）')
+    parser.add_argument('--timeout', type=float, default=60, help='单个请求超时秒数（默认60）')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    parser.add_argument('--json', help='把结果写入JSON文件')
+    options = parser.parse_args()
+
+    if bool(options.url) == options.start:
+        parser.error('需要指定 --url 或 --start 其中之一')
+    levels = [int(level) for level in options.concurrency.split(',') if level.strip()]
+    samples = load_samples(options.samples)
+    if any(name == 'quote' for name, _ in options.mix) and not samples:
+        parser.error('没有找到样本模型文件，请用 --samples 指定')
+
+    results = []
+    with contextlib.ExitStack() as stack:
+        if options.start:
+            stack.enter_context(LocalInstance(options.port, options.workers, options.analysis_workers))
+            options.url = f'http://127.0.0.1:{options.port}'
+        for concurrency in levels:
+            stats, elapsed = run_level(options, concurrency, samples, options.mix)
+            summary = summarize(stats, elapsed)
+            quotes = summarize_quotes(stats)
+            print_summary(concurrency, summary, quotes, elapsed)
+            results.append({'concurrency': concurrency, 'seconds': round(elapsed, 2), 'endpoints': summary,
+                            'quotes': quotes})
+
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump({'url': options.url, 'mix': dict(options.mix), 'levels': results}, f,
+                      ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+键集分页，作品列表和报价JSON接口的报价列表共用
+记录按 (created_at, id) 倒序排列，游标记录翻页位置记录的创建时间和ID，
+每页只查询 每页数量+1 行，不需要COUNT，翻到后面的页也不会变慢（配合 (created_at, id) 索引）
+"""
+
+import datetime
+
+from django.db.models import Q
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def encode_cursor(obj):
+    """
+    游标格式：创建时间（自1970年起的微秒数）-ID
+    :param obj: 具有 created_at 和 id 属性的记录
+    """
+    micros = (obj.created_at - EPOCH) // datetime.timedelta(microseconds=1)
+    return f'{micros}-{obj.id}'
+
+
+def decode_cursor(cursor):
+    """
+    :return: (created_at, id)，游标无效时为None
+    """
+    try:
+        micros, object_id = cursor.rsplit('-', 1)
+        return EPOCH + datetime.timedelta(microseconds=int(micros)), int(object_id)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class KeysetPage:
+    """
+    一页记录及前后页的游标
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None):
+    """
+    按 (created_at, id) 倒序分页
+    :param after: 下一页游标，返回该位置之后（更早）的记录
+    :param before: 上一页游标，返回该位置之前（更新）的记录
+    :return: KeysetPage
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+
+    if before is not None:
+        created_at, object_id = before
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=object_id))
+            .order_by('created_at', 'id')[:per_page + 1]
+        )
+        if len(rows) <= per_page:
+            # 已经回到第一页，重新按第一页查询，保证第一页总是完整的
+            return keyset_paginate(queryset, per_page)
+        objects = rows[:per_page][::-1]
+        return KeysetPage(objects, encode_cursor(objects[-1]), encode_cursor(objects[0]))
+
+    if after is not None:
+        created_at, object_id = after
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=object_id))
+    rows = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+    objects = rows[:per_page]
+    next_cursor = encode_cursor(objects[-1]) if len(rows) > per_page else None
+    previous_cursor = encode_cursor(objects[0]) if after is not None and objects else None
+    return KeysetPage(objects, next_cursor, previous_cursor)
@@ -89,11 +89,11 @@ if os.environ.get('DB_HOST'):
         }
     }
 else:
-    # 使用SQLite数据库（开发环境）
+    # 使用SQLite数据库（开发环境），SQLITE_PATH 可指定其它数据库文件（如压力测试使用的副本）
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': str(BASE_DIR / 'db.sqlite3'),  # 修复WindowsPath问题
+            'NAME': os.environ.get('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3')),  # 修复WindowsPath问题
         }
     }
 
@@ -142,7 +142,71 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 # Media files (用户上传的文件)
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# 批量报价一次可选择多个模型文件，与 quotation.bulk.MAX_BATCH_FILES 保持一致（Django默认100）
+DATA_UPLOAD_MAX_NUMBER_FILES = 500
+
+# 缓存（作品展示页面）
+# 使用文件缓存，Web进程与分析工作进程共享同一目录，工作进程更新作品后页面缓存同样失效
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+# 3D模型分析子进程隔离
+# 每个分析任务在子进程中执行，超时或超出内存上限时记录为分析失败
+ANALYSIS_ISOLATION = os.environ.get('ANALYSIS_ISOLATION', '1') == '1'
+ANALYSIS_TIMEOUT = int(os.environ.get('ANALYSIS_TIMEOUT', '120'))  # 秒
+ANALYSIS_MEMORY_LIMIT_MB = int(os.environ.get('ANALYSIS_MEMORY_LIMIT_MB', '2048'))  # 0表示不限制
+ANALYSIS_MAX_JOBS_PER_CHILD = int(os.environ.get('ANALYSIS_MAX_JOBS_PER_CHILD', '50'))
+# 超过该三角面数的网格不生成完整标准网格（不估算曲率），预览和缩略图使用流式简化的网格
+ANALYSIS_MESH_MAX_TRIANGLES = int(os.environ.get('ANALYSIS_MESH_MAX_TRIANGLES', '1000000'))
+
+# 性能指标：各进程把阶段耗时等指标写入该目录下各自的文件，/metrics 汇总输出
+# Web与分析工作进程需要共享该目录；设置为空时只输出处理 /metrics 请求的进程自己的指标
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+# Web进程在请求结束时最多每隔该秒数写一次指标文件
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+
+# 测试运行器把指标目录指向临时目录
+TEST_RUNNER = 'machining_platform.test_runner.TestRunner'
+
+# 日志：LOG_LEVEL=DEBUG 输出每个报价的分析细节（文件大小、特征），WARNING 只输出错误
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s [%(process)d] %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'quotation': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+        },
+        'gallery': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+        },
+    },
+}
+
+# 报价JSON接口令牌，接口请求需带 Authorization: Bearer <令牌>；未设置时接口不可用
+QUOTATION_API_TOKEN = os.environ.get('QUOTATION_API_TOKEN', '')
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -0,0 +1,26 @@
+"""
+测试运行器
+测试期间把性能指标目录（METRICS_DIR）指向临时目录，测试进程、分析子进程和退出时写入的指标文件不会留在项目的 metrics 目录
+"""
+
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.TemporaryDirectory(prefix='metrics-')
+        settings.METRICS_DIR = self.metrics_dir.name
+
+    def teardown_test_environment(self, **kwargs):
+        from quotation import metrics
+
+        metrics.flush()
+        # 进程退出时的写入不再落到任何目录
+        settings.METRICS_DIR = ''
+        self.metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -18,10 +18,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from quotation.views import metrics_export
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('gallery/', include('gallery.urls', namespace='gallery')),
     path('quotation/', include('quotation.urls', namespace='quotation')),
+    path('metrics', metrics_export, name='metrics'),
 ]
 
 if settings.DEBUG:
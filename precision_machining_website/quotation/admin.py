@@ -1,3 +1,169 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.html import format_html
 
-# Register your models here.
+from .jobs import apply_price
+from .models import (PricingBasePrice, PricingMaterialMultiplier, PricingPrecisionFactor, PricingRuleSet,
+                     QuotationBatch, QuotationBatchItem, QuotationRequest)
+from .pricing import PRICING_FIELDS
+from .thumbnails import thumbnail_url
+
+
+@admin.register(QuotationRequest)
+class QuotationRequestAdmin(admin.ModelAdmin):
+    list_display = ('id', 'thumbnail', 'name', 'processing_type', 'material', 'quantity',
+                    'price_min', 'price_max', 'analysis_status', 'is_processed', 'created_at')
+    list_filter = ('processing_type', 'material', 'analysis_status', 'is_processed', 'created_at')
+    search_fields = ('name', 'email', 'phone', 'description')
+    ordering = ('-created_at',)
+    
+    # 设置只读字段
+    readonly_fields = ('thumbnail', 'content_hash', 'file_format', 'file_size', 'analysis_status', 'analysis_error',
+                       'price_min', 'price_max', 'price_breakdown', 'pricing_version', 'created_at')
+    
+    # 定义字段分组显示
+    fieldsets = (
+        ('客户信息', {
+            'fields': ('name', 'email', 'phone')
+        }),
+        ('项目信息', {
+            'fields': ('processing_type', 'material', 'quantity', 'accuracy', 'surface_treatment',
+                       'description', 'is_processed')
+        }),
+        ('3D模型', {
+            'fields': ('thumbnail', 'model_file', 'content_hash', 'file_format', 'file_size',
+                       'analysis_status', 'analysis_error')
+        }),
+        ('模型分析结果', {
+            'fields': ('volume', 'surface_area', 'bounding_box_length', 'bounding_box_width',
+                       'bounding_box_height', 'min_radius', 'max_aspect_ratio', 'complexity_score',
+                       'min_tool_diameter', 'machining_difficulty', 'radius_histogram'),
+            'classes': ('collapse',)
+        }),
+        ('报价结果', {
+            'fields': ('price_min', 'price_max', 'pricing_version', 'price_breakdown'),
+        }),
+        ('时间信息', {
+            'fields': ('created_at',),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    @admin.display(description='缩略图')
+    def thumbnail(self, obj):
+        url = thumbnail_url(obj.content_hash)
+        if not url:
+            return '-'
+        return format_html('<img src="{}" width="64" height="64" alt="">', url)
+    
+    def save_model(self, request, obj, form, change):
+        # 修改了加工参数或模型特征时按当前规则重新计算保存的价格，结果页、接口和导出读取的都是保存的价格
+        if not obj.is_analysis_pending and (not change or set(form.changed_data) & set(PRICING_FIELDS)):
+            apply_price(obj)
+            if change:
+                self.message_user(request, '已按当前报价规则重新计算价格')
+        super().save_model(request, obj, form, change)
+
+
+
+
+class QuotationBatchItemInline(admin.TabularInline):
+    model = QuotationBatchItem
+    extra = 0
+    fields = ('position', 'file_name', 'quotation')
+    readonly_fields = fields
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(QuotationBatch)
+class QuotationBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'processing_type', 'material', 'quantity', 'created_at')
+    list_filter = ('processing_type', 'material', 'created_at')
+    search_fields = ('name', 'email', 'phone', 'description')
+    readonly_fields = ('skipped_files', 'created_at')
+    inlines = [QuotationBatchItemInline]
+
+class UsedRuleSetReadOnlyMixin:
+    """已有报价使用的规则版本只读，修改规则需要复制为新版本"""
+    
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and obj.is_used:
+            return False
+        return super().has_change_permission(request, obj)
+    
+    def has_add_permission(self, request, obj=None):
+        if obj is not None and obj.is_used:
+            return False
+        return super().has_add_permission(request, obj)
+    
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and obj.is_used:
+            return False
+        return super().has_delete_permission(request, obj)
+
+
+class PricingBasePriceInline(UsedRuleSetReadOnlyMixin, admin.TabularInline):
+    model = PricingBasePrice
+    extra = 0
+
+
+class PricingMaterialMultiplierInline(UsedRuleSetReadOnlyMixin, admin.TabularInline):
+    model = PricingMaterialMultiplier
+    extra = 0
+
+
+class PricingPrecisionFactorInline(UsedRuleSetReadOnlyMixin, admin.TabularInline):
+    model = PricingPrecisionFactor
+    extra = 0
+
+
+@admin.register(PricingRuleSet)
+class PricingRuleSetAdmin(admin.ModelAdmin):
+    list_display = ('version', 'is_active', 'note', 'created_at')
+    readonly_fields = ('version', 'is_active', 'created_at')
+    inlines = [PricingBasePriceInline, PricingMaterialMultiplierInline, PricingPrecisionFactorInline]
+    actions = ['activate', 'copy_as_new_version']
+    
+    fieldsets = (
+        (None, {
+            'fields': ('version', 'is_active', 'note', 'created_at')
+        }),
+        ('默认值', {
+            'fields': ('default_base_price', 'default_material_multiplier')
+        }),
+        ('加工难度', {
+            'fields': ('aspect_ratio_threshold', 'aspect_ratio_factor', 'min_radius_threshold', 'min_radius_factor')
+        }),
+        ('价格区间', {
+            'fields': ('price_range_low', 'price_range_high')
+        }),
+    )
+    
+    def has_change_permission(self, request, obj=None):
+        # 已使用的版本只能查看，保证报价记录的规则版本与计算时一致
+        if obj is not None and obj.is_used:
+            return False
+        return super().has_change_permission(request, obj)
+    
+    def has_delete_permission(self, request, obj=None):
+        if obj is not None and (obj.is_used or obj.is_active):
+            return False
+        return super().has_delete_permission(request, obj)
+    
+    @admin.action(description='设为当前使用的版本')
+    def activate(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, '请只选择一个版本', messages.ERROR)
+            return
+        rule_set = queryset.get()
+        rule_set.is_active = True
+        rule_set.save()
+        self.message_user(request, f'已启用报价规则 v{rule_set.version}，新报价将按该版本计算')
+    
+    @admin.action(description='复制为新版本')
+    def copy_as_new_version(self, request, queryset):
+        for rule_set in queryset:
+            new = rule_set.copy()
+            self.message_user(request, f'已由 v{rule_set.version} 复制出 v{new.version}（未启用）')
@@ -0,0 +1,239 @@
+"""
+报价JSON接口
+供ERP等系统创建报价、轮询分析状态和价格、按客户列出报价：
+    POST /quotation/api/quotes/           创建报价（multipart表单，字段与报价表单相同）
+    GET  /quotation/api/quotes/           报价列表，可按 email 过滤，按 (created_at, id) 游标分页
+    GET  /quotation/api/quotes/<id>/      单个报价
+响应带强ETag：单个报价的ETag由响应中序列化的各字段计算，If-None-Match命中时只查询这些字段、不生成响应就返回304；
+请求需带 Authorization: Bearer <QUOTATION_API_TOKEN>，未配置令牌时接口不可用
+"""
+
+import hashlib
+import hmac
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+
+from machining_platform.pagination import decode_cursor, keyset_paginate
+
+from . import metrics
+from .forms import QuotationRequestForm
+from .jobs import apply_price, enqueue_analysis
+from .models import QuotationRequest
+from .previews import preview_urls
+from .thumbnails import thumbnail_url
+from .upload_handlers import ModelFileUploadHandler
+
+# 接口数据格式版本，响应字段变化时递增，使客户端缓存的ETag失效
+API_VERSION = 1
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# 报价接口返回的模型特征
+FEATURE_FIELDS = (
+    'volume', 'surface_area', 'bounding_box_length', 'bounding_box_width', 'bounding_box_height',
+    'min_radius', 'max_aspect_ratio', 'complexity_score', 'min_tool_diameter', 'machining_difficulty',
+    'radius_histogram',
+)
+
+# 单个报价响应中序列化的全部字段，任何一个变化时ETag随之变化
+# （预览和缩略图在分析完成、分析状态变化之前生成，由 content_hash 和 analysis_status 决定）
+ETAG_FIELDS = (
+    'id', 'created_at', 'model_file', 'analysis_status', 'analysis_error', 'processing_type', 'material',
+    'quantity', 'accuracy', 'surface_treatment', 'is_processed', 'file_format', 'file_size', 'content_hash',
+    'price_min', 'price_max', 'pricing_version', 'price_breakdown',
+) + FEATURE_FIELDS
+
+
+def api_error(status, message, **extra):
+    return JsonResponse(dict({'error': message}, **extra), status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_token_required(view):
+    """
+    校验Bearer令牌；接口返回客户的联系方式和价格，未配置 QUOTATION_API_TOKEN 时拒绝所有请求
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = getattr(settings, 'QUOTATION_API_TOKEN', '')
+        if not token:
+            return api_error(503, '报价接口未启用（未配置 QUOTATION_API_TOKEN）')
+        provided = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(provided.encode(), f'Bearer {token}'.encode()):
+            return api_error(401, '缺少或无效的接口令牌')
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def api_methods(*methods):
+    """
+    限制请求方法，其它方法返回JSON格式的405
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = api_error(405, '不支持的请求方法')
+                response['Allow'] = ', '.join(methods)
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def quote_status(quotation):
+    """
+    no_model：没有上传模型；pending：分析中；done：已完成；analysis_failed：未能自动分析
+    """
+    if not quotation.model_file:
+        return 'no_model'
+    return quotation.analysis_status or QuotationRequest.ANALYSIS_PENDING
+
+
+def serialize_quote(request, quotation, detail=True):
+    """
+    报价的JSON表示
+    :param detail: 是否包含特征、价格明细和预览地址
+    """
+    pending = quotation.is_analysis_pending
+    data = {
+        'id': quotation.id,
+        'url': request.build_absolute_uri(reverse('quotation:api_quote', args=[quotation.id])),
+        'result_url': request.build_absolute_uri(reverse('quotation:result', args=[quotation.id])),
+        'created_at': quotation.created_at,
+        'status': quote_status(quotation),
+        'processing_type': quotation.processing_type,
+        'material': quotation.material,
+        'quantity': quotation.quantity,
+        'accuracy': quotation.accuracy,
+        'surface_treatment': quotation.surface_treatment,
+        'is_processed': quotation.is_processed,
+        'price': None if pending or quotation.price_min is None else {
+            'min': quotation.price_min,
+            'max': quotation.price_max,
+            'currency': 'CNY',
+            'rule_version': quotation.pricing_version,
+        },
+    }
+    if detail:
+        data['file'] = {
+            'name': quotation.model_file.name,
+            'format': quotation.file_format,
+            'size': quotation.file_size,
+            'content_hash': quotation.content_hash,
+        } if quotation.model_file else None
+        data['analysis_error'] = quotation.analysis_error
+        data['features'] = None if pending else {field: getattr(quotation, field) for field in FEATURE_FIELDS}
+        if data['price'] is not None:
+            data['price']['breakdown'] = quotation.price_breakdown
+        data['preview_urls'] = [request.build_absolute_uri(url) for url in preview_urls(quotation.content_hash)]
+        thumbnail = thumbnail_url(quotation.content_hash)
+        data['thumbnail_url'] = request.build_absolute_uri(thumbnail) if thumbnail else None
+    return data
+
+
+def json_response(data, status=200):
+    """
+    JSON响应，ETag为响应内容的SHA-256
+    """
+    content = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    response = JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = quote_etag(hashlib.sha256(content.encode('utf-8')).hexdigest()[:32])
+    return response
+
+
+def quote_etag_value(request, quote_id):
+    """
+    单个报价的ETag，只查询决定响应内容的几个字段
+    """
+    state = QuotationRequest.objects.filter(id=quote_id).values_list(*ETAG_FIELDS).first()
+    if state is None:
+        return None
+    return hashlib.sha256(repr((API_VERSION,) + state).encode('utf-8')).hexdigest()[:32]
+
+
+@csrf_exempt
+@api_token_required
+@api_methods('GET', 'HEAD', 'POST')
+def quote_collection(request):
+    """报价列表（GET）和创建报价（POST）"""
+    if request.method == 'POST':
+        # 上传处理器必须在读取request.POST之前注册
+        request.upload_handlers.insert(0, ModelFileUploadHandler(request))
+        return _create_quote(request)
+    return _list_quotes(request)
+
+
+def _create_quote(request):
+    form = QuotationRequestForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return api_error(400, '报价参数无效', fields=form.errors.get_json_data())
+    quotation = form.save()
+    enqueue_analysis(quotation)
+    response = JsonResponse(serialize_quote(request, quotation), status=201, encoder=DjangoJSONEncoder,
+                            json_dumps_params={'ensure_ascii': False})
+    response['Location'] = reverse('quotation:api_quote', args=[quotation.id])
+    return response
+
+
+def _list_quotes(request):
+    try:
+        page_size = min(MAX_PAGE_SIZE, max(1, int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))))
+    except ValueError:
+        return api_error(400, 'page_size必须是整数')
+    after, before = request.GET.get('after'), request.GET.get('before')
+    if any(cursor and decode_cursor(cursor) is None for cursor in (after, before)):
+        return api_error(400, '分页游标无效')
+
+    quotations = QuotationRequest.objects.only(
+        'id', 'created_at', 'model_file', 'analysis_status', 'processing_type', 'material', 'quantity',
+        'accuracy', 'surface_treatment', 'is_processed', 'price_min', 'price_max', 'pricing_version',
+    )
+    email = request.GET.get('email')
+    if email:
+        quotations = quotations.filter(email=email)
+
+    page = keyset_paginate(quotations, page_size, after=after, before=before)
+    base_url = request.build_absolute_uri(request.path)
+    params = {key: request.GET[key] for key in ('email', 'page_size') if request.GET.get(key)}
+    data = {
+        'results': [serialize_quote(request, quotation, detail=False) for quotation in page],
+        'next': f"{base_url}?{urlencode(dict(params, after=page.next_cursor))}" if page.has_next() else None,
+        'previous': (f"{base_url}?{urlencode(dict(params, before=page.previous_cursor))}"
+                     if page.has_previous() else None),
+    }
+    response = json_response(data)
+    # 列表内容不变时返回304
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+@csrf_exempt
+@api_token_required
+@api_methods('GET', 'HEAD')
+@condition(etag_func=quote_etag_value)
+def quote_detail(request, quote_id):
+    """单个报价，If-None-Match与当前ETag一致时由condition直接返回304"""
+    quotation = QuotationRequest.objects.filter(id=quote_id).first()
+    if quotation is None:
+        return api_error(404, '报价不存在')
+
+    # 早期的报价请求在第一次读取时补算价格（与结果页一致）
+    if not quotation.is_analysis_pending and (quotation.price_min is None or quotation.price_breakdown is None):
+        quotation.save(update_fields=apply_price(quotation))
+
+    with metrics.stage('render'):
+        response = JsonResponse(serialize_quote(request, quotation), encoder=DjangoJSONEncoder,
+                                json_dumps_params={'ensure_ascii': False})
+    # 补算价格后状态已变化，按最新状态设置ETag（condition不会覆盖已有的ETag）
+    response['ETag'] = quote_etag(quote_etag_value(request, quote_id))
+    return response
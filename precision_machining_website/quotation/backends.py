@@ -0,0 +1,275 @@
+"""
+内置3D模型分析后端
+STL/OBJ使用NumPy流式读取，STEP先用实体扫描器估算复杂度，STEP/IGES的精确几何使用CadQuery(OCC)，
+trimesh作为通用网格兜底
+cadquery、trimesh只在后端第一次实际使用（或预热）时导入
+"""
+
+import os
+
+import numpy as np
+
+from .engine import (
+    CAPABILITY_TRIANGLES,
+    COST_CHEAP,
+    COST_EXPENSIVE,
+    COST_FALLBACK,
+    COST_MODERATE,
+    AnalyzerBackend,
+    is_module_installed,
+    optional_import,
+    register_backend,
+)
+from .formats import (
+    FORMAT_IGES,
+    FORMAT_OBJ,
+    FORMAT_STEP,
+    FORMAT_STL_ASCII,
+    FORMAT_STL_BINARY,
+    FORMAT_UNKNOWN,
+)
+from .geometry import MeshGeometry, calculate_aspect_ratio
+from .obj_reader import iter_obj_triangles
+from .step_scanner import analyze_step, score_brep_complexity
+from .stl_reader import iter_stl_triangles
+
+MESH_FEATURES = frozenset([
+    'volume',
+    'surface_area',
+    'bounding_box_length',
+    'bounding_box_width',
+    'bounding_box_height',
+    'max_aspect_ratio',
+    'face_count',
+    CAPABILITY_TRIANGLES,
+])
+
+BREP_FEATURES = frozenset([
+    'volume',
+    'surface_area',
+    'bounding_box_length',
+    'bounding_box_width',
+    'bounding_box_height',
+    'max_aspect_ratio',
+    'complexity_score',
+    CAPABILITY_TRIANGLES,
+])
+
+# B-rep三角化精度 (mm)
+TESSELLATION_TOLERANCE = 0.1
+
+# OCC面类型分类，用于B-rep复杂度评分
+CURVED_FACE_TYPES = frozenset(['CYLINDER', 'CONE', 'SPHERE', 'TORUS'])
+FREEFORM_FACE_TYPES = frozenset(['BSPLINE', 'BEZIER', 'REVOLUTION', 'EXTRUSION', 'OFFSET', 'OTHER'])
+
+
+def _geometry_of(triangle_chunks):
+    geometry = MeshGeometry()
+    for triangles in triangle_chunks:
+        geometry.add_chunks(triangles)
+    return geometry.to_features()
+
+
+# 预热用的单位立方体（12个三角面）
+_WARMUP_CUBE = np.array([
+    [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1],
+], dtype=np.float64)[[
+    [0, 2, 1], [0, 3, 2], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4],
+    [1, 2, 6], [1, 6, 5], [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7],
+]]
+
+
+class MeshBackend(AnalyzerBackend):
+    """
+    能分块提供三角面的后端，几何特征统一由几何内核计算
+    """
+    features = MESH_FEATURES
+
+    def warmup(self):
+        _geometry_of([_WARMUP_CUBE])
+
+    def analyze(self, file_path, file_format):
+        return _geometry_of(self.iter_triangles(file_path, file_format))
+
+
+@register_backend
+class StlBackend(MeshBackend):
+    """
+    STL流式读取（二进制内存映射、文本批量解析）
+    """
+    name = 'stl'
+    formats = [FORMAT_STL_BINARY, FORMAT_STL_ASCII]
+    cost = COST_CHEAP
+
+    def iter_triangles(self, file_path, file_format):
+        return iter_stl_triangles(file_path, file_format)
+
+
+@register_backend
+class ObjBackend(MeshBackend):
+    """
+    OBJ批量解析
+    """
+    name = 'obj'
+    formats = [FORMAT_OBJ]
+    cost = COST_CHEAP
+
+    def iter_triangles(self, file_path, file_format):
+        return iter_obj_triangles(file_path)
+
+
+@register_backend
+class TrimeshBackend(MeshBackend):
+    """
+    trimesh通用网格加载，处理原生后端解析失败的网格文件
+    """
+    name = 'trimesh'
+    formats = [FORMAT_STL_BINARY, FORMAT_STL_ASCII, FORMAT_OBJ, FORMAT_UNKNOWN]
+    cost = COST_MODERATE
+
+    def is_available(self):
+        return is_module_installed('trimesh')
+
+    def warmup(self):
+        optional_import('trimesh').creation.box().triangles
+
+    def iter_triangles(self, file_path, file_format):
+        model = optional_import('trimesh').load(file_path, force='mesh')
+        yield model.triangles
+
+
+class BrepBackend(AnalyzerBackend):
+    """
+    基于OCC B-rep的后端，体积和表面积按精确几何计算
+    """
+    features = BREP_FEATURES
+    cost = COST_EXPENSIVE
+
+    def __init__(self):
+        # 只保留最近一次加载的形体，分析和三角化同一文件时不重复加载
+        self._last_shape = (None, None)
+
+    def is_available(self):
+        return is_module_installed('cadquery')
+
+    def warmup(self):
+        # 创建并三角化一个小立方体，完成OCC的首次初始化
+        cq = optional_import('cadquery')
+        cq.Workplane().box(1, 1, 1).val().tessellate(TESSELLATION_TOLERANCE)
+
+    def load_shape(self, file_path):
+        raise NotImplementedError
+
+    def get_shape(self, file_path):
+        cached_path, shape = self._last_shape
+        if cached_path != file_path:
+            shape = self.load_shape(file_path)
+            self._last_shape = (file_path, shape)
+        return shape
+
+    def analyze(self, file_path, file_format):
+        shape = self.get_shape(file_path)
+        features = {}
+
+        # 计算体积 (转换为立方厘米)
+        volume = shape.Volume()
+        if volume is not None:
+            features['volume'] = max(0.0, volume) / 1000.0
+
+        # 计算表面积 (转换为平方厘米)
+        area = shape.Area()
+        if area is not None:
+            features['surface_area'] = area / 100.0
+
+        # 获取包围盒
+        bbox = shape.BoundingBox()
+        if bbox is not None:
+            features['bounding_box_length'] = bbox.xlen
+            features['bounding_box_width'] = bbox.ylen
+            features['bounding_box_height'] = bbox.zlen
+            features['max_aspect_ratio'] = calculate_aspect_ratio([bbox.xlen, bbox.ylen, bbox.zlen])
+
+        # 复杂度评估：按面数和曲面构成评分
+        face_types = [face.geomType() for face in shape.Faces()]
+        features['complexity_score'] = score_brep_complexity(
+            face_count=len(face_types),
+            curved_count=sum(1 for face_type in face_types if face_type in CURVED_FACE_TYPES),
+            freeform_count=sum(1 for face_type in face_types if face_type in FREEFORM_FACE_TYPES),
+            solid_count=max(1, len(shape.Solids())),
+        )
+        return features
+
+    def iter_triangles(self, file_path, file_format):
+        shape = self.get_shape(file_path)
+        vertices, triangles = shape.tessellate(TESSELLATION_TOLERANCE)
+        vertices = np.array([vertex.toTuple() for vertex in vertices], dtype=np.float64)
+        faces = np.array(triangles, dtype=np.int64).reshape(-1, 3)
+        yield vertices[faces]
+
+
+@register_backend
+class StepScanBackend(AnalyzerBackend):
+    """
+    STEP实体流式扫描，不加载B-rep即可得到复杂度评分和最小拐角半径
+    """
+    name = 'step-scan'
+    formats = [FORMAT_STEP]
+    cost = COST_CHEAP
+    features = frozenset(['complexity_score', 'brep_face_count', 'min_radius', 'radius_histogram'])
+
+    def analyze(self, file_path, file_format):
+        return analyze_step(file_path)
+
+
+@register_backend
+class StepBackend(BrepBackend):
+    """
+    CadQuery加载STEP
+    """
+    name = 'cadquery-step'
+    formats = [FORMAT_STEP]
+
+    def load_shape(self, file_path):
+        cq = optional_import('cadquery')
+        solids = cq.importers.importStep(file_path).vals()
+        if len(solids) == 1:
+            return solids[0]
+        return cq.Compound.makeCompound(solids)
+
+
+@register_backend
+class IgesBackend(BrepBackend):
+    """
+    OCC的IGES读取器（CadQuery安装时自带OCP）
+    """
+    name = 'occ-iges'
+    formats = [FORMAT_IGES]
+
+    def warmup(self):
+        super().warmup()
+        optional_import('OCP.IGESControl')
+
+    def load_shape(self, file_path):
+        from OCP.IFSelect import IFSelect_RetDone
+        from OCP.IGESControl import IGESControl_Reader
+
+        reader = IGESControl_Reader()
+        if reader.ReadFile(file_path) != IFSelect_RetDone:
+            raise ValueError(f'无法读取IGES文件: {file_path}')
+        reader.TransferRoots()
+        return optional_import('cadquery').Shape.cast(reader.OneShape())
+
+
+@register_backend
+class FileSizeBackend(AnalyzerBackend):
+    """
+    兜底估算：没有后端能分析时，根据文件大小估算复杂度
+    """
+    name = 'file-size'
+    cost = COST_FALLBACK
+    features = frozenset(['complexity_score'])
+
+    def analyze(self, file_path, file_format):
+        file_size = os.path.getsize(file_path)
+        return {'complexity_score': min(5.0, max(1.0, file_size / 100000.0))}
@@ -0,0 +1,340 @@
+"""
+3D模型分析后端基准测试
+对 media/quotation_models/ 下的真实样本和生成的参数化零件（圆环面网格，1千到5百万个三角面）
+逐个后端、逐个阶段测量墙钟耗时、每秒三角面数和峰值RSS增量；
+每次测量在fork出的子进程中执行，峰值RSS不受之前测量的影响。
+结果与JSON基线比较，超过阈值视为性能回退（见 bench_analyzers 命令）
+"""
+
+import math
+import multiprocessing
+import os
+import platform
+import time
+
+import numpy as np
+from django import db
+
+from .engine import CAPABILITY_TRIANGLES, COST_FALLBACK, get_backends, is_module_installed, optional_import
+from .feature_cache import compute_content_hash
+from .formats import FORMAT_UNKNOWN, sniff_file
+from .metrics import peak_rss
+
+# 生成算法变化时递增，使已生成的语料文件失效
+CORPUS_VERSION = 1
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000, 5000000)
+# 文本格式文件体积大、解析慢，只生成较小的零件
+MAX_ASCII_TRIANGLES = 200000
+MAX_OBJ_TRIANGLES = 1000000
+# 生成STEP零件（需要CadQuery）时阵列的孔数
+STEP_HOLE_COUNTS = (1, 16, 100)
+
+STAGE_ANALYZE = 'analyze'
+STAGE_MESH = 'mesh'
+STAGE_CURVATURE = 'curvature'
+STAGES = (STAGE_ANALYZE, STAGE_MESH, STAGE_CURVATURE)
+
+# 耗时低于该值（秒）的差异视为测量噪声
+MIN_TIME_REGRESSION = 0.05
+# 峰值RSS增量低于该值（MB）的差异视为噪声
+MIN_RSS_REGRESSION_MB = 16
+
+
+def torus_mesh(triangle_count, major_radius=40.0, minor_radius=12.0):
+    """
+    参数化圆环面网格，三角面数接近 triangle_count
+    :return: (顶点 (V,3), 三角面 (F,3))
+    """
+    minor_segments = max(3, int(round(math.sqrt(triangle_count / 8.0))))
+    major_segments = max(3, int(round(triangle_count / (2.0 * minor_segments))))
+    u = np.linspace(0, 2 * np.pi, major_segments, endpoint=False)
+    v = np.linspace(0, 2 * np.pi, minor_segments, endpoint=False)
+    uu, vv = np.meshgrid(u, v, indexing='ij')
+    ring = major_radius + minor_radius * np.cos(vv)
+    vertices = np.stack([ring * np.cos(uu), ring * np.sin(uu), minor_radius * np.sin(vv)], axis=-1).reshape(-1, 3)
+
+    i, j = np.meshgrid(np.arange(major_segments), np.arange(minor_segments), indexing='ij')
+    a = i * minor_segments + j
+    b = ((i + 1) % major_segments) * minor_segments + j
+    c = ((i + 1) % major_segments) * minor_segments + (j + 1) % minor_segments
+    d = i * minor_segments + (j + 1) % minor_segments
+    faces = np.concatenate([np.stack([a, b, c], axis=-1).reshape(-1, 3),
+                            np.stack([a, c, d], axis=-1).reshape(-1, 3)])
+    return vertices, faces
+
+
+def write_binary_stl(path, vertices, faces, chunk_size=500000):
+    """
+    分块写入二进制STL
+    """
+    from .stl_reader import STL_RECORD_DTYPE
+
+    with open(path, 'wb') as f:
+        f.write(b'benchmark corpus'.ljust(80, b' '))
+        f.write(np.uint32(len(faces)).tobytes())
+        for start in range(0, len(faces), chunk_size):
+            triangles = vertices[faces[start:start + chunk_size]]
+            normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+            records = np.zeros(len(triangles), dtype=STL_RECORD_DTYPE)
+            records['normal'] = normals
+            records['vertices'] = triangles
+            f.write(records.tobytes())
+
+
+def write_ascii_stl(path, vertices, faces):
+    with open(path, 'w') as f:
+        f.write('solid benchmark\n')
+        for triangle in vertices[faces]:
+            f.write('facet normal 0 0 0\nouter loop\n')
+            for vertex in triangle:
+                f.write(f'vertex {vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}\n')
+            f.write('endloop\nendfacet\n')
+        f.write('endsolid benchmark\n')
+
+
+def write_obj(path, vertices, faces):
+    with open(path, 'w') as f:
+        np.savetxt(f, vertices, fmt='v %.6f %.6f %.6f')
+        np.savetxt(f, faces + 1, fmt='f %d %d %d')
+
+
+def write_step_part(path, hole_count):
+    """
+    带孔阵列和圆角的板件，需要CadQuery
+    """
+    cq = optional_import('cadquery')
+    side = max(1, int(math.ceil(math.sqrt(hole_count))))
+    pitch = 10.0
+    plate = (cq.Workplane('XY').box(side * pitch + 10, side * pitch + 10, 8)
+             .edges('|Z').fillet(3)
+             .faces('>Z').workplane()
+             .rarray(pitch, pitch, side, side).hole(4))
+    cq.exporters.export(plate, path)
+
+
+def generate_corpus(corpus_dir, sizes=DEFAULT_SIZES, log=None):
+    """
+    生成（或复用已生成的）参数化零件
+    :return: 文件路径列表
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = []
+
+    def target(name, writer, *args):
+        path = os.path.join(corpus_dir, name)
+        if not os.path.exists(path):
+            if log:
+                log(f'生成 {name}')
+            tmp_path = path + '.tmp'
+            writer(tmp_path, *args)
+            os.replace(tmp_path, path)
+        paths.append(path)
+
+    for size in sizes:
+        vertices, faces = torus_mesh(size)
+        prefix = f'v{CORPUS_VERSION}-torus-{size}'
+        target(f'{prefix}.stl', write_binary_stl, vertices, faces)
+        if size <= MAX_ASCII_TRIANGLES:
+            target(f'{prefix}-ascii.stl', write_ascii_stl, vertices, faces)
+        if size <= MAX_OBJ_TRIANGLES:
+            target(f'{prefix}.obj', write_obj, vertices, faces)
+
+    if is_module_installed('cadquery'):
+        for hole_count in STEP_HOLE_COUNTS:
+            target(f'v{CORPUS_VERSION}-plate-{hole_count}-holes.step', write_step_part, hole_count)
+    elif log:
+        log('CadQuery未安装，跳过生成STEP零件')
+    return paths
+
+
+def list_samples(samples_dir):
+    """
+    真实样本，内容相同的文件只保留一个
+    """
+    if not os.path.isdir(samples_dir):
+        return []
+    seen = set()
+    paths = []
+    for name in sorted(os.listdir(samples_dir)):
+        path = os.path.join(samples_dir, name)
+        if not os.path.isfile(path):
+            continue
+        content_hash = compute_content_hash(path)
+        if content_hash not in seen:
+            seen.add(content_hash)
+            paths.append(path)
+    return paths
+
+
+def _measure(results, stage, func):
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    value = func()
+    results[stage] = {
+        'seconds': time.perf_counter() - start,
+        'peak_rss_delta_mb': (peak_rss() - rss_before) / (1024 * 1024) if rss_before is not None else None,
+    }
+    return value
+
+
+def _run_backend(file_path, file_format, backend_name, stages):
+    from .curvature import estimate_min_concave_radius, stack_triangles
+    from .mesh_cache import CanonicalMesh
+
+    backend = next(backend for backend in get_backends(file_format) if backend.name == backend_name)
+    results = {}
+    triangles = None
+    if STAGE_ANALYZE in stages:
+        features = _measure(results, STAGE_ANALYZE, lambda: backend.analyze(file_path, file_format))
+        triangles = features.get('face_count')
+    if CAPABILITY_TRIANGLES in backend.features and (STAGE_MESH in stages or STAGE_CURVATURE in stages):
+        mesh = _measure(results, STAGE_MESH, lambda: CanonicalMesh.from_triangles(
+            stack_triangles(backend.iter_triangles(file_path, file_format))))
+        triangles = mesh.face_count
+        if STAGE_CURVATURE in stages:
+            _measure(results, STAGE_CURVATURE, lambda: estimate_min_concave_radius(mesh.triangles(), mesh.faces))
+    return results, triangles
+
+
+def _child_main(conn, *args):
+    try:
+        conn.send(('ok',) + _run_backend(*args))
+    except MemoryError:
+        conn.send(('error', '内存不足'))
+    except Exception as e:
+        conn.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+
+def run_in_child(file_path, file_format, backend_name, stages, timeout):
+    """
+    在fork出的子进程中测量一个后端
+    :return: (各阶段结果, 三角面数)
+    :raises RuntimeError: 超时、崩溃或分析出错
+    """
+    db.connections.close_all()
+    context = multiprocessing.get_context('fork')
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(target=_child_main,
+                              args=(child_conn, file_path, file_format, backend_name, stages), daemon=True)
+    process.start()
+    child_conn.close()
+    try:
+        if not parent_conn.poll(timeout):
+            raise RuntimeError(f'超过{timeout}秒未完成')
+        try:
+            response = parent_conn.recv()
+        except EOFError:
+            raise RuntimeError(f'子进程异常退出 (exitcode={process.exitcode})')
+    finally:
+        process.kill()
+        process.join()
+        parent_conn.close()
+    if response[0] != 'ok':
+        raise RuntimeError(response[1])
+    return response[1], response[2]
+
+
+def benchmark_file(file_path, source, stages=STAGES, repeat=1, timeout=600):
+    """
+    对一个文件测量所有可用后端
+    :param source: 'sample'（真实样本）或 'corpus'（生成的零件）
+    :return: 结果行列表
+    """
+    file_format = sniff_file(file_path)
+    if file_format == FORMAT_UNKNOWN:
+        return []
+    rows = []
+    for backend in get_backends(file_format):
+        if backend.cost >= COST_FALLBACK:
+            continue
+        row = {
+            'file': os.path.basename(file_path),
+            'source': source,
+            'format': file_format,
+            'file_size': os.path.getsize(file_path),
+            'backend': backend.name,
+        }
+        best = {}
+        try:
+            for _ in range(repeat):
+                results, triangles = run_in_child(file_path, file_format, backend.name, stages, timeout)
+                for stage, result in results.items():
+                    # 耗时取多次中的最小值，峰值RSS增量取最大值
+                    if stage not in best:
+                        best[stage] = dict(result)
+                        continue
+                    best[stage]['seconds'] = min(best[stage]['seconds'], result['seconds'])
+                    if result['peak_rss_delta_mb'] is not None:
+                        best[stage]['peak_rss_delta_mb'] = max(best[stage]['peak_rss_delta_mb'] or 0,
+                                                               result['peak_rss_delta_mb'])
+        except RuntimeError as e:
+            rows.append(dict(row, stage=None, error=str(e)))
+            continue
+        for stage, result in best.items():
+            seconds = result['seconds']
+            rows.append(dict(
+                row,
+                stage=stage,
+                triangles=triangles,
+                seconds=round(seconds, 6),
+                triangles_per_second=round(triangles / seconds) if triangles and seconds > 0 else None,
+                peak_rss_delta_mb=(round(result['peak_rss_delta_mb'], 2)
+                                   if result['peak_rss_delta_mb'] is not None else None),
+                error='',
+            ))
+    return rows
+
+
+def result_key(row):
+    return f"{row['file']}|{row['backend']}|{row['stage']}"
+
+
+def environment():
+    """
+    基线记录的运行环境，环境不同时比较结果仅供参考
+    """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'trimesh': is_module_installed('trimesh'),
+        'cadquery': is_module_installed('cadquery'),
+    }
+
+
+def compare_with_baseline(rows, baseline, threshold):
+    """
+    与基线比较
+    :param threshold: 允许的相对增幅（0.2表示20%）
+    :return: 回退列表 [{'key', 'metric', 'baseline', 'current', 'change'}]
+    """
+    baseline_rows = {result_key(row): row for row in baseline.get('results', []) if row.get('stage')}
+    regressions = []
+    for row in rows:
+        if not row.get('stage'):
+            continue
+        previous = baseline_rows.get(result_key(row))
+        if previous is None:
+            continue
+        checks = (
+            ('seconds', MIN_TIME_REGRESSION),
+            ('peak_rss_delta_mb', MIN_RSS_REGRESSION_MB),
+        )
+        for metric, noise_floor in checks:
+            old, new = previous.get(metric), row.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > noise_floor:
+                regressions.append({
+                    'key': result_key(row),
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': (new - old) / old if old else None,
+                })
+    return regressions
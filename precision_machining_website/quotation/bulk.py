@@ -0,0 +1,332 @@
+"""
+批量报价
+上传的zip压缩包逐个成员流式写入暂存目录（同时计算SHA-256、识别格式），不会把整个压缩包解压到内存；
+内容相同的文件只保存和分析一次。每个不同的零件创建一个报价请求并加入分析队列，
+由分析工作进程池（run_analysis_workers --processes）并行分析，全部完成后得到报价清单
+"""
+
+import csv
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+
+from django.core.files import File
+from django.db import transaction
+
+from . import metrics
+from .formats import SNIFF_SIZE, model_file_error, sniff_format
+from .jobs import enqueue_analysis
+from .models import QuotationBatchItem, QuotationRequest
+from .upload_handlers import MAX_MODEL_FILE_SIZE, get_incoming_dir
+
+# 一次批量报价最多处理的文件数
+MAX_BATCH_FILES = 500
+COPY_CHUNK_SIZE = 1024 * 1024
+
+ARCHIVE_EXTENSIONS = ('.zip',)
+
+# 报价请求从批量报价复制的加工参数
+SHARED_FIELDS = ('name', 'email', 'phone', 'processing_type', 'material', 'quantity', 'accuracy',
+                 'surface_treatment', 'description')
+
+# 报价清单的列
+SHEET_COLUMNS = [
+    ('position', '序号'),
+    ('file_name', '文件名'),
+    ('quotation_id', '报价编号'),
+    ('status', '状态'),
+    ('file_format', '格式'),
+    ('volume', '体积 (cm³)'),
+    ('surface_area', '表面积 (cm²)'),
+    ('complexity_score', '复杂度评分'),
+    ('min_radius', '最小拐角半径 (mm)'),
+    ('quantity', '数量'),
+    ('price_min', '参考价格下限'),
+    ('price_max', '参考价格上限'),
+    ('duplicate_of', '与该序号文件相同'),
+]
+
+# 以这些字符开头的单元格会被电子表格当作公式
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _member_name(info):
+    """
+    压缩包成员的文件名
+    没有UTF-8标记的成员名按cp437解码，Windows下创建的压缩包实际多为GBK编码
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode('cp437').decode('gbk')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def _is_ignored(name):
+    """
+    目录、macOS资源文件和隐藏文件不参与报价
+    """
+    parts = name.replace('\\', '/').split('/')
+    return name.endswith('/') or '__MACOSX' in parts or parts[-1].startswith('.')
+
+
+def iter_upload_members(uploaded_files):
+    """
+    逐个列出上传的模型文件，zip压缩包展开为其中的成员
+    :return: 迭代 (文件名, 可读取的文件对象或None, 错误提示或None)
+    """
+    for uploaded in uploaded_files:
+        if os.path.splitext(uploaded.name)[1].lower() not in ARCHIVE_EXTENSIONS:
+            yield uploaded.name, uploaded, None
+            continue
+        try:
+            archive = zipfile.ZipFile(uploaded)
+        except zipfile.BadZipFile:
+            yield uploaded.name, None, '压缩包已损坏或不是zip格式'
+            continue
+        with archive:
+            for info in archive.infolist():
+                name = _member_name(info)
+                if info.is_dir() or _is_ignored(name):
+                    continue
+                # 文件头中的大小可以伪造，实际大小在写入时再次检查
+                if info.file_size > MAX_MODEL_FILE_SIZE:
+                    yield name, None, '文件大小不能超过50MB'
+                    continue
+                try:
+                    member = archive.open(info)
+                except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                    yield name, None, f'无法解压: {e}'
+                    continue
+                with member:
+                    yield name, member, None
+
+
+class StagedModelFile(File):
+    """
+    已写入暂存目录并关闭的零件文件，只保留路径，一批数百个零件不会同时占用文件描述符；
+    保存时存储后端通过 temporary_file_path 直接重命名到最终路径
+    """
+
+    def __init__(self, path, name, size):
+        super().__init__(None, name)
+        self.path = path
+        self.size = size
+        self.content_hash = ''
+        self.detected_format = ''
+        self.truncated = False
+
+    def temporary_file_path(self):
+        return self.path
+
+    def discard(self):
+        """
+        删除暂存文件（已移动到最终路径时忽略）
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def stream_to_incoming(name, source):
+    """
+    把文件内容分块写入上传暂存目录，同时计算哈希、识别格式，写完即关闭
+    :return: StagedModelFile，超过大小上限时 truncated 为True（暂存文件已删除）
+    """
+    file_name = os.path.basename(name.replace('\\', '/'))
+    fd, path = tempfile.mkstemp(suffix='.upload' + os.path.splitext(file_name)[1], dir=get_incoming_dir())
+    model_file = StagedModelFile(path, file_name, 0)
+    digest = hashlib.sha256()
+    head = b''
+    size = 0
+    try:
+        with metrics.stage('upload_write'), os.fdopen(fd, 'wb') as staged:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_MODEL_FILE_SIZE:
+                    model_file.truncated = True
+                    break
+                staged.write(chunk)
+                digest.update(chunk)
+                if len(head) < SNIFF_SIZE:
+                    head += chunk[:SNIFF_SIZE - len(head)]
+    except BaseException:
+        model_file.discard()
+        raise
+
+    model_file.size = size
+    if model_file.truncated:
+        model_file.discard()
+    else:
+        model_file.content_hash = digest.hexdigest()
+        model_file.detected_format = sniff_format(head, size)
+    return model_file
+
+
+def collect_parts(uploaded_files):
+    """
+    把上传的文件写入暂存目录并按内容去重
+    :return: (parts, skipped)
+             parts: [(文件名, 内容哈希, StagedModelFile或None)]，内容与前面的文件相同时为None；
+             skipped: [{'file_name', 'reason'}]
+    """
+    parts = []
+    skipped = []
+    seen = set()
+    try:
+        for name, source, error in iter_upload_members(uploaded_files):
+            if error is None and len(parts) >= MAX_BATCH_FILES:
+                error = f'超过单次批量报价的文件数上限（{MAX_BATCH_FILES}个）'
+            if error is None:
+                model_file = stream_to_incoming(name, source)
+                if model_file.truncated:
+                    error = '文件大小不能超过50MB'
+                else:
+                    error = model_file_error(name, model_file.detected_format)
+                if error is None and model_file.content_hash in seen:
+                    model_file.discard()
+                    parts.append((name, model_file.content_hash, None))
+                    continue
+                if error is not None:
+                    model_file.discard()
+            if error is not None:
+                skipped.append({'file_name': name, 'reason': error})
+                continue
+            seen.add(model_file.content_hash)
+            parts.append((name, model_file.content_hash, model_file))
+    except BaseException:
+        discard_parts(parts)
+        raise
+    return parts, skipped
+
+
+def create_batch(batch, parts, skipped):
+    """
+    保存批量报价：每个不同的零件创建一个报价请求，提交后加入分析队列
+    :param batch: 未保存的QuotationBatch
+    :param parts: collect_parts 的结果
+    :return: 保存后的QuotationBatch
+    """
+    quotations = []
+    try:
+        with transaction.atomic():
+            batch.skipped_files = skipped
+            batch.save()
+            by_hash = {}
+            items = []
+            for position, (name, content_hash, model_file) in enumerate(parts, start=1):
+                if model_file is not None:
+                    quotation = QuotationRequest(**{field: getattr(batch, field) for field in SHARED_FIELDS})
+                    quotation.content_hash = model_file.content_hash
+                    quotation.file_format = model_file.detected_format
+                    quotation.file_size = model_file.size
+                    # 暂存文件直接重命名到最终路径
+                    quotation.model_file.save(model_file.name, model_file, save=False)
+                    quotation.save()
+                    by_hash[content_hash] = quotation
+                    quotations.append(quotation)
+                items.append(QuotationBatchItem(batch=batch, position=position, file_name=name[:255],
+                                                quotation=by_hash[content_hash]))
+            QuotationBatchItem.objects.bulk_create(items)
+    except Exception:
+        # 事务已回滚，删除已移动到最终路径的文件
+        for quotation in quotations:
+            quotation.model_file.delete(save=False)
+        raise
+
+    for quotation in quotations:
+        enqueue_analysis(quotation)
+    return batch
+
+
+def discard_parts(parts):
+    """
+    删除未使用的暂存文件（创建批量报价失败时调用）
+    """
+    for _, _, model_file in parts:
+        if model_file is not None:
+            model_file.discard()
+
+
+def build_price_sheet(batch):
+    """
+    批量报价清单：每个文件一行，以及合计
+    :return: {'batch_id', 'complete', 'rows', 'totals', 'skipped'}
+    """
+    rows = []
+    first_position = {}
+    price_min = price_max = 0.0
+    pending = 0
+    for item in batch.items.select_related('quotation'):
+        quotation = item.quotation
+        duplicate_of = first_position.setdefault(quotation.id, item.position)
+        if quotation.is_analysis_pending:
+            pending += 1
+        elif quotation.price_min is not None:
+            price_min += quotation.price_min
+            price_max += quotation.price_max
+        rows.append({
+            'position': item.position,
+            'file_name': item.file_name,
+            'quotation_id': quotation.id,
+            'status': quotation.analysis_status or QuotationRequest.ANALYSIS_PENDING,
+            'file_format': quotation.file_format,
+            'volume': quotation.volume,
+            'surface_area': quotation.surface_area,
+            'complexity_score': quotation.complexity_score,
+            'min_radius': quotation.min_radius,
+            'quantity': quotation.quantity,
+            'price_min': None if quotation.is_analysis_pending else quotation.price_min,
+            'price_max': None if quotation.is_analysis_pending else quotation.price_max,
+            'duplicate_of': duplicate_of if duplicate_of != item.position else None,
+        })
+    return {
+        'batch_id': batch.id,
+        'complete': pending == 0,
+        'rows': rows,
+        'totals': {
+            'parts': len(rows),
+            'unique_parts': len(first_position),
+            'pending': pending,
+            'price_min': round(price_min, 2),
+            'price_max': round(price_max, 2),
+        },
+        'skipped': batch.skipped_files,
+    }
+
+
+def _csv_cell(value):
+    """
+    CSV单元格的值；文件名等用户提供的文本以公式字符开头时加单引号，Excel/WPS打开时不会当作公式执行
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def price_sheet_csv(sheet):
+    """
+    报价清单导出为CSV（带BOM，Excel可直接打开中文）
+    """
+    output = io.StringIO()
+    output.write('\ufeff')
+    writer = csv.writer(output)
+    writer.writerow([title for _, title in SHEET_COLUMNS])
+    for row in sheet['rows']:
+        writer.writerow([_csv_cell(row[key]) for key, _ in SHEET_COLUMNS])
+    totals = sheet['totals']
+    writer.writerow([])
+    writer.writerow(['合计', f"{totals['parts']}个文件（{totals['unique_parts']}个不同零件）"] +
+                    [''] * (len(SHEET_COLUMNS) - 5) + [totals['price_min'], totals['price_max'], ''])
+    for skipped in sheet['skipped']:
+        writer.writerow(['未处理', _csv_cell(skipped['file_name']), _csv_cell(skipped['reason'])])
+    return output.getvalue()
@@ -0,0 +1,128 @@
+"""
+网格曲率分析
+合并重合顶点建立边-面邻接，向量化计算每条共享边的二面角，
+再由凹边两侧三角面的宽度和二面角估算局部圆角半径，得到最小内圆角半径
+"""
+
+import numpy as np
+
+# 二面角小于该值（度）的边视为平面内的三角化分割边
+MIN_DIHEDRAL_ANGLE = 1.0
+# 二面角大于该值（度）的边视为尖角，而不是圆角上的一段
+MAX_FILLET_ANGLE = 60.0
+# 小于该值 (mm) 的半径视为网格噪声
+MIN_RADIUS_NOISE = 0.01
+# 取第N小的半径，避免个别狭长三角面决定结果
+MIN_SUPPORT_EDGES = 3
+
+
+def weld_triangles(triangles):
+    """
+    合并坐标完全相同的顶点
+    :param triangles: (N,3,3) 三角面数组
+    :return: (vertices (V,3) float32, faces (N,3) int64)
+    """
+    # 加0.0把-0.0变为0.0，使两者按字节比较时相同
+    points = np.ascontiguousarray(triangles, dtype=np.float32).reshape(-1, 3) + np.float32(0.0)
+    keys = points.view(np.uint32)
+    # 按坐标位模式的64位散列排序（比三列lexsort快一个数量级），相邻项再比较完整坐标，
+    # 散列冲突最多导致漏合并，不会错误合并
+    hashes = keys[:, 0].astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    hashes ^= keys[:, 1].astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+    hashes ^= keys[:, 2].astype(np.uint64)
+    order = np.argsort(hashes)
+    sorted_keys = points.view(np.dtype((np.void, 12))).ravel()[order]
+    is_new = np.ones(len(order), dtype=bool)
+    is_new[1:] = sorted_keys[1:] != sorted_keys[:-1]
+
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.cumsum(is_new) - 1
+    return points[order[is_new]], inverse.reshape(-1, 3)
+
+
+def shared_edges(faces, vertex_count):
+    """
+    找出恰好被两个三角面共享的边，边界边和非流形边不参与计算
+    边用“边槽”编号表示：三角面索引*3 + k，k表示三角面第k个到第k+1个顶点的边
+    :return: (first, second) 共享同一条边的两个边槽编号数组
+    """
+    start = faces.ravel().astype(np.int64)
+    end = faces[:, [1, 2, 0]].ravel().astype(np.int64)
+    keys = np.minimum(start, end) * vertex_count + np.maximum(start, end)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    starts = np.flatnonzero(np.diff(sorted_keys, prepend=-1))
+    lengths = np.diff(np.append(starts, len(keys)))
+    starts = starts[lengths == 2]
+    return order[starts], order[starts + 1]
+
+
+def concave_edge_radii(triangles, faces):
+    """
+    估算每条凹边处的局部圆角半径
+    圆角被三角化后每个小平面的宽度w和相邻平面的夹角θ满足 w = 2r·sin(θ/2)，
+    w取两侧三角面以该边为底的高的平均值
+    :param triangles: (N,3,3) 三角面数组
+    :param faces: weld_triangles() 得到的 (N,3) 顶点索引
+    :return: 半径数组 (mm)
+    """
+    tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    double_area = np.sqrt(np.einsum('ij,ij->i', cross, cross))
+    # 退化三角面的法向为0，二面角按90°计算，不会被当作圆角
+    normals = cross / np.where(double_area > 0, double_area, 1.0)[:, None]
+
+    first, second = shared_edges(faces, int(faces.max()) + 1)
+    f1, f2 = first // 3, second // 3
+    n1 = normals[f1]
+    cos_angle = np.einsum('ij,ij->i', n1, normals[f2])
+
+    # 先按二面角筛选，后续计算只针对候选边
+    candidate = (cos_angle < np.cos(np.radians(MIN_DIHEDRAL_ANGLE))) & \
+        (cos_angle > np.cos(np.radians(MAX_FILLET_ANGLE)))
+    first, second, f1, f2, n1 = first[candidate], second[candidate], f1[candidate], f2[candidate], n1[candidate]
+    angle = np.arccos(cos_angle[candidate])
+
+    corners = tri.reshape(-1, 3)
+    edge_start = corners[first]
+    edge_vector = corners[first - first % 3 + (first + 1) % 3] - edge_start
+    edge_length = np.sqrt(np.einsum('ij,ij->i', edge_vector, edge_vector))
+
+    # 凹边：相邻三角面的对顶点（边槽k的对顶点是第k+2个顶点）位于本三角面法向的正侧
+    opposite = corners[second - second % 3 + (second + 2) % 3]
+    side = np.einsum('ij,ij->i', n1, opposite - edge_start)
+
+    fillet = (side > 0) & (edge_length > 0)
+    width = (double_area[f1] + double_area[f2])[fillet] / (2.0 * edge_length[fillet])
+    return width / (2.0 * np.sin(angle[fillet] / 2.0))
+
+
+def stack_triangles(triangle_chunks):
+    """
+    把分块的三角面合并为一个float32数组（曲率分析需要整个网格的邻接关系）
+    """
+    chunks = [np.asarray(chunk, dtype=np.float32).reshape(-1, 3, 3) for chunk in triangle_chunks]
+    if not chunks:
+        return np.zeros((0, 3, 3), dtype=np.float32)
+    return np.concatenate(chunks)
+
+
+def estimate_min_concave_radius(triangles, faces=None):
+    """
+    估算网格的最小内圆角半径
+    :param triangles: (N,3,3) 三角面数组，单位mm，法向朝外
+    :param faces: 已知的顶点索引（如标准网格），为空时合并顶点得到
+    :return: 特征字典，没有可识别的内圆角时不含 min_radius
+    """
+    if len(triangles) == 0:
+        return {'concave_fillet_edges': 0}
+    if faces is None:
+        _, faces = weld_triangles(triangles)
+    radii = concave_edge_radii(triangles, faces)
+    radii = radii[radii >= MIN_RADIUS_NOISE]
+
+    features = {'concave_fillet_edges': int(len(radii))}
+    if len(radii) >= MIN_SUPPORT_EDGES:
+        features['min_radius'] = float(np.partition(radii, MIN_SUPPORT_EDGES - 1)[MIN_SUPPORT_EDGES - 1])
+    return features
@@ -0,0 +1,441 @@
+"""
+3D模型分析引擎
+按识别出的文件格式从后端注册表中选择成本最低、能提供所需特征的后端，
+各阶段的结果在引擎实例内缓存，后续阶段可以直接复用；
+需要网格的阶段共用按文件内容缓存的标准网格，源文件只解析（或三角化）一次
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .formats import sniff_file
+
+logger = logging.getLogger(__name__)
+
+# 分析器版本号，分析算法变化时需要递增，使旧的特征缓存失效
+ANALYZER_VERSION = '10'
+
+# 后端成本等级，数值越小越先尝试
+COST_CHEAP = 1        # 纯Python/NumPy流式读取
+COST_MODERATE = 2     # 需要完整加载网格
+COST_EXPENSIVE = 3    # 需要OCC加载B-rep
+COST_FALLBACK = 99    # 兜底估算，只在其它后端都失败时使用
+
+# 几何阶段需要得到的特征
+GEOMETRY_FEATURES = frozenset([
+    'volume',
+    'surface_area',
+    'bounding_box_length',
+    'bounding_box_width',
+    'bounding_box_height',
+    'max_aspect_ratio',
+    'complexity_score',
+])
+
+# 后端能力标记：可以提供三角网格
+CAPABILITY_TRIANGLES = 'triangles'
+
+# 超大网格流式聚类简化的分辨率（最长边上的格数），简化结果只用于网页预览和缩略图
+SIMPLIFIED_MESH_RESOLUTION = 256
+
+_registry = []
+
+# 已导入的可选依赖库及各自的导入耗时（秒）
+_optional_modules = {}
+IMPORT_TIMINGS = {}
+
+
+def max_mesh_triangles():
+    """
+    生成完整标准网格的三角面数上限（ANALYSIS_MESH_MAX_TRIANGLES），超过时只生成简化网格
+    """
+    return getattr(settings, 'ANALYSIS_MESH_MAX_TRIANGLES', 1000000)
+
+
+def is_module_installed(module_name):
+    """
+    检查可选依赖库是否已安装，只查找模块而不导入
+    """
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_import(module_name):
+    """
+    首次使用时才导入可选依赖库（cadquery、trimesh等），避免Web进程和管理命令启动时加载
+    :return: 模块对象，未安装时返回None
+    """
+    if module_name not in _optional_modules:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            module = None
+            logger.info('%s库未安装', module_name)
+        IMPORT_TIMINGS[module_name] = time.perf_counter() - start
+        _optional_modules[module_name] = module
+    return _optional_modules[module_name]
+
+
+class AnalyzerBackend:
+    """
+    分析后端基类
+    子类声明可处理的格式、成本等级和能提供的特征，并实现 analyze()
+    """
+    name = ''
+    formats = None          # 可处理的格式标识列表，None表示任意格式
+    cost = COST_MODERATE
+    features = frozenset()
+
+    def is_available(self):
+        """
+        后端依赖的库是否可用
+        """
+        return True
+
+    def warmup(self):
+        """
+        预先导入依赖库并完成首次初始化，在fork工作进程之前调用
+        """
+
+    def supports(self, file_format):
+        return self.formats is None or file_format in self.formats
+
+    def analyze(self, file_path, file_format):
+        """
+        提取特征
+        :return: 特征字典（体积cm³、表面积cm²、尺寸mm）
+        """
+        raise NotImplementedError
+
+    def iter_triangles(self, file_path, file_format):
+        """
+        分块产生 (n,3,3) 三角面数组，声明了 CAPABILITY_TRIANGLES 的后端需要实现
+        """
+        raise NotImplementedError
+
+
+def register_backend(backend_class):
+    """
+    注册分析后端（可作为类装饰器使用）
+    """
+    _registry.append(backend_class())
+    return backend_class
+
+
+def _load_builtin_backends():
+    # 导入内置后端模块完成注册
+    from . import backends  # noqa: F401
+
+
+def get_backends(file_format, capability=None):
+    """
+    返回可处理该格式且依赖可用的后端，按成本从低到高排序
+    """
+    _load_builtin_backends()
+    candidates = [
+        backend for backend in _registry
+        if backend.supports(file_format)
+        and (capability is None or capability in backend.features)
+        and backend.is_available()
+    ]
+    return sorted(candidates, key=lambda backend: backend.cost)
+
+
+def warmup_backends():
+    """
+    预热所有可用后端
+    :return: {后端名称: 预热耗时（秒）}
+    """
+    _load_builtin_backends()
+    timings = {}
+    for backend in _registry:
+        if not backend.is_available():
+            continue
+        start = time.perf_counter()
+        try:
+            backend.warmup()
+        except Exception as e:
+            logger.warning('%s后端预热失败: %s', backend.name, e)
+        timings[backend.name] = time.perf_counter() - start
+    return timings
+
+
+def estimate_complexity(face_count):
+    """
+    根据三角面数估算复杂度 (1-5分)
+    """
+    if face_count < 1000:
+        return 1.0
+    elif face_count < 5000:
+        return 2.0
+    elif face_count < 20000:
+        return 3.0
+    elif face_count < 100000:
+        return 4.0
+    else:
+        return 5.0
+
+
+def estimate_manufacturing_features(base_features):
+    """
+    计算与制造相关的特征
+    """
+    features = {}
+
+    # 估算最小拐角半径 (简化实现)
+    features['min_radius'] = base_features.get('min_radius') or 0.5
+
+    # 通常刀具直径应至少是拐角半径的2倍
+    features['min_tool_diameter'] = features['min_radius'] * 2.0
+
+    # 估算加工难度 (1-5分)
+    difficulty = 1.0
+
+    # 基于径长比的难度调整
+    aspect_ratio = base_features.get('max_aspect_ratio')
+    if aspect_ratio and aspect_ratio > 10:
+        difficulty += 1.0
+    elif aspect_ratio and aspect_ratio > 5:
+        difficulty += 0.5
+
+    # 基于复杂度的难度调整
+    complexity = base_features.get('complexity_score', 1.0)
+    difficulty += (complexity - 1.0) * 0.5
+
+    # 基于最小拐角半径的难度调整
+    min_radius = features['min_radius']
+    if min_radius < 0.2:
+        difficulty += 1.0
+    elif min_radius < 0.5:
+        difficulty += 0.5
+
+    features['machining_difficulty'] = min(difficulty, 5.0)
+    return features
+
+
+class AnalysisEngine:
+    """
+    3D模型分析引擎
+    """
+
+    def __init__(self, file_path, file_format=None, content_hash=None):
+        """
+        :param file_path: 3D模型文件路径
+        :param file_format: 上传时已识别的格式，为空时读取文件头识别
+        :param content_hash: 文件内容SHA-256，用于读写标准网格缓存
+        """
+        self.file_path = file_path
+        self.content_hash = content_hash
+        if not file_format and os.path.exists(file_path):
+            file_format = sniff_file(file_path)
+        self.file_format = file_format
+        self._stage_results = {}
+
+    def run_stage(self, stage, func):
+        """
+        执行分析阶段并缓存结果，同一阶段只执行一次
+        """
+        if stage not in self._stage_results:
+            self._stage_results[stage] = func()
+        return self._stage_results[stage]
+
+    def analyze(self, required_features=GEOMETRY_FEATURES):
+        """
+        分析3D模型并提取特征
+        :return: 包含所有特征的字典
+        """
+        logger.debug('开始分析模型: %s (格式: %s)', self.file_path, self.file_format)
+        features = self.run_stage('geometry', lambda: self._analyze_geometry(required_features))
+        features = dict(features)
+
+        # 生成标准网格，后续阶段共用；只有网页预览、缩略图（需要内容哈希）和曲率估算需要网格
+        needs_curvature = 'min_radius' not in features
+        mesh = None
+        if (self.content_hash or needs_curvature) and get_backends(self.file_format, CAPABILITY_TRIANGLES):
+            try:
+                mesh = self.mesh()
+            except Exception as e:
+                logger.warning('生成标准网格时出错: %s', e)
+
+        # 生成网页预览网格和缩略图
+        if mesh is not None and self.content_hash:
+            try:
+                self.previews()
+            except Exception as e:
+                logger.warning('生成预览网格时出错: %s', e)
+            try:
+                self.thumbnail()
+            except Exception as e:
+                logger.warning('生成缩略图时出错: %s', e)
+
+        # B-rep没有给出最小拐角半径时，由网格曲率估算（简化后的网格不能反映圆角）
+        if needs_curvature and mesh is not None:
+            if mesh.simplified:
+                logger.info('网格超过%s个三角面，跳过曲率估算: %s', max_mesh_triangles(), self.file_path)
+            else:
+                try:
+                    features.update(self.run_stage('curvature', lambda: self._analyze_curvature(mesh)))
+                except Exception as e:
+                    logger.warning('计算网格曲率时出错: %s', e)
+
+        # 添加制造相关特征
+        try:
+            with metrics.stage('manufacturing'):
+                features.update(self.run_stage('manufacturing', lambda: estimate_manufacturing_features(features)))
+        except Exception as e:
+            logger.warning('计算制造特征时出错: %s', e)
+
+        logger.debug('分析完成，提取到的特征: %s', features)
+        return features
+
+    def _analyze_geometry(self, required_features):
+        """
+        依次尝试成本最低的后端，直到得到全部所需特征
+        """
+        features = {}
+        missing = set(required_features)
+
+        for backend in get_backends(self.file_format):
+            if not missing:
+                break
+            if not (backend.features & missing):
+                continue
+
+            try:
+                logger.debug('使用%s后端分析模型', backend.name)
+                with metrics.stage('analysis', backend=backend.name):
+                    result = self.run_stage(f'geometry:{backend.name}',
+                                            lambda: backend.analyze(self.file_path, self.file_format))
+            except Exception as e:
+                metrics.inc('quotation_backend_failures_total', backend=backend.name)
+                logger.warning('%s后端分析模型时出错: %s', backend.name, e)
+                continue
+
+            if 'complexity_score' not in result and result.get('face_count'):
+                result = dict(result, complexity_score=estimate_complexity(result['face_count']))
+            for key, value in result.items():
+                if value is not None and key not in features:
+                    features[key] = value
+                    missing.discard(key)
+
+        return features
+
+    def _analyze_curvature(self, mesh):
+        """
+        由网格二面角估算最小内圆角半径
+        """
+        from .curvature import estimate_min_concave_radius
+        with metrics.stage('curvature'):
+            return estimate_min_concave_radius(mesh.triangles(), mesh.faces)
+
+    def mesh(self):
+        """
+        标准网格：有内容哈希时优先内存映射读取缓存，没有缓存时由后端生成并写入缓存；
+        源文件超过 max_mesh_triangles() 个三角面时返回流式聚类简化的网格（simplified为True）
+        :return: CanonicalMesh
+        """
+        return self.run_stage('mesh', self._load_mesh)
+
+    def _load_mesh(self):
+        from .curvature import stack_triangles
+        from .mesh_cache import CanonicalMesh, load_mesh, save_mesh
+
+        with metrics.stage('model_load'):
+            mesh = load_mesh(self.content_hash)
+            metrics.inc('quotation_mesh_cache_total', result='miss' if mesh is None else 'hit')
+            if mesh is not None:
+                return mesh
+
+            # 合并顶点需要整个三角面数组，超过上限时改为流式简化，内存占用不随文件大小增长
+            limit = max_mesh_triangles()
+            chunks = []
+            face_count = 0
+            source = self.iter_source_triangles()
+            for triangles in source:
+                face_count += len(triangles)
+                if face_count > limit:
+                    source.close()
+                    chunks.clear()
+                    return self._simplified_mesh()
+                chunks.append(triangles)
+
+            mesh = CanonicalMesh.from_triangles(stack_triangles(chunks))
+            if self.content_hash:
+                save_mesh(self.content_hash, mesh)
+            return mesh
+
+    def _simplified_mesh(self):
+        """
+        超大网格：先流式计算包围盒，再流式顶点聚类
+        """
+        from .geometry import MeshGeometry
+        from .lod import cluster_triangle_chunks
+        from .mesh_cache import CanonicalMesh
+
+        geometry = MeshGeometry()
+        for triangles in self.iter_source_triangles():
+            geometry.add_chunks(triangles)
+        vertices, faces = cluster_triangle_chunks(self.iter_source_triangles(), geometry.bbox_min,
+                                                  geometry.bbox_max, SIMPLIFIED_MESH_RESOLUTION)
+        logger.info('网格有%s个三角面，已简化为%s个三角面: %s', geometry.face_count, len(faces), self.file_path)
+        return CanonicalMesh(vertices, faces.astype('int32'), simplified=True)
+
+    def previews(self):
+        """
+        生成网页预览网格，需要内容哈希
+        :return: 预览级别名称列表
+        """
+        from .previews import build_previews
+
+        def build():
+            mesh = self.mesh()
+            with metrics.stage('preview'):
+                return build_previews(self.content_hash, mesh)
+        return self.run_stage('preview', build)
+
+    def thumbnail(self):
+        """
+        渲染等轴测缩略图，需要内容哈希
+        :return: 缩略图路径
+        """
+        from .thumbnails import build_thumbnail
+
+        def build():
+            mesh = self.mesh()
+            with metrics.stage('thumbnail'):
+                return build_thumbnail(self.content_hash, mesh)
+        return self.run_stage('thumbnail', build)
+
+    def iter_triangles(self):
+        """
+        分块产生标准网格的三角面
+        """
+        return self.mesh().iter_triangles()
+
+    def iter_source_triangles(self):
+        """
+        使用成本最低的可提供网格的后端从源文件分块产生三角面
+        """
+        for backend in get_backends(self.file_format, CAPABILITY_TRIANGLES):
+            started = False
+            try:
+                for triangles in backend.iter_triangles(self.file_path, self.file_format):
+                    started = True
+                    yield triangles
+                return
+            except Exception as e:
+                # 已经输出了部分网格时不能再换后端，否则结果会重复
+                if started:
+                    raise
+                metrics.inc('quotation_backend_failures_total', backend=backend.name)
+                logger.warning('%s后端读取网格时出错: %s', backend.name, e)
+        raise ValueError(f'没有可读取该文件网格的后端: {self.file_path}')
@@ -0,0 +1,83 @@
+"""
+3D模型特征缓存
+按文件内容的SHA-256和分析器版本缓存分析结果，相同文件重复上传时直接复用
+"""
+
+import hashlib
+
+from django.db.models import F
+
+from .models import AnalysisCache
+
+# 可以缓存并回填到报价请求上的特征字段
+FEATURE_FIELDS = [
+    'volume',
+    'surface_area',
+    'bounding_box_length',
+    'bounding_box_width',
+    'bounding_box_height',
+    'min_radius',
+    'max_aspect_ratio',
+    'complexity_score',
+    'min_tool_diameter',
+    'machining_difficulty',
+]
+
+# 按原样缓存的结构化特征字段
+JSON_FEATURE_FIELDS = [
+    'radius_histogram',
+]
+
+
+def _analyzer_version():
+    # 延迟导入，Web进程查询缓存时不加载分析库
+    from .engine import ANALYZER_VERSION
+    return ANALYZER_VERSION
+
+
+def compute_content_hash(file_path, chunk_size=1024 * 1024):
+    """
+    分块计算文件内容的SHA-256
+    :param file_path: 文件路径
+    :return: 十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_features(content_hash):
+    """
+    查询特征缓存，命中时累加命中次数
+    :return: 特征字典，未命中返回None
+    """
+    if not content_hash:
+        return None
+    entry = AnalysisCache.objects.filter(
+        content_hash=content_hash, analyzer_version=_analyzer_version()
+    ).only('id', 'features').first()
+    if entry is None:
+        return None
+    AnalysisCache.objects.filter(id=entry.id).update(hit_count=F('hit_count') + 1)
+    return entry.features
+
+
+def store_features(content_hash, features):
+    """
+    保存分析结果到特征缓存，只保存可回填的特征字段
+    """
+    if not content_hash:
+        return
+    cached = {}
+    for key in FEATURE_FIELDS:
+        value = features.get(key)
+        cached[key] = float(value) if value is not None else None
+    for key in JSON_FEATURE_FIELDS:
+        cached[key] = features.get(key)
+    AnalysisCache.objects.update_or_create(
+        content_hash=content_hash,
+        analyzer_version=_analyzer_version(),
+        defaults={'features': cached},
+    )
@@ -0,0 +1,108 @@
+"""
+3D模型文件格式识别
+根据文件头部的特征字节判断真实格式，而不是只看扩展名
+"""
+
+import os
+import re
+import struct
+
+FORMAT_STEP = 'step'
+FORMAT_STL_BINARY = 'stl_binary'
+FORMAT_STL_ASCII = 'stl_ascii'
+FORMAT_OBJ = 'obj'
+FORMAT_IGES = 'iges'
+FORMAT_UNKNOWN = 'unknown'
+
+FORMAT_CHOICES = [
+    (FORMAT_STEP, 'STEP'),
+    (FORMAT_STL_BINARY, 'STL（二进制）'),
+    (FORMAT_STL_ASCII, 'STL（文本）'),
+    (FORMAT_OBJ, 'OBJ'),
+    (FORMAT_IGES, 'IGES'),
+    (FORMAT_UNKNOWN, '未知'),
+]
+
+# 扩展名与允许的真实格式
+EXTENSION_FORMATS = {
+    '.step': [FORMAT_STEP],
+    '.stp': [FORMAT_STEP],
+    '.stl': [FORMAT_STL_BINARY, FORMAT_STL_ASCII],
+    '.igs': [FORMAT_IGES],
+    '.iges': [FORMAT_IGES],
+    '.obj': [FORMAT_OBJ],
+}
+
+# 识别格式需要的文件头长度
+SNIFF_SIZE = 4096
+
+STL_HEADER_SIZE = 84
+STL_RECORD_SIZE = 50
+
+_OBJ_LINE = re.compile(rb'^\s*(v|vn|vt|f|o|g|mtllib|usemtl)\s', re.MULTILINE)
+
+
+def is_binary_stl(head, file_size):
+    """
+    二进制STL：80字节文件头 + 4字节三角面数 + 每个三角面50字节，文件长度必须吻合
+    """
+    if file_size is None or len(head) < STL_HEADER_SIZE:
+        return False
+    triangle_count = struct.unpack('<I', head[80:84])[0]
+    return file_size == STL_HEADER_SIZE + triangle_count * STL_RECORD_SIZE
+
+
+def sniff_format(head, file_size=None):
+    """
+    根据文件头识别模型格式
+    :param head: 文件开头的字节（至少SNIFF_SIZE字节，文件更小时为整个文件）
+    :param file_size: 文件总字节数，用于校验二进制STL
+    :return: 格式标识
+    """
+    # 部分二进制STL的文件头也以"solid"开头，因此先按长度校验二进制格式
+    if is_binary_stl(head, file_size):
+        return FORMAT_STL_BINARY
+
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n')
+    if text.startswith(b'ISO-10303-21'):
+        return FORMAT_STEP
+    if text[:5].lower() == b'solid' and b'facet' in text:
+        return FORMAT_STL_ASCII
+
+    # IGES为80列定长记录，第73列是段标识，首段为S（开始段）
+    first_line = text.split(b'\n', 1)[0].rstrip(b'\r')
+    if len(first_line) == 80 and first_line[72:73] == b'S':
+        return FORMAT_IGES
+
+    if _OBJ_LINE.search(text):
+        return FORMAT_OBJ
+    return FORMAT_UNKNOWN
+
+
+def sniff_file(file_path):
+    """
+    读取文件头识别磁盘上模型文件的格式
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(SNIFF_SIZE)
+    return sniff_format(head, os.path.getsize(file_path))
+
+
+def model_file_error(file_name, detected_format):
+    """
+    校验模型文件的扩展名和识别出的真实格式
+    :param detected_format: 根据文件头识别的格式，未识别时为空
+    :return: 错误提示，校验通过时为None
+    """
+    valid_extensions = list(EXTENSION_FORMATS)
+    ext = os.path.splitext(str(file_name))[1].lower()
+    if ext not in valid_extensions:
+        # 强调STEP格式在提示中
+        return f"只允许上传以下格式的文件: {', '.join(valid_extensions)}。推荐使用STEP(.step/.stp)格式以获得最佳兼容性。"
+
+    # 已根据文件头识别出真实格式时，校验与扩展名是否一致
+    if detected_format and detected_format not in EXTENSION_FORMATS[ext]:
+        if detected_format == FORMAT_UNKNOWN:
+            return "无法识别文件内容，请确认上传的是有效的3D模型文件"
+        return f"文件内容与扩展名{ext}不符，请检查文件格式"
+    return None
@@ -1,5 +1,7 @@
 from django import forms
-from .models import QuotationRequest
+from .formats import model_file_error
+from .models import QuotationBatch, QuotationRequest
+from .upload_handlers import MAX_MODEL_FILE_SIZE
 
 class QuotationRequestForm(forms.ModelForm):
     """报价请求表单"""
@@ -30,19 +32,43 @@ class QuotationRequestForm(forms.ModelForm):
             raise forms.ValidationError("数量必须大于0")
         return quantity
         
+    def save(self, commit=True):
+        """上传时已经计算的哈希、格式和大小直接保存，后续不再重复读取文件"""
+        quotation = super().save(commit=False)
+        model_file = self.cleaned_data.get('model_file')
+        if model_file:
+            quotation.content_hash = getattr(model_file, 'content_hash', '')
+            quotation.file_format = getattr(model_file, 'detected_format', '')
+            quotation.file_size = model_file.size
+        if commit:
+            quotation.save()
+        return quotation
+        
     def clean_model_file(self):
         """验证上传文件"""
         model_file = self.cleaned_data.get('model_file', False)
         if model_file:
             # 检查文件大小（限制为50MB）
-            if model_file.size > 50 * 1024 * 1024:
+            if model_file.size > MAX_MODEL_FILE_SIZE:
                 raise forms.ValidationError("文件大小不能超过50MB")
             
-            # 检查文件类型
-            valid_extensions = ['.step', '.stp', '.stl', '.igs', '.iges', '.obj']
-            ext = '.' + str(model_file).split('.')[-1].lower()  # 保留点号便于比较
-            if ext not in valid_extensions:
-                # 强调STEP格式在提示中
-                raise forms.ValidationError(f"只允许上传以下格式的文件: {', '.join(valid_extensions)}。推荐使用STEP(.step/.stp)格式以获得最佳兼容性。")
+            # 检查扩展名以及上传处理器识别出的真实格式
+            error = model_file_error(model_file, getattr(model_file, 'detected_format', ''))
+            if error:
+                raise forms.ValidationError(error)
                 
-        return model_file
\ No newline at end of file
+        return model_file
+
+
+class QuotationBatchForm(forms.ModelForm):
+    """批量报价表单，模型文件（zip压缩包或多个文件）在视图中从 request.FILES 读取"""
+    
+    class Meta:
+        model = QuotationBatch
+        fields = [
+            'name', 'email', 'phone', 'processing_type', 'material',
+            'quantity', 'accuracy', 'surface_treatment', 'description'
+        ]
+        widgets = QuotationRequestForm.Meta.widgets
+        
+    clean_quantity = QuotationRequestForm.clean_quantity
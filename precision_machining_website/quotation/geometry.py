@@ -0,0 +1,109 @@
+"""
+三角网格几何计算内核
+对 (N,3,3) 三角面数组做向量化计算，按固定大小分块处理以控制内存占用，
+所有分析器共用这里的实现，保证体积、表面积、包围盒等结果一致
+"""
+
+import numpy as np
+
+# 每块处理的三角面数，64K个三角面的float64中间结果约占几MB内存
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def iter_chunks(triangles, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按固定大小切分三角面数组（切片不复制数据）
+    """
+    for start in range(0, len(triangles), chunk_size):
+        yield triangles[start:start + chunk_size]
+
+
+def calculate_aspect_ratio(dimensions):
+    """
+    计算最大径长比：长/宽、长/高、宽/高中的最大值，忽略为0的分母
+    """
+    ratios = []
+    for i in range(len(dimensions)):
+        for j in range(i + 1, len(dimensions)):
+            if dimensions[j] > 0:
+                ratios.append(float(dimensions[i]) / float(dimensions[j]))
+    return max(ratios) if ratios else None
+
+
+class MeshGeometry:
+    """
+    网格几何量累加器
+    可以多次调用 add() 逐块送入三角面，最终结果与一次性计算相同
+    """
+
+    def __init__(self):
+        self.face_count = 0
+        self.surface_area = 0.0
+        self.signed_volume = 0.0
+        self.bbox_min = np.full(3, np.inf)
+        self.bbox_max = np.full(3, -np.inf)
+
+    def add(self, triangles):
+        """
+        累加一块三角面
+        :param triangles: 形状为 (n,3,3) 的数组，单位mm
+        """
+        if len(triangles) == 0:
+            return self
+        tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        v0, v1, v2 = tri[:, 0], tri[:, 1], tri[:, 2]
+
+        cross = np.cross(v1 - v0, v2 - v0)
+        self.surface_area += 0.5 * float(np.sqrt(np.einsum('ij,ij->i', cross, cross)).sum())
+        # 以原点为顶点的有向四面体体积之和
+        self.signed_volume += float(np.einsum('ij,ij->i', v0, np.cross(v1, v2)).sum()) / 6.0
+
+        points = tri.reshape(-1, 3)
+        self.bbox_min = np.minimum(self.bbox_min, points.min(axis=0))
+        self.bbox_max = np.maximum(self.bbox_max, points.max(axis=0))
+        self.face_count += len(tri)
+        return self
+
+    def add_chunks(self, triangles, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        分块累加整个三角面数组
+        """
+        for chunk in iter_chunks(triangles, chunk_size):
+            self.add(chunk)
+        return self
+
+    @property
+    def dimensions(self):
+        """
+        包围盒尺寸（长、宽、高，mm）
+        """
+        if self.face_count == 0:
+            return None
+        return self.bbox_max - self.bbox_min
+
+    def to_features(self):
+        """
+        转换为分析器使用的特征字典（体积cm³、表面积cm²、尺寸mm）
+        """
+        features = {'face_count': self.face_count}
+        if self.face_count == 0:
+            return features
+
+        features['volume'] = max(0.0, self.signed_volume) / 1000.0
+        features['surface_area'] = self.surface_area / 100.0
+
+        dimensions = self.dimensions
+        features['bounding_box_length'] = float(dimensions[0])
+        features['bounding_box_width'] = float(dimensions[1])
+        features['bounding_box_height'] = float(dimensions[2])
+        features['max_aspect_ratio'] = calculate_aspect_ratio(dimensions)
+        return features
+
+
+def compute_geometry(triangles, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    计算三角面数组的几何量
+    :param triangles: 形状为 (N,3,3) 的数组
+    :return: MeshGeometry实例
+    """
+    return MeshGeometry().add_chunks(triangles, chunk_size)
@@ -0,0 +1,237 @@
+"""
+子进程隔离的3D模型分析
+OCC或trimesh遇到畸形文件可能卡死或耗尽内存，分析放在可复用的子进程中执行：
+每个任务有墙钟超时，子进程受 RLIMIT_AS 内存上限约束，处理N个任务后回收以释放OCC堆碎片，
+超时、内存超限或崩溃都转换为 AnalysisFailed，不会拖垮调用方进程
+"""
+
+import multiprocessing
+import signal
+
+from django import db
+from django.conf import settings
+
+from . import metrics
+
+FAILURE_TIMEOUT = 'timeout'
+FAILURE_MEMORY = 'memory'
+FAILURE_CRASHED = 'crashed'
+FAILURE_EXCEPTION = 'exception'
+
+# 子进程可执行的任务
+TASK_ANALYZE = 'analyze'
+TASK_PREVIEW = 'preview'
+
+
+class AnalysisFailed(Exception):
+    """
+    分析失败，reason为失败类型（timeout/memory/crashed/exception）
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+    def to_dict(self):
+        return {'reason': self.reason, 'message': self.message}
+
+
+def _apply_memory_limit(memory_limit_mb):
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_task(task, file_path, file_format, content_hash):
+    from .cad_analyzer import CADModelAnalyzer
+
+    analyzer = CADModelAnalyzer(file_path, file_format, content_hash)
+    if task == TASK_PREVIEW:
+        return analyzer.engine.previews()
+    return analyzer.analyze()
+
+
+def _child_main(conn, parent_conn, memory_limit_mb):
+    """
+    子进程主循环：接收 (任务, 文件路径, 格式, 内容哈希)，返回 ('ok', 结果) 或 ('error', 失败类型, 说明)
+    """
+    # fork继承了工作进程忽略SIGTERM的处理函数，恢复默认行为，使multiprocessing退出时的terminate()能结束子进程
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # 关闭继承的父进程端，父进程退出后recv()才能收到EOF，不会成为孤儿进程
+    parent_conn.close()
+    _apply_memory_limit(memory_limit_mb)
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        try:
+            result = ('ok', _run_task(*request))
+        except MemoryError:
+            result = ('error', FAILURE_MEMORY, '分析内存超出限制')
+        except Exception as e:
+            result = ('error', FAILURE_EXCEPTION, f"{type(e).__name__}: {e}")
+        # 子进程可能随时被回收，每个任务完成后就写出本进程的阶段指标
+        metrics.flush()
+        conn.send(result)
+
+
+def _describe_exit(exitcode):
+    """
+    子进程异常退出的说明，被信号结束时（exitcode为负）注明信号名称
+    """
+    if exitcode is not None and exitcode < 0:
+        try:
+            name = signal.Signals(-exitcode).name
+        except ValueError:
+            name = f'信号{-exitcode}'
+        return f'分析进程被{name}终止 (exitcode={exitcode})'
+    return f'分析进程异常退出 (exitcode={exitcode})'
+
+
+class IsolatedAnalyzer:
+    """
+    持有一个可复用的分析子进程
+    """
+
+    def __init__(self, timeout=120, memory_limit_mb=2048, max_jobs_per_child=50):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_child = max_jobs_per_child
+        self._process = None
+        self._conn = None
+        self._jobs_done = 0
+
+    def _start(self):
+        # 子进程不使用数据库，关闭连接避免fork后共享套接字
+        db.connections.close_all()
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe()
+        self._process = context.Process(target=_child_main,
+                                        args=(child_conn, parent_conn, self.memory_limit_mb),
+                                        daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._jobs_done = 0
+
+    def _kill(self):
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join(5)
+        if self._conn is not None:
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def close(self):
+        """
+        正常结束子进程
+        """
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+            self._process.join(5)
+        except (BrokenPipeError, OSError):
+            pass
+        # 5秒内未退出时强制结束
+        self._kill()
+
+    def run(self, task, file_path, file_format=None, content_hash=None):
+        """
+        在子进程中执行任务
+        :return: 任务结果
+        :raises AnalysisFailed: 超时、内存超限、子进程崩溃或分析异常
+        """
+        if self._process is None or not self._process.is_alive():
+            self._kill()
+            self._start()
+
+        self._conn.send((task, file_path, file_format, content_hash))
+        if not self._conn.poll(self.timeout):
+            self._kill()
+            raise AnalysisFailed(FAILURE_TIMEOUT, f'分析超过{self.timeout}秒未完成')
+
+        try:
+            response = self._conn.recv()
+        except (EOFError, OSError):
+            # 管道关闭时子进程可能尚未被回收，先等待退出再读取退出码
+            self._process.join(5)
+            exitcode = self._process.exitcode
+            self._kill()
+            raise AnalysisFailed(FAILURE_CRASHED, _describe_exit(exitcode))
+
+        self._jobs_done += 1
+        if self._jobs_done >= self.max_jobs_per_child:
+            self.close()
+
+        if response[0] == 'ok':
+            return response[1]
+        raise AnalysisFailed(response[1], response[2])
+
+    def analyze(self, file_path, file_format=None, content_hash=None):
+        """
+        在子进程中分析模型
+        :return: 特征字典
+        """
+        return self.run(TASK_ANALYZE, file_path, file_format, content_hash)
+
+
+_isolated_analyzer = None
+
+
+def run_isolated(task, file_path, file_format=None, content_hash=None):
+    """
+    按配置执行任务：启用隔离且平台支持fork时在子进程中执行，否则在当前进程中执行
+    """
+    global _isolated_analyzer
+
+    if not getattr(settings, 'ANALYSIS_ISOLATION', True) or \
+            'fork' not in multiprocessing.get_all_start_methods():
+        return _run_task(task, file_path, file_format, content_hash)
+
+    if _isolated_analyzer is None:
+        _isolated_analyzer = IsolatedAnalyzer(
+            timeout=getattr(settings, 'ANALYSIS_TIMEOUT', 120),
+            memory_limit_mb=getattr(settings, 'ANALYSIS_MEMORY_LIMIT_MB', 2048),
+            max_jobs_per_child=getattr(settings, 'ANALYSIS_MAX_JOBS_PER_CHILD', 50),
+        )
+    return _isolated_analyzer.run(task, file_path, file_format, content_hash)
+
+
+def close_isolated():
+    """
+    结束当前进程持有的分析子进程（工作进程退出前调用）
+    """
+    global _isolated_analyzer
+
+    if _isolated_analyzer is not None:
+        _isolated_analyzer.close()
+        _isolated_analyzer = None
+
+
+def run_analysis(file_path, file_format=None, content_hash=None):
+    """
+    分析模型，返回特征字典
+    """
+    return run_isolated(TASK_ANALYZE, file_path, file_format, content_hash)
+
+
+def run_previews(file_path, file_format=None, content_hash=None):
+    """
+    生成模型的网页预览网格，返回预览级别名称列表
+    """
+    return run_isolated(TASK_PREVIEW, file_path, file_format, content_hash)
@@ -0,0 +1,256 @@
+"""
+3D模型分析任务队列
+基于数据库表实现，Web进程只负责入队，由 run_analysis_workers 进程领取并执行
+"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .feature_cache import compute_content_hash, get_cached_features, store_features
+from .isolation import FAILURE_EXCEPTION, FAILURE_TIMEOUT, AnalysisFailed, run_analysis
+from .models import AnalysisJob, QuotationRequest
+from .pricing import price_quote
+from .pricing_rules import get_pricing_rules
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_name():
+    """
+    生成当前进程的标识（主机名:PID），便于在多节点部署时追踪任务
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_analysis(quotation):
+    """
+    为报价请求创建分析任务
+    相同内容的文件已经分析过时直接回填缓存的特征，不再入队
+    :param quotation: QuotationRequest实例
+    :return: AnalysisJob实例，没有模型文件或命中缓存时返回None
+    """
+    if not quotation.model_file:
+        # 没有模型文件时直接按表单参数报价
+        quotation.save(update_fields=apply_price(quotation))
+        return None
+    if apply_cached_features(quotation):
+        return None
+    quotation.analysis_status = QuotationRequest.ANALYSIS_PENDING
+    quotation.save(update_fields=['analysis_status'])
+    return AnalysisJob.objects.create(quotation=quotation)
+
+
+PRICE_FIELDS = ['price_min', 'price_max', 'price_breakdown', 'pricing_version']
+
+
+def apply_price(quotation):
+    """
+    按当前报价规则计算报价并写入报价请求（不保存），同时记录规则版本
+    :return: 价格字段列表
+    """
+    with metrics.stage('pricing'):
+        rules = get_pricing_rules()
+        quotation.price_min, quotation.price_max, quotation.price_breakdown = price_quote(quotation, rules)
+    quotation.pricing_version = rules.version
+    return PRICE_FIELDS
+
+
+def apply_features(quotation, features):
+    """
+    把特征写回报价请求，计算报价，并标记分析完成
+    :return: 更新的特征字段列表
+    """
+    updated_fields = []
+    for key, value in features.items():
+        if hasattr(quotation, key):
+            setattr(quotation, key, value)
+            updated_fields.append(key)
+
+    quotation.analysis_status = QuotationRequest.ANALYSIS_DONE
+    quotation.analysis_error = None
+    price_fields = apply_price(quotation)
+    with metrics.stage('db_save'):
+        quotation.save(update_fields=updated_fields + price_fields + ['analysis_status', 'analysis_error'])
+    return updated_fields
+
+
+def mark_analysis_failed(quotation, reason, message):
+    """
+    记录结构化的分析失败结果，报价按无模型特征计算
+    """
+    metrics.inc('quotation_analysis_failures_total', reason=reason)
+    quotation.analysis_status = QuotationRequest.ANALYSIS_FAILED
+    quotation.analysis_error = {'reason': reason, 'message': message}
+    quotation.save(update_fields=apply_price(quotation) + ['analysis_status', 'analysis_error'])
+
+
+def apply_cached_features(quotation):
+    """
+    计算模型文件的内容哈希并查询特征缓存，命中时回填特征
+    :return: 是否命中缓存
+    """
+    if not quotation.content_hash:
+        quotation.content_hash = compute_content_hash(quotation.model_file.path)
+        quotation.save(update_fields=['content_hash'])
+
+    features = get_cached_features(quotation.content_hash)
+    metrics.inc('quotation_feature_cache_total', result='miss' if features is None else 'hit')
+    if features is None:
+        return False
+    apply_features(quotation, features)
+    logger.info('报价 #%s 命中特征缓存 %s', quotation.id, quotation.content_hash[:12])
+    return True
+
+
+def claim_next_job(worker_name=None):
+    """
+    领取一个等待中的任务并标记为分析中
+    PostgreSQL使用 SELECT ... FOR UPDATE SKIP LOCKED，
+    SQLite等不支持的数据库使用带状态条件的UPDATE（比较并交换）保证只有一个进程领取成功
+    :return: AnalysisJob实例，队列为空时返回None
+    """
+    worker_name = worker_name or default_worker_name()
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = (AnalysisJob.objects
+                   .select_for_update(skip_locked=True)
+                   .filter(status=AnalysisJob.STATUS_PENDING)
+                   .order_by('created_at', 'id')
+                   .first())
+            if job is None:
+                return None
+            job.status = AnalysisJob.STATUS_RUNNING
+            job.worker = worker_name
+            job.attempts += 1
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'worker', 'attempts', 'started_at'])
+            return job
+
+    # SQLite的UPDATE会持有数据库写锁，条件更新成功即代表领取成功
+    for _ in range(5):
+        job_id = (AnalysisJob.objects
+                  .filter(status=AnalysisJob.STATUS_PENDING)
+                  .order_by('created_at', 'id')
+                  .values_list('id', flat=True)
+                  .first())
+        if job_id is None:
+            return None
+        claimed = AnalysisJob.objects.filter(id=job_id, status=AnalysisJob.STATUS_PENDING).update(
+            status=AnalysisJob.STATUS_RUNNING,
+            worker=worker_name,
+            attempts=F('attempts') + 1,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return AnalysisJob.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(timeout_seconds):
+    """
+    将超时仍处于分析中的任务重新放回队列（处理进程崩溃或节点宕机的情况）
+    超过最大尝试次数的任务直接标记为失败
+    :return: 重新入队的任务数
+    """
+    deadline = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING, started_at__lt=deadline)
+
+    expired = list(stale.filter(attempts__gte=F('max_attempts')).values_list('quotation_id', flat=True))
+    if expired:
+        metrics.inc('quotation_analysis_failures_total', len(expired), reason=FAILURE_TIMEOUT)
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            status=AnalysisJob.STATUS_FAILED,
+            error='分析超时',
+            finished_at=timezone.now(),
+        )
+        QuotationRequest.objects.filter(id__in=expired).update(
+            analysis_status=QuotationRequest.ANALYSIS_FAILED,
+            analysis_error={'reason': FAILURE_TIMEOUT, 'message': '分析进程长时间未完成'},
+        )
+        for quotation in QuotationRequest.objects.filter(id__in=expired):
+            quotation.save(update_fields=apply_price(quotation))
+    return stale.filter(attempts__lt=F('max_attempts')).update(
+        status=AnalysisJob.STATUS_PENDING,
+        worker='',
+    )
+
+
+def analyze_quotation(quotation):
+    """
+    分析报价请求的3D模型文件，并把提取到的特征写回报价请求
+    :return: 更新的字段列表
+    """
+    # 排队期间可能已有相同文件分析完成
+    if apply_cached_features(quotation):
+        return []
+
+    file_path = quotation.model_file.path
+    logger.debug('开始分析3D模型文件: %s（%s字节）', file_path, quotation.file_size)
+
+    # 在隔离的子进程中分析，超时、内存超限或崩溃时抛出AnalysisFailed
+    features = run_analysis(file_path, quotation.file_format, quotation.content_hash)
+    logger.debug('分析完成，提取特征: %s', features)
+    store_features(quotation.content_hash, features)
+
+    updated_fields = apply_features(quotation, features)
+    logger.info('报价 #%s 分析完成，更新字段: %s', quotation.id, updated_fields)
+    return updated_fields
+
+
+def run_job(job):
+    """
+    执行一个已领取的分析任务
+    分析本身失败（超时、内存超限、崩溃）时不再重试，直接记录到报价请求；
+    其它错误按尝试次数决定重试或标记失败
+    """
+    try:
+        return _run_job(job)
+    finally:
+        metrics.flush()
+
+
+def _run_job(job):
+    quotation = None
+    try:
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        with metrics.stage('analysis_job'):
+            analyze_quotation(quotation)
+    except AnalysisFailed as e:
+        logger.warning('分析任务 #%s 分析失败: %s %s', job.id, e.reason, e.message)
+        mark_analysis_failed(quotation, e.reason, e.message)
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = f"{e.reason}: {e.message}"
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        metrics.inc('quotation_analysis_jobs_total', result='failed')
+        return False
+    except Exception as e:
+        logger.exception('分析任务 #%s 出错: %s', job.id, e)
+        job.error = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            job.status = AnalysisJob.STATUS_PENDING
+            job.worker = ''
+        else:
+            job.status = AnalysisJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+            if quotation is not None:
+                mark_analysis_failed(quotation, FAILURE_EXCEPTION, job.error)
+        job.save(update_fields=['status', 'worker', 'error', 'finished_at'])
+        metrics.inc('quotation_analysis_jobs_total',
+                    result='retry' if job.status == AnalysisJob.STATUS_PENDING else 'failed')
+        return False
+
+    job.status = AnalysisJob.STATUS_DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    metrics.inc('quotation_analysis_jobs_total', result='done')
+    return True
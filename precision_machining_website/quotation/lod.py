@@ -0,0 +1,178 @@
+"""
+网页预览网格的简化与量化编码
+顶点聚类简化到指定字节预算以内，顶点坐标按包围盒量化为uint16，三角面索引按顶点数使用uint16或uint32
+
+编码格式（小端）：
+    头部40字节：b'JGPM'、格式版本、顶点数、三角面数（uint32），原点xyz、缩放xyz（float32）
+    顶点：顶点数×3个uint16，坐标 = 原点 + 量化值×缩放，之后补齐到4字节边界
+    三角面：三角面数×3个索引，顶点数不超过65535时为uint16，否则为uint32
+"""
+
+import struct
+
+import numpy as np
+
+PREVIEW_MAGIC = b'JGPM'
+PREVIEW_ENCODING_VERSION = 1
+_HEADER = struct.Struct('<4sIII3f3f')
+
+# 简化时调整聚类分辨率的最多次数
+MAX_SIMPLIFY_ROUNDS = 8
+
+
+def encoded_size(vertex_count, face_count):
+    """
+    编码后的字节数
+    """
+    vertex_bytes = (vertex_count * 6 + 3) // 4 * 4
+    index_size = 2 if vertex_count <= 0xFFFF else 4
+    return _HEADER.size + vertex_bytes + face_count * 3 * index_size
+
+
+def encode_preview(vertices, faces):
+    """
+    量化编码网格
+    :param vertices: (V,3) 顶点坐标
+    :param faces: (F,3) 顶点索引
+    :return: bytes
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if len(vertices):
+        origin = vertices.min(axis=0)
+        extent = vertices.max(axis=0) - origin
+    else:
+        origin = extent = np.zeros(3)
+    scale = np.where(extent > 0, extent / 65535.0, 1.0)
+    quantized = np.rint((vertices - origin) / scale).astype('<u2')
+
+    index_type = '<u2' if len(vertices) <= 0xFFFF else '<u4'
+    header = _HEADER.pack(PREVIEW_MAGIC, PREVIEW_ENCODING_VERSION, len(vertices), len(faces), *origin, *scale)
+    vertex_bytes = quantized.tobytes()
+    padding = b'\0' * (-len(vertex_bytes) % 4)
+    return header + vertex_bytes + padding + np.asarray(faces).astype(index_type).tobytes()
+
+
+def decode_preview(data):
+    """
+    解码预览网格（与浏览器端解析一致，用于校验）
+    :return: (vertices (V,3) float32, faces (F,3))
+    """
+    magic, version, vertex_count, face_count, *transform = _HEADER.unpack_from(data)
+    if magic != PREVIEW_MAGIC:
+        raise ValueError('不是预览网格数据')
+    origin, scale = np.array(transform[:3]), np.array(transform[3:])
+    offset = _HEADER.size
+    quantized = np.frombuffer(data, dtype='<u2', count=vertex_count * 3, offset=offset).reshape(-1, 3)
+    offset += (vertex_count * 6 + 3) // 4 * 4
+    index_type = '<u2' if vertex_count <= 0xFFFF else '<u4'
+    faces = np.frombuffer(data, dtype=index_type, count=face_count * 3, offset=offset).reshape(-1, 3)
+    return (origin + quantized * scale).astype(np.float32), faces
+
+
+def cluster_simplify(vertices, faces, resolution):
+    """
+    顶点聚类简化：把包围盒按最长边划分为边长相同的立方格，同一格内的顶点合并为平均位置，
+    删除退化和重复的三角面以及不再使用的顶点
+    :param resolution: 最长边上的格数
+    :return: (vertices (V,3) float32, faces (F,3) int64)
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    origin = vertices.min(axis=0)
+    extent = float((vertices.max(axis=0) - origin).max()) or 1.0
+    cells = resolution + 1
+    coords = np.clip(((vertices - origin) * (resolution / extent)).astype(np.int64), 0, resolution)
+    keys = (coords[:, 0] * cells + coords[:, 1]) * cells + coords[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    counts = np.bincount(cluster)
+    centers = np.stack([np.bincount(cluster, weights=vertices[:, axis]) for axis in range(3)], axis=1)
+    centers /= counts[:, None]
+
+    new_faces = _unique_faces(cluster[np.asarray(faces)])
+    used, new_faces = np.unique(new_faces, return_inverse=True)
+    return centers[used].astype(np.float32), new_faces.reshape(-1, 3)
+
+
+def _unique_faces(faces):
+    """
+    删除退化的三角面，多个原三角面合并为同一个三角面时只保留第一个
+    """
+    a, b, c = faces[:, 0], faces[:, 1], faces[:, 2]
+    faces = faces[(a != b) & (b != c) & (a != c)]
+    face_keys = np.ascontiguousarray(np.sort(faces, axis=1)).view(np.dtype((np.void, 24))).ravel()
+    _, first = np.unique(face_keys, return_index=True)
+    return faces[np.sort(first)]
+
+
+def cluster_triangle_chunks(triangle_chunks, bbox_min, bbox_max, resolution):
+    """
+    流式顶点聚类：与 cluster_simplify 相同的立方格划分，逐块把三角面的顶点归入格子，
+    只保留各格的坐标和、顶点数以及简化后的三角面，内存占用由分辨率决定而与输入的三角面数无关
+    :param triangle_chunks: 分块的 (n,3,3) 三角面数组
+    :param bbox_min: 整个网格包围盒的最小角
+    :param bbox_max: 整个网格包围盒的最大角
+    :param resolution: 最长边上的格数
+    :return: (vertices (V,3) float32, faces (F,3) int64)
+    """
+    origin = np.asarray(bbox_min, dtype=np.float64)
+    extent = float((np.asarray(bbox_max, dtype=np.float64) - origin).max()) or 1.0
+    cells = resolution + 1
+    cell_keys = np.zeros(0, dtype=np.int64)
+    sums = np.zeros((0, 3))
+    counts = np.zeros(0)
+    face_keys = np.zeros((0, 3), dtype=np.int64)
+
+    for chunk in triangle_chunks:
+        points = np.asarray(chunk, dtype=np.float64).reshape(-1, 3)
+        if not len(points):
+            continue
+        coords = np.clip(((points - origin) * (resolution / extent)).astype(np.int64), 0, resolution)
+        keys = (coords[:, 0] * cells + coords[:, 1]) * cells + coords[:, 2]
+        face_keys = _unique_faces(np.concatenate([face_keys, keys.reshape(-1, 3)]))
+
+        # 与已有的格子合并，累加坐标和与顶点数
+        cell_keys, inverse = np.unique(np.concatenate([cell_keys, keys]), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        sums = np.stack([np.bincount(inverse, weights=np.concatenate([sums[:, axis], points[:, axis]]))
+                         for axis in range(3)], axis=1)
+        counts = np.bincount(inverse, weights=np.concatenate([counts, np.ones(len(points))]))
+
+    centers = sums / np.maximum(counts, 1)[:, None]
+    used, faces = np.unique(np.searchsorted(cell_keys, face_keys), return_inverse=True)
+    return centers[used].astype(np.float32), faces.reshape(-1, 3)
+
+
+def simplify_to_budget(vertices, faces, budget):
+    """
+    简化网格使编码后不超过字节预算
+    表面网格的面数约与聚类分辨率的平方成正比，按超出比例的平方根逐轮降低分辨率
+    :return: (vertices, faces)
+    """
+    size = encoded_size(len(vertices), len(faces))
+    if size <= budget:
+        return vertices, faces
+
+    # 每个三角面约占9字节（半个顶点6字节的一半加3个uint16索引）
+    resolution = max(2, int(np.sqrt(budget / 9.0 / 2.0)))
+    for _ in range(MAX_SIMPLIFY_ROUNDS):
+        simplified = cluster_simplify(vertices, faces, resolution)
+        size = encoded_size(len(simplified[0]), len(simplified[1]))
+        if size <= budget or resolution <= 2:
+            return simplified
+        resolution = max(2, int(resolution * np.sqrt(budget / size) * 0.9))
+    return simplified
+
+
+def build_lods(vertices, faces, budgets):
+    """
+    按字节预算从小到大生成多级预览
+    原网格已能放入某一级预算时，该级即为完整网格，不再生成更高的级别
+    :param budgets: [(级别名称, 字节预算), ...]
+    :return: [(级别名称, 编码数据), ...]
+    """
+    lods = []
+    for name, budget in budgets:
+        lod_vertices, lod_faces = simplify_to_budget(vertices, faces, budget)
+        lods.append((name, encode_preview(lod_vertices, lod_faces)))
+        if lod_faces is faces:
+            break
+    return lods
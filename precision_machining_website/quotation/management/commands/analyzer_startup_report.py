@@ -0,0 +1,92 @@
+"""
+统计3D分析相关库的导入耗时和内存占用
+每个模块在独立的子进程中冷启动导入，结果不受当前进程已加载模块的影响
+"""
+
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# 按依赖顺序列出需要统计的模块
+REPORT_MODULES = [
+    'numpy',
+    'trimesh',
+    'OCP',
+    'cadquery',
+    'quotation.views',
+    'quotation.backends',
+]
+
+_PROBE = '''
+import json, os, resource, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+import django
+django.setup()
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+try:
+    __import__({module!r})
+    error = ''
+except Exception as e:
+    error = type(e).__name__ + ': ' + str(e)
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'rss_kb': after - before, 'error': error}}))
+'''
+
+_WARMUP_PROBE = '''
+import json, os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings_module!r})
+import django
+django.setup()
+from quotation.engine import IMPORT_TIMINGS, warmup_backends
+timings = warmup_backends()
+print(json.dumps({{'backends': timings, 'imports': IMPORT_TIMINGS}}))
+'''
+
+
+class Command(BaseCommand):
+    help = '报告3D分析库的冷启动导入耗时、内存增量和后端预热耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help='额外需要统计的模块')
+        parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+
+    def _run_probe(self, code):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=str(settings.BASE_DIR))
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '子进程异常退出'}
+        return json.loads(lines[-1])
+
+    def handle(self, *args, **options):
+        settings_module = settings.SETTINGS_MODULE
+        report = {'imports': {}, 'warmup': {}}
+
+        for module in REPORT_MODULES + options['modules']:
+            report['imports'][module] = self._run_probe(
+                _PROBE.format(settings_module=settings_module, module=module))
+        report['warmup'] = self._run_probe(_WARMUP_PROBE.format(settings_module=settings_module))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"{'模块':<24}{'导入耗时(ms)':>14}{'内存增量(MB)':>14}")
+        for module, item in report['imports'].items():
+            if item.get('error'):
+                self.stdout.write(f"{module:<24}{'未安装或导入失败':>14}  {item['error']}")
+                continue
+            self.stdout.write(f"{module:<24}{item['seconds'] * 1000:>14.1f}{item['rss_kb'] / 1024:>14.1f}")
+
+        warmup = report['warmup']
+        if warmup.get('error'):
+            self.stdout.write(f"\n后端预热失败: {warmup['error']}")
+            return
+        self.stdout.write('\n后端预热耗时:')
+        for name, seconds in warmup['backends'].items():
+            self.stdout.write(f"  {name:<20}{seconds * 1000:>10.1f} ms")
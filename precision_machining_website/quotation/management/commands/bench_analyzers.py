@@ -0,0 +1,119 @@
+"""
+3D模型分析后端基准测试
+    python manage.py bench_analyzers                     # 运行并与基线比较，性能回退时以非0状态退出
+    python manage.py bench_analyzers --save-baseline     # 运行并保存为新的基线
+    python manage.py bench_analyzers --sizes 1000,10000  # 只生成较小的零件（快速检查）
+"""
+
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from quotation.benchmark import (
+    DEFAULT_SIZES,
+    STAGES,
+    benchmark_file,
+    compare_with_baseline,
+    environment,
+    generate_corpus,
+    list_samples,
+)
+
+
+def _parse_sizes(value):
+    try:
+        return [int(size) for size in value.split(',') if size.strip()]
+    except ValueError:
+        raise CommandError('--sizes 需要逗号分隔的三角面数，例如 1000,10000')
+
+
+class Command(BaseCommand):
+    help = '对真实样本和生成的参数化零件测量各分析后端的耗时、吞吐量和峰值内存，并与基线比较'
+
+    def add_arguments(self, parser):
+        bench_dir = os.path.join(settings.BASE_DIR, 'bench')
+        parser.add_argument('--samples-dir', default=os.path.join(settings.MEDIA_ROOT, 'quotation_models'),
+                            help='真实样本目录（默认 MEDIA_ROOT/quotation_models）')
+        parser.add_argument('--corpus-dir', default=os.path.join(bench_dir, 'corpus'),
+                            help='生成零件的保存目录，已生成的文件会复用')
+        parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help='生成零件的三角面数，逗号分隔（默认1千到5百万）')
+        parser.add_argument('--no-samples', action='store_true', help='不测量真实样本')
+        parser.add_argument('--no-corpus', action='store_true', help='不测量生成的零件')
+        parser.add_argument('--stages', default=','.join(STAGES),
+                            help=f"测量的阶段，逗号分隔（默认 {','.join(STAGES)}）")
+        parser.add_argument('--repeat', type=int, default=3, help='每项测量重复次数，耗时取最小值（默认3）')
+        parser.add_argument('--timeout', type=int, default=600, help='单项测量超时秒数（默认600）')
+        parser.add_argument('--baseline', default=os.path.join(bench_dir, 'baseline.json'), help='基线文件')
+        parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='耗时或峰值内存增幅超过该比例视为回退（默认0.2）')
+        parser.add_argument('--output', help='把本次结果写入JSON文件')
+
+    def handle(self, *args, **options):
+        stages = [stage for stage in options['stages'].split(',') if stage]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise CommandError(f"未知的阶段: {', '.join(sorted(unknown))}")
+
+        files = []
+        if not options['no_samples']:
+            files += [(path, 'sample') for path in list_samples(options['samples_dir'])]
+        if not options['no_corpus']:
+            corpus = generate_corpus(options['corpus_dir'], _parse_sizes(options['sizes']), log=self.stdout.write)
+            files += [(path, 'corpus') for path in corpus]
+        if not files:
+            raise CommandError('没有可测量的模型文件')
+
+        rows = []
+        self.stdout.write(f"{'文件':<36}{'后端':<16}{'阶段':<11}{'三角面':>10}{'耗时(s)':>10}"
+                          f"{'三角面/秒':>12}{'峰值RSS增量(MB)':>16}")
+        for path, source in files:
+            for row in benchmark_file(path, source, stages, max(1, options['repeat']), options['timeout']):
+                rows.append(row)
+                self._write_row(row)
+
+        report = {'environment': environment(), 'results': rows}
+        if options['output']:
+            self._write_json(options['output'], report)
+
+        if options['save_baseline']:
+            self._write_json(options['baseline'], report)
+            self.stdout.write(self.style.SUCCESS(f"已保存基线: {options['baseline']}"))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(f"没有基线文件 {options['baseline']}，使用 --save-baseline 保存本次结果")
+            return
+        with open(options['baseline']) as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != report['environment']:
+            self.stdout.write(self.style.WARNING('基线的运行环境与本次不同，比较结果仅供参考'))
+
+        regressions = compare_with_baseline(rows, baseline, options['threshold'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"未发现超过{options['threshold']:.0%}的性能回退"))
+            return
+        for item in regressions:
+            change = f"+{item['change']:.0%}" if item['change'] is not None else ''
+            self.stdout.write(self.style.ERROR(
+                f"{item['key']} {item['metric']}: {item['baseline']} -> {item['current']} {change}"))
+        raise CommandError(f'{len(regressions)}项性能回退')
+
+    def _write_row(self, row):
+        name = row['file'] if len(row['file']) <= 34 else row['file'][:31] + '...'
+        if row.get('error'):
+            self.stdout.write(f"{name:<36}{row['backend']:<16}{'失败':<11}  {row['error']}")
+            return
+        throughput = f"{row['triangles_per_second']:,}" if row['triangles_per_second'] else '-'
+        rss = f"{row['peak_rss_delta_mb']:.1f}" if row['peak_rss_delta_mb'] is not None else '-'
+        self.stdout.write(f"{name:<36}{row['backend']:<16}{row['stage']:<11}{row['triangles'] or '-':>10}"
+                          f"{row['seconds']:>10.3f}{throughput:>12}{rss:>16}")
+
+    def _write_json(self, path, report):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
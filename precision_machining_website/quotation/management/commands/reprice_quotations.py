@@ -0,0 +1,53 @@
+"""
+按当前报价规则重新计算所有报价请求的价格区间
+价格用NumPy批量计算，只更新价格或规则版本有变化的报价；这些报价的计算明细清空，第一次查看结果页时重新生成
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from quotation.models import QuotationRequest
+from quotation.pricing import PRICING_FIELDS, batch_price_ranges
+from quotation.pricing_rules import get_pricing_rules
+
+UPDATE_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = '按当前报价规则批量重新计算报价价格'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只统计价格有变化的报价，不写入数据库')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rules = get_pricing_rules()
+        rows = list(QuotationRequest.objects
+                    .filter(analysis_status__in=['', QuotationRequest.ANALYSIS_DONE, QuotationRequest.ANALYSIS_FAILED])
+                    .values_list('id', 'price_min', 'price_max', 'pricing_version', *PRICING_FIELDS))
+        if not rows:
+            self.stdout.write('没有需要计算的报价')
+            return
+
+        ids, old_min, old_max, old_version, *values = zip(*rows)
+        price_min, price_max = batch_price_ranges(dict(zip(PRICING_FIELDS, values)), rules)
+
+        changed = [
+            QuotationRequest(id=quotation_id, price_min=float(new_min), price_max=float(new_max),
+                             price_breakdown=None, pricing_version=rules.version)
+            for quotation_id, previous_min, previous_max, previous_version, new_min, new_max
+            in zip(ids, old_min, old_max, old_version, price_min, price_max)
+            if previous_min != new_min or previous_max != new_max or previous_version != rules.version
+        ]
+        if not options['dry_run']:
+            QuotationRequest.objects.bulk_update(
+                changed, ['price_min', 'price_max', 'price_breakdown', 'pricing_version'],
+                batch_size=UPDATE_BATCH_SIZE,
+            )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'按规则 v{rules.version} 计算 {len(rows)} 个报价，{len(changed)} 个价格有变化'
+            f'{"（未写入）" if options["dry_run"] else ""}，耗时 {elapsed:.2f} 秒'
+        ))
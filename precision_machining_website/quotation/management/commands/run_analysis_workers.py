@@ -0,0 +1,98 @@
+"""
+启动3D模型分析工作进程
+可以与Web服务运行在同一台主机，也可以部署在独立节点上（共享数据库与MEDIA_ROOT即可）
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+
+from django import db
+from django.core.management.base import BaseCommand
+
+from gallery.images import build_next_work_image_variants
+from gallery.previews import build_next_work_preview
+from quotation.engine import warmup_backends
+from quotation.isolation import close_isolated
+from quotation.jobs import claim_next_job, default_worker_name, requeue_stale_jobs, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def worker_loop(poll_interval, stale_timeout, burst):
+    """
+    单个工作进程的主循环：回收超时任务、领取任务、执行任务，队列空闲时生成作品模型预览和展示图片版本
+    """
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    worker_name = default_worker_name()
+    logger.info('分析工作进程 %s 已启动', worker_name)
+
+    while not stopping:
+        requeue_stale_jobs(stale_timeout)
+        job = claim_next_job(worker_name)
+        if job is None:
+            if build_next_work_preview() or build_next_work_image_variants():
+                continue
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info('%s 领取分析任务 #%s（报价 #%s）', worker_name, job.id, job.quotation_id)
+        run_job(job)
+
+    close_isolated()
+    logger.info('分析工作进程 %s 已退出', worker_name)
+
+
+class Command(BaseCommand):
+    help = '运行3D模型分析工作进程，从数据库队列中领取并执行分析任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='并发工作进程数（默认1）')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='队列为空时的轮询间隔秒数（默认2）')
+        parser.add_argument('--stale-timeout', type=int, default=600,
+                            help='分析中任务超过该秒数未完成则重新入队（默认600）')
+        parser.add_argument('--burst', action='store_true',
+                            help='队列清空后退出，而不是持续等待新任务')
+        parser.add_argument('--no-warmup', action='store_true',
+                            help='启动时不预热分析库（默认在fork前预热，子进程共享已加载的库）')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        loop_args = (options['poll_interval'], options['stale_timeout'], options['burst'])
+
+        if processes > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            self.stderr.write('当前平台不支持fork，仅启动1个工作进程')
+            processes = 1
+
+        if not options['no_warmup']:
+            self.stdout.write(f"分析后端预热完成: {warmup_backends()}")
+
+        if processes == 1:
+            worker_loop(*loop_args)
+            return
+
+        # 子进程不能共享父进程的数据库连接
+        db.connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=worker_loop, args=loop_args) for _ in range(processes)]
+        for child in children:
+            child.start()
+
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
@@ -0,0 +1,150 @@
+"""
+标准网格缓存
+每个文件内容（SHA-256）只生成一次索引化网格：float32顶点、int32三角面、每面法向和面积，
+以未压缩的 .npy 文件保存在MEDIA_ROOT下，后续阶段内存映射读取，不再重新解析源文件，
+STEP/IGES 的OCC三角化也因此对每个不同零件只执行一次
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.conf import settings
+
+from .curvature import weld_triangles
+from .geometry import DEFAULT_CHUNK_SIZE, iter_chunks
+
+logger = logging.getLogger(__name__)
+
+# 网格文件布局版本，三角化精度或数组内容变化时需要递增
+MESH_FORMAT_VERSION = 1
+
+MESH_ARRAYS = ('vertices', 'faces', 'normals', 'areas')
+
+
+def get_mesh_cache_dir():
+    """
+    网格缓存目录
+    """
+    return getattr(settings, 'MESH_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'quotation_meshes')
+
+
+def mesh_path(content_hash):
+    """
+    文件内容对应的网格目录，按哈希前两位分子目录
+    """
+    return os.path.join(get_mesh_cache_dir(), content_hash[:2], f'{content_hash}.v{MESH_FORMAT_VERSION}')
+
+
+class CanonicalMesh:
+    """
+    索引化三角网格
+    """
+
+    def __init__(self, vertices, faces, normals=None, areas=None, simplified=False):
+        """
+        :param vertices: (V,3) float32 顶点坐标 (mm)
+        :param faces: (F,3) int32 顶点索引
+        :param normals: (F,3) float32 单位法向，为空时计算
+        :param areas: (F,) float32 三角面面积 (mm²)，为空时计算
+        :param simplified: 是否为超大网格的聚类简化结果（只用于预览和缩略图，不写入缓存）
+        """
+        self.vertices = vertices
+        self.faces = faces
+        self.simplified = simplified
+        if normals is None or areas is None:
+            normals, areas = self._face_normals()
+        self.normals = normals
+        self.areas = areas
+
+    @classmethod
+    def from_triangles(cls, triangles):
+        """
+        由 (N,3,3) 三角面数组合并重合顶点生成网格
+        """
+        vertices, faces = weld_triangles(triangles)
+        return cls(vertices.astype(np.float32), faces.astype(np.int32))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        从网格目录内存映射读取
+        """
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in MESH_ARRAYS}
+        return cls(**arrays)
+
+    def save(self, path):
+        """
+        写入网格目录：先写到同级临时目录再重命名，并发写入同一网格时读者不会看到不完整的文件
+        """
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+        try:
+            for name in MESH_ARRAYS:
+                np.save(os.path.join(temp_dir, f'{name}.npy'), np.ascontiguousarray(getattr(self, name)))
+            os.rename(temp_dir, path)
+        except OSError:
+            # 其它进程已写入同一网格
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+    def _face_normals(self):
+        normals = np.empty((len(self.faces), 3), dtype=np.float32)
+        areas = np.empty(len(self.faces), dtype=np.float32)
+        for start in range(0, len(self.faces), DEFAULT_CHUNK_SIZE):
+            stop = start + DEFAULT_CHUNK_SIZE
+            tri = self.vertices[self.faces[start:stop]].astype(np.float64)
+            cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+            double_area = np.sqrt(np.einsum('ij,ij->i', cross, cross))
+            normals[start:stop] = cross / np.where(double_area > 0, double_area, 1.0)[:, None]
+            areas[start:stop] = double_area / 2.0
+        return normals, areas
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+    def triangles(self):
+        """
+        展开为 (F,3,3) 三角面数组
+        """
+        return self.vertices[self.faces]
+
+    def iter_triangles(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        分块产生 (n,3,3) 三角面数组
+        """
+        for chunk in iter_chunks(self.faces, chunk_size):
+            yield self.vertices[chunk]
+
+
+def load_mesh(content_hash):
+    """
+    读取缓存的网格
+    :return: CanonicalMesh（内存映射），未缓存时返回None
+    """
+    if not content_hash:
+        return None
+    path = mesh_path(content_hash)
+    if not os.path.isdir(path):
+        return None
+    try:
+        return CanonicalMesh.load(path)
+    except (OSError, ValueError) as e:
+        logger.warning('读取网格缓存失败: %s %s', path, e)
+        return None
+
+
+def save_mesh(content_hash, mesh):
+    """
+    保存网格到缓存
+    :return: 网格目录
+    """
+    path = mesh_path(content_hash)
+    if not os.path.isdir(path):
+        mesh.save(path)
+    return path
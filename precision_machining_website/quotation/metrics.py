@@ -0,0 +1,338 @@
+"""
+报价流程的性能指标
+各阶段（上传写入、模型加载、各后端分析、制造特征、数据库保存、报价计算和页面渲染）的耗时和峰值RSS增量记录为直方图，
+缓存命中、各后端失败等记录为计数器。
+每个进程在内存中累计，请求结束、分析任务完成时写入共享目录（METRICS_DIR）下本进程的文件（先写临时文件再替换），
+/metrics 读取所有进程的文件合并后输出Prometheus文本格式，gunicorn各工作进程、分析工作进程和分析子进程的数据都会汇总。
+已退出进程（分析子进程定期回收、gunicorn工作进程重启）的文件在汇总时并入累计文件后删除，目录大小不随进程数增长
+"""
+
+import atexit
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 指标定义：名称 -> (类型, 说明, 直方图分桶上限)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 4, 16, 64, 256, 1024, 4096))
+
+METRICS = {
+    'quotation_stage_seconds': ('histogram', '报价流程各阶段耗时（秒）', SECONDS_BUCKETS),
+    'quotation_stage_peak_rss_delta_bytes': ('histogram', '报价流程各阶段引起的进程峰值RSS增量（字节）', BYTES_BUCKETS),
+    'quotation_feature_cache_total': ('counter', '特征缓存查询次数', None),
+    'quotation_mesh_cache_total': ('counter', '标准网格缓存查询次数', None),
+    'quotation_backend_failures_total': ('counter', '分析后端出错次数', None),
+    'quotation_analysis_jobs_total': ('counter', '分析任务执行结果', None),
+    'quotation_analysis_failures_total': ('counter', '分析失败次数（按失败类型）', None),
+}
+
+_lock = threading.Lock()
+# (名称, 标签) -> 计数
+_counters = {}
+# (名称, 标签) -> [各分桶计数..., 总和, 次数]
+_histograms = {}
+_dirty = False
+_last_flush = 0.0
+# 进程启动时间写入文件名，PID被复用时不会覆盖已退出进程的文件
+_started = int(time.time())
+
+# 已退出进程的指标累计文件
+CUMULATIVE_FILE = 'cumulative.json'
+# 各进程的指标文件：主机名-PID-启动时间.json
+_PROCESS_FILE = re.compile(r'^(?P<host>.+)-(?P<pid>\d+)-\d+\.json$')
+
+
+def _reset():
+    global _dirty, _last_flush, _started
+    _counters.clear()
+    _histograms.clear()
+    _dirty = False
+    _last_flush = 0.0
+    _started = int(time.time())
+
+
+# fork出的子进程（分析子进程、多个分析工作进程）从零开始累计，写入各自的文件
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """
+    计数器加一
+    """
+    global _dirty
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+        _dirty = True
+
+
+def observe(name, value, **labels):
+    """
+    直方图记录一个观测值
+    """
+    global _dirty
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        entry = _histograms.get(key)
+        if entry is None:
+            entry = _histograms[key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                entry[index] += 1
+                break
+        entry[-2] += value
+        entry[-1] += 1
+        _dirty = True
+
+
+def peak_rss():
+    """
+    当前进程的峰值RSS（字节），平台不支持时返回None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def stage(name, **labels):
+    """
+    记录一个阶段的耗时和峰值RSS增量（阶段出错时同样记录）
+        with stage('analysis', backend='stl'):
+            ...
+    """
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('quotation_stage_seconds', time.perf_counter() - start, stage=name, **labels)
+        if rss_before is not None:
+            observe('quotation_stage_peak_rss_delta_bytes', peak_rss() - rss_before, stage=name, **labels)
+
+
+def get_metrics_dir():
+    """
+    各进程指标文件所在目录，未配置时只输出当前进程的指标
+    """
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+def _process_file(directory):
+    return os.path.join(directory, f'{socket.gethostname()}-{os.getpid()}-{_started}.json')
+
+
+def _process_alive(name):
+    """
+    指标文件对应的进程是否仍在运行；其它主机的文件无法判断，视为运行中
+    """
+    match = _PROCESS_FILE.match(name)
+    if match is None or match.group('host') != socket.gethostname():
+        return True
+    try:
+        os.kill(int(match.group('pid')), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshot():
+    with _lock:
+        return {
+            'counters': [[name, dict(labels), value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, dict(labels), list(entry)] for (name, labels), entry in _histograms.items()],
+        }
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def flush(min_interval=0):
+    """
+    把本进程的指标写入共享目录，没有新数据时跳过
+    :param min_interval: 距上次写入不足该秒数时跳过（数据保留到下次写入）
+    """
+    global _dirty, _last_flush
+    directory = get_metrics_dir()
+    if not directory or not _dirty:
+        return
+    now = time.monotonic()
+    if min_interval and now - _last_flush < min_interval:
+        return
+    _dirty = False
+    _last_flush = now
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_json(_process_file(directory), _snapshot())
+    except OSError:
+        _dirty = True
+
+
+atexit.register(flush)
+
+
+def _merge(total, data):
+    for name, labels, value in data.get('counters', []):
+        if name in METRICS:
+            key = _key(name, labels)
+            total['counters'][key] = total['counters'].get(key, 0) + value
+    for name, labels, entry in data.get('histograms', []):
+        if name not in METRICS or len(entry) != len(METRICS[name][2]) + 2:
+            continue
+        key = _key(name, labels)
+        merged = total['histograms'].setdefault(key, [0] * len(entry))
+        for index, value in enumerate(entry):
+            merged[index] += value
+
+
+def _load(path, total):
+    try:
+        with open(path) as f:
+            _merge(total, json.load(f))
+    except (OSError, ValueError):
+        pass
+
+
+def _to_snapshot(total):
+    return {
+        'counters': [[name, dict(labels), value] for (name, labels), value in total['counters'].items()],
+        'histograms': [[name, dict(labels), entry] for (name, labels), entry in total['histograms'].items()],
+    }
+
+
+@contextmanager
+def _directory_lock(directory, exclusive):
+    """
+    合并累计文件时持有排他锁，读取所有文件时持有共享锁，避免读到已并入累计文件但尚未删除的进程文件
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def _list_files(directory):
+    try:
+        return sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except FileNotFoundError:
+        return []
+
+
+def compact(directory):
+    """
+    把已退出进程的指标文件并入累计文件后删除（平台不支持fcntl时不合并）
+    """
+    if fcntl is None or not any(not _process_alive(name) for name in _list_files(directory)):
+        return
+    with _directory_lock(directory, exclusive=True):
+        # 其它进程可能已在等待锁期间合并
+        dead = [name for name in _list_files(directory) if not _process_alive(name)]
+        if not dead:
+            return
+        cumulative_path = os.path.join(directory, CUMULATIVE_FILE)
+        total = {'counters': {}, 'histograms': {}}
+        _load(cumulative_path, total)
+        for name in dead:
+            _load(os.path.join(directory, name), total)
+        _write_json(cumulative_path, _to_snapshot(total))
+        for name in dead:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def collect():
+    """
+    合并所有进程的指标
+    :return: {'counters': {(名称, 标签): 计数}, 'histograms': {(名称, 标签): [...]}}
+    """
+    flush()
+    total = {'counters': {}, 'histograms': {}}
+    directory = get_metrics_dir()
+    if not directory:
+        _merge(total, _snapshot())
+        return total
+
+    try:
+        compact(directory)
+        with _directory_lock(directory, exclusive=False):
+            for name in _list_files(directory):
+                _load(os.path.join(directory, name), total)
+    except OSError:
+        # 目录不可写时不合并，直接读取
+        for name in _list_files(directory):
+            _load(os.path.join(directory, name), total)
+    return total
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in items
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(data=None):
+    """
+    输出Prometheus文本格式
+    """
+    data = data if data is not None else collect()
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        if metric_type == 'counter':
+            for (metric, labels), value in sorted(data['counters'].items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            continue
+        for (metric, labels), entry in sorted(data['histograms'].items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, entry):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", str(bound))])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {entry[-1]}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(entry[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {entry[-1]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0003_quotationrequest_machining_difficulty_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '分析中'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='尝试次数')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='最大尝试次数')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='处理进程')),
+                ('error', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('quotation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_jobs', to='quotation.quotationrequest', verbose_name='报价请求')),
+            ],
+            options={
+                'verbose_name': '模型分析任务',
+                'verbose_name_plural': '模型分析任务',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quotation_a_status_e4c9fa_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0004_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='文件SHA-256'),
+        ),
+        migrations.CreateModel(
+            name='AnalysisCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='文件SHA-256')),
+                ('analyzer_version', models.CharField(max_length=20, verbose_name='分析器版本')),
+                ('features', models.JSONField(default=dict, verbose_name='特征数据')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='命中次数')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '模型特征缓存',
+                'verbose_name_plural': '模型特征缓存',
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'analyzer_version'), name='unique_analysis_cache_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0005_analysiscache_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='file_format',
+            field=models.CharField(blank=True, choices=[('step', 'STEP'), ('stl_binary', 'STL（二进制）'), ('stl_ascii', 'STL（文本）'), ('obj', 'OBJ'), ('iges', 'IGES'), ('unknown', '未知')], max_length=20, verbose_name='文件格式'),
+        ),
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='文件大小 (字节)'),
+        ),
+    ]
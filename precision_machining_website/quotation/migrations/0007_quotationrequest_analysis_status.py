@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:45
+
+from django.db import migrations, models
+
+
+def populate_analysis_status(apps, schema_editor):
+    """根据已有的分析任务回填分析状态"""
+    QuotationRequest = apps.get_model('quotation', 'QuotationRequest')
+    QuotationRequest.objects.filter(analysis_jobs__status__in=['pending', 'running']).update(analysis_status='pending')
+    QuotationRequest.objects.filter(analysis_jobs__status='done').update(analysis_status='done')
+    QuotationRequest.objects.filter(analysis_jobs__status='failed').update(analysis_status='analysis_failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0006_quotationrequest_file_format_file_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='analysis_error',
+            field=models.JSONField(blank=True, null=True, verbose_name='分析失败信息'),
+        ),
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='analysis_status',
+            field=models.CharField(blank=True, choices=[('pending', '分析中'), ('done', '已完成'), ('analysis_failed', '分析失败')], max_length=20, verbose_name='分析状态'),
+        ),
+        migrations.RunPython(populate_analysis_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0007_quotationrequest_analysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='radius_histogram',
+            field=models.JSONField(blank=True, null=True, verbose_name='圆角半径分布'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0008_quotationrequest_radius_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='price_breakdown',
+            field=models.JSONField(blank=True, null=True, verbose_name='价格计算明细'),
+        ),
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='price_max',
+            field=models.FloatField(blank=True, null=True, verbose_name='参考价格上限'),
+        ),
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='price_min',
+            field=models.FloatField(blank=True, null=True, verbose_name='参考价格下限'),
+        ),
+    ]
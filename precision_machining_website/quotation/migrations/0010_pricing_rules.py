@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_default_pricing_rules(apps, schema_editor):
+    """把原来写在报价视图中的价格参数写入第1版报价规则"""
+    PricingRuleSet = apps.get_model('quotation', 'PricingRuleSet')
+    PricingBasePrice = apps.get_model('quotation', 'PricingBasePrice')
+    PricingMaterialMultiplier = apps.get_model('quotation', 'PricingMaterialMultiplier')
+    PricingPrecisionFactor = apps.get_model('quotation', 'PricingPrecisionFactor')
+
+    rule_set = PricingRuleSet.objects.create(version=1, is_active=True, note='初始报价规则')
+    for processing_type, price in [('cnc_milling', 100), ('cnc_turning', 80), ('3d_printing', 50)]:
+        PricingBasePrice.objects.create(rule_set=rule_set, processing_type=processing_type, price=price)
+    for material, multiplier in [('aluminum', 1.0), ('steel', 1.5), ('stainless_steel', 1.8),
+                                 ('plastic', 0.8), ('other', 1.2)]:
+        PricingMaterialMultiplier.objects.create(rule_set=rule_set, material=material, multiplier=multiplier)
+    for order, (marker, factor) in enumerate([('±0.01', 1.5), ('±0.05', 1.2), ('±0.1', 1.1)]):
+        PricingPrecisionFactor.objects.create(rule_set=rule_set, marker=marker, factor=factor, order=order)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0009_quotationrequest_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRuleSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(editable=False, unique=True, verbose_name='版本号')),
+                ('is_active', models.BooleanField(default=False, verbose_name='当前使用')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='说明')),
+                ('default_base_price', models.FloatField(default=100, verbose_name='默认基础价格')),
+                ('default_material_multiplier', models.FloatField(default=1.0, verbose_name='默认材料系数')),
+                ('aspect_ratio_threshold', models.FloatField(default=5, verbose_name='径长比阈值')),
+                ('aspect_ratio_factor', models.FloatField(default=1.2, verbose_name='径长比超过阈值时的因子')),
+                ('min_radius_threshold', models.FloatField(default=0.5, verbose_name='最小拐角半径阈值 (mm)')),
+                ('min_radius_factor', models.FloatField(default=1.3, verbose_name='最小拐角半径低于阈值时的因子')),
+                ('price_range_low', models.FloatField(default=0.9, verbose_name='价格下限系数')),
+                ('price_range_high', models.FloatField(default=1.1, verbose_name='价格上限系数')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '报价规则版本',
+                'verbose_name_plural': '报价规则版本',
+                'ordering': ['-version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='quotationrequest',
+            name='pricing_version',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='报价规则版本'),
+        ),
+        migrations.CreateModel(
+            name='PricingPrecisionFactor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marker', models.CharField(max_length=20, verbose_name='精度要求包含')),
+                ('factor', models.FloatField(verbose_name='因子')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='匹配顺序')),
+                ('rule_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precision_factors', to='quotation.pricingruleset', verbose_name='规则版本')),
+            ],
+            options={
+                'verbose_name': '精度因子',
+                'verbose_name_plural': '精度因子',
+                'ordering': ['order', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PricingMaterialMultiplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('material', models.CharField(choices=[('aluminum', '铝合金'), ('steel', '钢材'), ('stainless_steel', '不锈钢'), ('plastic', '塑料'), ('other', '其他')], max_length=20, verbose_name='材料')),
+                ('multiplier', models.FloatField(verbose_name='材料系数')),
+                ('rule_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='material_multipliers', to='quotation.pricingruleset', verbose_name='规则版本')),
+            ],
+            options={
+                'verbose_name': '材料系数',
+                'verbose_name_plural': '材料系数',
+                'constraints': [models.UniqueConstraint(fields=('rule_set', 'material'), name='unique_pricing_material_multiplier')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PricingBasePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processing_type', models.CharField(choices=[('cnc_milling', 'CNC铣削'), ('cnc_turning', 'CNC车削'), ('3d_printing', '3D打印')], max_length=20, verbose_name='加工类型')),
+                ('price', models.FloatField(verbose_name='基础价格')),
+                ('rule_set', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='base_prices', to='quotation.pricingruleset', verbose_name='规则版本')),
+            ],
+            options={
+                'verbose_name': '基础价格',
+                'verbose_name_plural': '基础价格',
+                'constraints': [models.UniqueConstraint(fields=('rule_set', 'processing_type'), name='unique_pricing_base_price')],
+            },
+        ),
+        migrations.RunPython(create_default_pricing_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0010_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotationBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='姓名')),
+                ('email', models.EmailField(max_length=254, verbose_name='邮箱')),
+                ('phone', models.CharField(max_length=20, verbose_name='电话')),
+                ('processing_type', models.CharField(choices=[('cnc_milling', 'CNC铣削'), ('cnc_turning', 'CNC车削'), ('3d_printing', '3D打印')], max_length=20, verbose_name='加工类型')),
+                ('material', models.CharField(choices=[('aluminum', '铝合金'), ('steel', '钢材'), ('stainless_steel', '不锈钢'), ('plastic', '塑料'), ('other', '其他')], max_length=20, verbose_name='材料')),
+                ('quantity', models.PositiveIntegerField(verbose_name='每个零件数量')),
+                ('accuracy', models.CharField(max_length=50, verbose_name='精度要求')),
+                ('surface_treatment', models.CharField(choices=[('none', '无'), ('anodizing', '阳极氧化'), ('painting', '喷漆'), ('polishing', '抛光'), ('other', '其他')], max_length=20, verbose_name='表面处理')),
+                ('description', models.TextField(blank=True, verbose_name='附加说明')),
+                ('skipped_files', models.JSONField(blank=True, default=list, verbose_name='未处理的文件')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '批量报价',
+                'verbose_name_plural': '批量报价',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuotationBatchItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(verbose_name='序号')),
+                ('file_name', models.CharField(max_length=255, verbose_name='文件名')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='quotation.quotationbatch', verbose_name='批量报价')),
+                ('quotation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_items', to='quotation.quotationrequest', verbose_name='报价请求')),
+            ],
+            options={
+                'verbose_name': '批量报价零件',
+                'verbose_name_plural': '批量报价零件',
+                'ordering': ['position'],
+            },
+        ),
+    ]
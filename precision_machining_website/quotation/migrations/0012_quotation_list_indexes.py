@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotation', '0011_quotation_batch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quotationrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='quotation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quotationrequest',
+            index=models.Index(fields=['email', '-created_at', '-id'], name='quotation_email_created_idx'),
+        ),
+    ]
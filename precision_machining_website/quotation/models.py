@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .formats import FORMAT_CHOICES
+
 class QuotationRequest(models.Model):
     """报价请求模型"""
     # 加工类型选项
@@ -43,6 +45,23 @@ class QuotationRequest(models.Model):
     
     # 文件上传
     model_file = models.FileField(upload_to='quotation_models/', blank=True, verbose_name='3D模型文件')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='文件SHA-256')
+    file_format = models.CharField(max_length=20, choices=FORMAT_CHOICES, blank=True, verbose_name='文件格式')
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name='文件大小 (字节)')
+    
+    # 3D模型分析状态
+    ANALYSIS_PENDING = 'pending'
+    ANALYSIS_DONE = 'done'
+    ANALYSIS_FAILED = 'analysis_failed'
+    
+    ANALYSIS_STATUSES = [
+        (ANALYSIS_PENDING, '分析中'),
+        (ANALYSIS_DONE, '已完成'),
+        (ANALYSIS_FAILED, '分析失败'),
+    ]
+    
+    analysis_status = models.CharField(max_length=20, choices=ANALYSIS_STATUSES, blank=True, verbose_name='分析状态')
+    analysis_error = models.JSONField(null=True, blank=True, verbose_name='分析失败信息')
     
     # 3D模型分析结果
     volume = models.FloatField(null=True, blank=True, verbose_name='体积 (cm³)')
@@ -55,6 +74,13 @@ class QuotationRequest(models.Model):
     complexity_score = models.FloatField(null=True, blank=True, verbose_name='复杂度评分')
     min_tool_diameter = models.FloatField(null=True, blank=True, verbose_name='最小刀具直径 (mm)')
     machining_difficulty = models.FloatField(null=True, blank=True, verbose_name='加工难度评分')
+    radius_histogram = models.JSONField(null=True, blank=True, verbose_name='圆角半径分布')
+    
+    # 报价结果（分析完成时计算并保存）
+    price_min = models.FloatField(null=True, blank=True, verbose_name='参考价格下限')
+    price_max = models.FloatField(null=True, blank=True, verbose_name='参考价格上限')
+    price_breakdown = models.JSONField(null=True, blank=True, verbose_name='价格计算明细')
+    pricing_version = models.PositiveIntegerField(null=True, blank=True, verbose_name='报价规则版本')
     
     # 时间戳
     created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
@@ -64,6 +90,229 @@ class QuotationRequest(models.Model):
         verbose_name = '报价请求'
         verbose_name_plural = '报价请求'
         ordering = ['-created_at']
+        indexes = [
+            # 报价接口按 (created_at, id) 游标分页，可按客户邮箱过滤
+            models.Index(fields=['-created_at', '-id'], name='quotation_created_idx'),
+            models.Index(fields=['email', '-created_at', '-id'], name='quotation_email_created_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.name}的报价请求 - {self.created_at.strftime('%Y-%m-%d')}"
+    
+    @property
+    def is_analysis_pending(self):
+        """模型文件是否仍在等待后台分析"""
+        return bool(self.model_file) and self.analysis_status == self.ANALYSIS_PENDING
+
+
+
+class QuotationBatch(models.Model):
+    """批量报价：一次上传多个零件，共用加工参数，每个不同的零件对应一个报价请求"""
+    name = models.CharField(max_length=100, verbose_name='姓名')
+    email = models.EmailField(verbose_name='邮箱')
+    phone = models.CharField(max_length=20, verbose_name='电话')
+    processing_type = models.CharField(max_length=20, choices=QuotationRequest.PROCESSING_TYPES,
+                                       verbose_name='加工类型')
+    material = models.CharField(max_length=20, choices=QuotationRequest.MATERIALS, verbose_name='材料')
+    quantity = models.PositiveIntegerField(verbose_name='每个零件数量')
+    accuracy = models.CharField(max_length=50, verbose_name='精度要求')
+    surface_treatment = models.CharField(max_length=20, choices=QuotationRequest.SURFACE_TREATMENTS,
+                                         verbose_name='表面处理')
+    description = models.TextField(blank=True, verbose_name='附加说明')
+    skipped_files = models.JSONField(default=list, blank=True, verbose_name='未处理的文件')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '批量报价'
+        verbose_name_plural = '批量报价'
+        ordering = ['-created_at']
+        
+    def __str__(self):
+        return f"{self.name}的批量报价 #{self.id} - {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class QuotationBatchItem(models.Model):
+    """批量报价中的一个文件，内容相同的文件共用同一个报价请求"""
+    batch = models.ForeignKey(QuotationBatch, on_delete=models.CASCADE, related_name='items',
+                              verbose_name='批量报价')
+    position = models.PositiveIntegerField(verbose_name='序号')
+    file_name = models.CharField(max_length=255, verbose_name='文件名')
+    quotation = models.ForeignKey(QuotationRequest, on_delete=models.CASCADE, related_name='batch_items',
+                                  verbose_name='报价请求')
+    
+    class Meta:
+        verbose_name = '批量报价零件'
+        verbose_name_plural = '批量报价零件'
+        ordering = ['position']
+        
+    def __str__(self):
+        return self.file_name
+
+class AnalysisJob(models.Model):
+    """3D模型分析任务（数据库队列）"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    STATUSES = [
+        (STATUS_PENDING, '等待中'),
+        (STATUS_RUNNING, '分析中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    ]
+    
+    quotation = models.ForeignKey(QuotationRequest, on_delete=models.CASCADE,
+                                  related_name='analysis_jobs', verbose_name='报价请求')
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING, verbose_name='状态')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='尝试次数')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='最大尝试次数')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='处理进程')
+    error = models.TextField(blank=True, verbose_name='错误信息')
+    
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    
+    class Meta:
+        verbose_name = '模型分析任务'
+        verbose_name_plural = '模型分析任务'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        
+    def __str__(self):
+        return f"分析任务 #{self.id} ({self.get_status_display()})"
+
+
+class AnalysisCache(models.Model):
+    """3D模型特征缓存，按文件内容哈希和分析器版本索引"""
+    content_hash = models.CharField(max_length=64, verbose_name='文件SHA-256')
+    analyzer_version = models.CharField(max_length=20, verbose_name='分析器版本')
+    features = models.JSONField(default=dict, verbose_name='特征数据')
+    hit_count = models.PositiveIntegerField(default=0, verbose_name='命中次数')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '模型特征缓存'
+        verbose_name_plural = '模型特征缓存'
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'analyzer_version'],
+                                    name='unique_analysis_cache_entry'),
+        ]
+        
+    def __str__(self):
+        return f"{self.content_hash[:12]} (v{self.analyzer_version})"
+
+class PricingRuleSet(models.Model):
+    """报价规则版本，同一时间只有一个版本在使用"""
+    version = models.PositiveIntegerField(unique=True, editable=False, verbose_name='版本号')
+    is_active = models.BooleanField(default=False, verbose_name='当前使用')
+    note = models.CharField(max_length=200, blank=True, verbose_name='说明')
+    default_base_price = models.FloatField(default=100, verbose_name='默认基础价格')
+    default_material_multiplier = models.FloatField(default=1.0, verbose_name='默认材料系数')
+    aspect_ratio_threshold = models.FloatField(default=5, verbose_name='径长比阈值')
+    aspect_ratio_factor = models.FloatField(default=1.2, verbose_name='径长比超过阈值时的因子')
+    min_radius_threshold = models.FloatField(default=0.5, verbose_name='最小拐角半径阈值 (mm)')
+    min_radius_factor = models.FloatField(default=1.3, verbose_name='最小拐角半径低于阈值时的因子')
+    price_range_low = models.FloatField(default=0.9, verbose_name='价格下限系数')
+    price_range_high = models.FloatField(default=1.1, verbose_name='价格上限系数')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='创建时间')
+    
+    class Meta:
+        verbose_name = '报价规则版本'
+        verbose_name_plural = '报价规则版本'
+        ordering = ['-version']
+        
+    def __str__(self):
+        return f"报价规则 v{self.version}{'（当前使用）' if self.is_active else ''}"
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.version is None:
+                latest = PricingRuleSet.objects.aggregate(models.Max('version'))['version__max']
+                self.version = (latest or 0) + 1
+            if self.is_active:
+                PricingRuleSet.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False)
+            super().save(*args, **kwargs)
+    
+    @property
+    def is_used(self):
+        """是否已有报价使用该版本计算（已使用的版本不再修改）"""
+        return QuotationRequest.objects.filter(pricing_version=self.version).exists()
+    
+    def copy(self):
+        """
+        复制为新的未启用版本
+        :return: 新的PricingRuleSet
+        """
+        with transaction.atomic():
+            new = PricingRuleSet.objects.get(pk=self.pk)
+            new.pk = None
+            new.version = None
+            new.is_active = False
+            new.note = f"复制自 v{self.version}"
+            new.created_at = timezone.now()
+            new.save()
+            for related in (self.base_prices, self.material_multipliers, self.precision_factors):
+                items = list(related.all())
+                for item in items:
+                    item.pk = None
+                    item.rule_set = new
+                related.model.objects.bulk_create(items)
+        return new
+
+
+class PricingBasePrice(models.Model):
+    """加工类型基础价格"""
+    rule_set = models.ForeignKey(PricingRuleSet, on_delete=models.CASCADE, related_name='base_prices',
+                                 verbose_name='规则版本')
+    processing_type = models.CharField(max_length=20, choices=QuotationRequest.PROCESSING_TYPES,
+                                       verbose_name='加工类型')
+    price = models.FloatField(verbose_name='基础价格')
+    
+    class Meta:
+        verbose_name = '基础价格'
+        verbose_name_plural = '基础价格'
+        constraints = [
+            models.UniqueConstraint(fields=['rule_set', 'processing_type'], name='unique_pricing_base_price'),
+        ]
+        
+    def __str__(self):
+        return f"{self.get_processing_type_display()}: {self.price}"
+
+
+class PricingMaterialMultiplier(models.Model):
+    """材料系数"""
+    rule_set = models.ForeignKey(PricingRuleSet, on_delete=models.CASCADE, related_name='material_multipliers',
+                                 verbose_name='规则版本')
+    material = models.CharField(max_length=20, choices=QuotationRequest.MATERIALS, verbose_name='材料')
+    multiplier = models.FloatField(verbose_name='材料系数')
+    
+    class Meta:
+        verbose_name = '材料系数'
+        verbose_name_plural = '材料系数'
+        constraints = [
+            models.UniqueConstraint(fields=['rule_set', 'material'], name='unique_pricing_material_multiplier'),
+        ]
+        
+    def __str__(self):
+        return f"{self.get_material_display()}: {self.multiplier}"
+
+
+class PricingPrecisionFactor(models.Model):
+    """精度要求因子，按顺序匹配精度要求中的文字"""
+    rule_set = models.ForeignKey(PricingRuleSet, on_delete=models.CASCADE, related_name='precision_factors',
+                                 verbose_name='规则版本')
+    marker = models.CharField(max_length=20, verbose_name='精度要求包含')
+    factor = models.FloatField(verbose_name='因子')
+    order = models.PositiveIntegerField(default=0, verbose_name='匹配顺序')
+    
+    class Meta:
+        verbose_name = '精度因子'
+        verbose_name_plural = '精度因子'
+        ordering = ['order', 'id']
         
     def __str__(self):
-        return f"{self.name}的报价请求 - {self.created_at.strftime('%Y-%m-%d')}"
\ No newline at end of file
+        return f"{self.marker}: {self.factor}"
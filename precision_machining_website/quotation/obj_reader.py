@@ -0,0 +1,73 @@
+"""
+OBJ网格读取
+用正则整体筛选v/f行后批量转换为数组，只有含多边形面的文件才逐行三角化
+"""
+
+import re
+
+import numpy as np
+
+from .geometry import DEFAULT_CHUNK_SIZE, iter_chunks
+
+# 删除所有不是以"v "开头的行
+_NON_VERTEX_LINE = re.compile(rb'^(?!v[ \t])[^\n]*\n?', re.MULTILINE)
+# 删除所有不是以"f "开头的行
+_NON_FACE_LINE = re.compile(rb'^(?!f[ \t])[^\n]*\n?', re.MULTILINE)
+# 面索引中的纹理/法向部分（"1/2/3" 中的 "/2/3"）
+_FACE_INDEX_SUFFIX = re.compile(rb'/[^\s]*')
+
+
+def _parse_vertices(data):
+    text = _NON_VERTEX_LINE.sub(b'', data)
+    count = text.count(b'\n') + (0 if text.endswith(b'\n') or not text else 1)
+    if count == 0:
+        return np.zeros((0, 3))
+    values = np.fromstring(text.replace(b'v', b' '), sep=' ')
+    if len(values) % count:
+        # 顶点分量数不一致（部分顶点带颜色），逐行取前三个分量
+        rows = [line.split()[1:4] for line in text.splitlines() if line.strip()]
+        return np.array(rows, dtype=np.float64)
+    return values.reshape(count, -1)[:, :3]
+
+
+def _parse_faces(data, vertex_count):
+    text = _FACE_INDEX_SUFFIX.sub(b'', _NON_FACE_LINE.sub(b'', data))
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return np.zeros((0, 3), dtype=np.int64)
+
+    values = np.fromstring(text.replace(b'f', b' '), sep=' ').astype(np.int64)
+    if len(values) == len(lines) * 3:
+        faces = values.reshape(-1, 3)
+    else:
+        # 含四边形或多边形面，按扇形三角化
+        triangles = []
+        for line in lines:
+            indices = [int(token) for token in line.split()[1:]]
+            for i in range(1, len(indices) - 1):
+                triangles.append((indices[0], indices[i], indices[i + 1]))
+        faces = np.array(triangles, dtype=np.int64)
+
+    # OBJ索引从1开始，负数表示相对末尾
+    return np.where(faces > 0, faces - 1, faces + vertex_count)
+
+
+def read_obj(file_path):
+    """
+    读取OBJ顶点和三角面索引
+    :return: (vertices (V,3) float64, faces (F,3) int64)
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    vertices = _parse_vertices(data)
+    faces = _parse_faces(data, len(vertices))
+    return vertices, faces
+
+
+def iter_obj_triangles(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    分块产生 (n,3,3) 三角面数组
+    """
+    vertices, faces = read_obj(file_path)
+    for chunk in iter_chunks(faces, chunk_size):
+        yield vertices[chunk]
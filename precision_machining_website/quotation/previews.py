@@ -0,0 +1,67 @@
+"""
+3D模型网页预览
+由标准网格生成2级量化预览网格（约50KB / 500KB），按文件内容哈希保存在MEDIA_ROOT下，
+文件名包含哈希和格式版本，内容不会变化，可由nginx按长期缓存直接提供；
+页面先加载粗略级别再逐级替换为精细级别
+"""
+
+import os
+
+from django.conf import settings
+
+# 预览级别及字节预算，从粗到细
+PREVIEW_LODS = (
+    ('lod0', 50 * 1024),
+    ('lod1', 500 * 1024),
+)
+
+# 预览文件格式版本，编码或简化算法变化时需要递增
+PREVIEW_FORMAT_VERSION = 1
+
+PREVIEW_SUBDIR = 'previews'
+
+
+def preview_relative_path(content_hash, lod):
+    """
+    预览文件相对MEDIA_ROOT的路径
+    """
+    return f'{PREVIEW_SUBDIR}/{content_hash[:2]}/{content_hash}.v{PREVIEW_FORMAT_VERSION}.{lod}.bin'
+
+
+def preview_urls(content_hash):
+    """
+    已生成的预览文件URL，从粗到细
+    """
+    if not content_hash:
+        return []
+    urls = []
+    for lod, _ in PREVIEW_LODS:
+        relative_path = preview_relative_path(content_hash, lod)
+        if not os.path.exists(os.path.join(settings.MEDIA_ROOT, relative_path)):
+            break
+        urls.append(settings.MEDIA_URL + relative_path)
+    return urls
+
+
+def build_previews(content_hash, mesh):
+    """
+    由标准网格生成并保存各级预览，已存在时跳过
+    :param mesh: CanonicalMesh
+    :return: 预览级别名称列表
+    """
+    existing = preview_urls(content_hash)
+    if existing:
+        return [lod for lod, _ in PREVIEW_LODS[:len(existing)]]
+
+    from .lod import build_lods
+
+    lods = build_lods(mesh.vertices, mesh.faces, PREVIEW_LODS)
+    for lod, data in lods:
+        path = os.path.join(settings.MEDIA_ROOT, preview_relative_path(content_hash, lod))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再重命名，nginx不会提供写了一半的文件
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return [lod for lod, _ in lods]
@@ -0,0 +1,297 @@
+"""
+报价计算
+纯函数，不访问数据库也不修改传入对象：按加工参数、3D模型特征和报价规则（PricingRules）计算参考价格区间及各因子明细。
+单个报价在分析完成时计算一次并保存到报价请求；batch_price_ranges 用NumPy一次性重新计算大批报价的价格区间
+（Web进程只用到单个报价计算，NumPy在批量计算时才导入）
+报价规则由后台维护在数据库中（见 pricing_rules.py），下面的常量是没有规则版本时使用的默认规则
+"""
+
+from types import MappingProxyType
+
+# 基础价格
+BASE_PRICES = {
+    'cnc_milling': 100,    # CNC铣削基础价格
+    'cnc_turning': 80,     # CNC车削基础价格
+    '3d_printing': 50,     # 3D打印基础价格
+}
+DEFAULT_BASE_PRICE = 100
+
+MATERIAL_MULTIPLIERS = {
+    'aluminum': 1.0,       # 铝合金
+    'steel': 1.5,          # 钢材
+    'stainless_steel': 1.8, # 不锈钢
+    'plastic': 0.8,        # 塑料
+    'other': 1.2,          # 其他
+}
+DEFAULT_MATERIAL_MULTIPLIER = 1.0
+
+# 精度要求因子，按顺序匹配精度要求中的文字
+PRECISION_FACTORS = (
+    ('±0.01', 1.5),
+    ('±0.05', 1.2),
+    ('±0.1', 1.1),
+)
+
+# 径长比超过阈值时加工难度增加
+ASPECT_RATIO_THRESHOLD = 5
+ASPECT_RATIO_FACTOR = 1.2
+
+# 最小拐角半径小于阈值（mm）时加工难度增加
+MIN_RADIUS_THRESHOLD = 0.5
+MIN_RADIUS_FACTOR = 1.3
+
+# 价格区间（相对估算价格，±10%）
+PRICE_RANGE = (0.9, 1.1)
+
+
+class PricingRules:
+    """
+    报价规则快照，创建后不可修改，可在多个请求之间共享
+    """
+
+    __slots__ = ('version', 'base_prices', 'default_base_price', 'material_multipliers',
+                 'default_material_multiplier', 'precision_factors', 'aspect_ratio_threshold',
+                 'aspect_ratio_factor', 'min_radius_threshold', 'min_radius_factor', 'price_range')
+
+    def __init__(self, version=None, base_prices=BASE_PRICES, default_base_price=DEFAULT_BASE_PRICE,
+                 material_multipliers=MATERIAL_MULTIPLIERS, default_material_multiplier=DEFAULT_MATERIAL_MULTIPLIER,
+                 precision_factors=PRECISION_FACTORS, aspect_ratio_threshold=ASPECT_RATIO_THRESHOLD,
+                 aspect_ratio_factor=ASPECT_RATIO_FACTOR, min_radius_threshold=MIN_RADIUS_THRESHOLD,
+                 min_radius_factor=MIN_RADIUS_FACTOR, price_range=PRICE_RANGE):
+        """
+        :param version: 规则版本号，默认规则为None
+        :param precision_factors: [(精度要求中的文字, 因子), ...]，按顺序匹配
+        :param price_range: (下限系数, 上限系数)
+        """
+        values = {
+            'version': version,
+            'base_prices': MappingProxyType(dict(base_prices)),
+            'default_base_price': default_base_price,
+            'material_multipliers': MappingProxyType(dict(material_multipliers)),
+            'default_material_multiplier': default_material_multiplier,
+            'precision_factors': tuple((marker, factor) for marker, factor in precision_factors),
+            'aspect_ratio_threshold': aspect_ratio_threshold,
+            'aspect_ratio_factor': aspect_ratio_factor,
+            'min_radius_threshold': min_radius_threshold,
+            'min_radius_factor': min_radius_factor,
+            'price_range': tuple(price_range),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('报价规则快照不可修改')
+
+    def __delattr__(self, name):
+        raise AttributeError('报价规则快照不可修改')
+
+    def __repr__(self):
+        return f'<PricingRules version={self.version}>'
+
+
+DEFAULT_RULES = PricingRules()
+
+# 计算报价用到的报价请求字段，batch_price_ranges 按字段名接收各列
+PRICING_FIELDS = (
+    'processing_type', 'material', 'quantity', 'accuracy', 'volume', 'surface_area',
+    'complexity_score', 'max_aspect_ratio', 'min_radius', 'machining_difficulty',
+)
+
+
+def quantity_factor(quantity):
+    """
+    数量折扣因子
+    """
+    return max(0.8, 100 / (quantity + 99))
+
+
+def precision_factor(accuracy, rules=DEFAULT_RULES):
+    """
+    精度要求因子
+    """
+    for marker, factor in rules.precision_factors:
+        if marker in (accuracy or ''):
+            return factor
+    return 1.0
+
+
+def _missing(name):
+    return {'name': name, 'value': 'N/A', 'calculation': '未提供'}
+
+
+def price_quote(quote, rules=DEFAULT_RULES):
+    """
+    计算单个报价
+    :param quote: 具有 PRICING_FIELDS 属性的对象（通常是QuotationRequest）
+    :param rules: PricingRules
+    :return: (price_min, price_max, 因子明细)
+    """
+    base_price = rules.base_prices.get(quote.processing_type, rules.default_base_price)
+    material_multiplier = rules.material_multipliers.get(quote.material, rules.default_material_multiplier)
+    quantity_discount = quantity_factor(quote.quantity)
+
+    # 基于3D模型特征的价格调整因子
+    model_factor = 1.0
+    factors = []
+
+    # 体积因子（cm³）
+    if quote.volume:
+        volume_factor = 1 + quote.volume / 1000.0
+        model_factor *= volume_factor
+        factors.append({
+            'name': '体积因子',
+            'value': quote.volume,
+            'calculation': f"1 + {quote.volume} / 1000.0 = {volume_factor:.4f}",
+        })
+    else:
+        factors.append(_missing('体积因子'))
+
+    # 表面积因子（cm²）
+    if quote.surface_area:
+        surface_area_factor = 1 + quote.surface_area / 1000.0
+        model_factor *= surface_area_factor
+        factors.append({
+            'name': '表面积因子',
+            'value': quote.surface_area,
+            'calculation': f"1 + {quote.surface_area} / 1000.0 = {surface_area_factor:.4f}",
+        })
+    else:
+        factors.append(_missing('表面积因子'))
+
+    # 复杂度因子
+    if quote.complexity_score:
+        complexity_factor = 1 + quote.complexity_score / 10.0
+        model_factor *= complexity_factor
+        factors.append({
+            'name': '复杂度因子',
+            'value': quote.complexity_score,
+            'calculation': f"1 + {quote.complexity_score} / 10.0 = {complexity_factor:.4f}",
+        })
+    else:
+        factors.append(_missing('复杂度因子'))
+
+    # 径长比因子（极端比例会增加加工难度）
+    if quote.max_aspect_ratio and quote.max_aspect_ratio > rules.aspect_ratio_threshold:
+        model_factor *= rules.aspect_ratio_factor
+        factors.append({
+            'name': '径长比因子',
+            'value': quote.max_aspect_ratio,
+            'calculation': f"大于{rules.aspect_ratio_threshold:g}，因子 = {rules.aspect_ratio_factor}",
+        })
+    elif quote.max_aspect_ratio:
+        factors.append({
+            'name': '径长比因子',
+            'value': quote.max_aspect_ratio,
+            'calculation': f"小于等于{rules.aspect_ratio_threshold:g}，因子 = 1.0",
+        })
+    else:
+        factors.append(_missing('径长比因子'))
+
+    # 精度要求因子
+    accuracy_factor = precision_factor(quote.accuracy, rules)
+    model_factor *= accuracy_factor
+    factors.append({
+        'name': '精度因子',
+        'value': quote.accuracy,
+        'calculation': f"因子 = {accuracy_factor}",
+    })
+
+    # 最小拐角半径因子（半径越小，加工越困难）
+    if quote.min_radius and quote.min_radius < rules.min_radius_threshold:
+        model_factor *= rules.min_radius_factor
+        factors.append({
+            'name': '最小拐角半径因子',
+            'value': quote.min_radius,
+            'calculation': f"小于{rules.min_radius_threshold:g}，因子 = {rules.min_radius_factor}",
+        })
+    elif quote.min_radius:
+        factors.append({
+            'name': '最小拐角半径因子',
+            'value': quote.min_radius,
+            'calculation': f"大于等于{rules.min_radius_threshold:g}，因子 = 1.0",
+        })
+    else:
+        factors.append(_missing('最小拐角半径因子'))
+
+    # 加工难度因子
+    if quote.machining_difficulty:
+        difficulty_factor = 1 + quote.machining_difficulty / 10.0
+        model_factor *= difficulty_factor
+        factors.append({
+            'name': '加工难度因子',
+            'value': quote.machining_difficulty,
+            'calculation': f"1 + {quote.machining_difficulty} / 10.0 = {difficulty_factor:.4f}",
+        })
+    else:
+        factors.append(_missing('加工难度因子'))
+
+    estimated_price = base_price * material_multiplier * quantity_discount * quote.quantity * model_factor
+    breakdown = {
+        'base_price': base_price,
+        'material_multiplier': material_multiplier,
+        'quantity_factor': quantity_discount,
+        'quantity': quote.quantity,
+        'model_factor': model_factor,
+        'rule_version': rules.version,
+        'factors': factors,
+    }
+    return (round(estimated_price * rules.price_range[0], 2),
+            round(estimated_price * rules.price_range[1], 2),
+            breakdown)
+
+
+def _lookup(values, factor):
+    """
+    把字符串列转换为数值列，每个不同取值只调用一次 factor
+    """
+    import numpy as np
+
+    keys, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    return np.array([factor(key) for key in keys], dtype=np.float64)[inverse.reshape(-1)]
+
+
+def _feature(values):
+    """
+    特征列转换为float数组，缺失值（None）记为0，与单个报价中按真值判断的逻辑一致
+    """
+    import numpy as np
+
+    column = np.array(values, dtype=np.float64)
+    return np.nan_to_num(column, nan=0.0)
+
+
+def batch_price_ranges(columns, rules=DEFAULT_RULES):
+    """
+    批量计算价格区间（与 price_quote 的计算一致）
+    :param columns: {字段名: 各报价该字段值的序列}，字段为 PRICING_FIELDS
+    :param rules: PricingRules
+    :return: (price_min, price_max) 两个float64数组
+    """
+    import numpy as np
+
+    if len(columns['quantity']) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    base_price = _lookup(columns['processing_type'],
+                         lambda key: rules.base_prices.get(key, rules.default_base_price))
+    material_multiplier = _lookup(columns['material'],
+                                  lambda key: rules.material_multipliers.get(key, rules.default_material_multiplier))
+    quantity = np.asarray(columns['quantity'], dtype=np.float64)
+    quantity_discount = np.maximum(0.8, 100 / (quantity + 99))
+
+    volume = _feature(columns['volume'])
+    surface_area = _feature(columns['surface_area'])
+    complexity = _feature(columns['complexity_score'])
+    aspect_ratio = _feature(columns['max_aspect_ratio'])
+    min_radius = _feature(columns['min_radius'])
+    difficulty = _feature(columns['machining_difficulty'])
+
+    model_factor = (1 + volume / 1000.0) * (1 + surface_area / 1000.0) * (1 + complexity / 10.0)
+    model_factor *= np.where(aspect_ratio > rules.aspect_ratio_threshold, rules.aspect_ratio_factor, 1.0)
+    model_factor *= _lookup(columns['accuracy'], lambda key: precision_factor(key, rules))
+    model_factor *= np.where((min_radius != 0) & (min_radius < rules.min_radius_threshold), rules.min_radius_factor, 1.0)
+    model_factor *= 1 + difficulty / 10.0
+
+    estimated_price = base_price * material_multiplier * quantity_discount * quantity * model_factor
+    return (np.round(estimated_price * rules.price_range[0], 2),
+            np.round(estimated_price * rules.price_range[1], 2))
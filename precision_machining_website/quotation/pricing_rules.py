@@ -0,0 +1,75 @@
+"""
+数据库中的报价规则
+当前使用的规则版本加载为不可变的 PricingRules 快照保存在进程内，多个请求共享；
+规则在后台修改后更新缓存中的修订号（在事务提交之后），各进程发现修订号变化时才重新查询数据库，
+平时每次取规则只读取一次缓存
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import PricingRuleSet
+from .pricing import DEFAULT_RULES, PricingRules
+
+PRICING_REVISION_KEY = 'pricing:revision'
+
+# (修订号, PricingRules)
+_snapshot = None
+
+
+def bump_pricing_revision():
+    """
+    报价规则变化后更新修订号
+    """
+    revision = uuid.uuid4().hex[:12]
+    cache.set(PRICING_REVISION_KEY, revision, None)
+    return revision
+
+
+def schedule_pricing_revision_bump():
+    """
+    在当前事务提交后更新修订号，避免其他进程在提交前读到旧规则并当作新修订缓存
+    """
+    transaction.on_commit(bump_pricing_revision)
+
+
+def load_active_rules():
+    """
+    从数据库加载当前使用的规则版本，没有启用的版本时使用默认规则
+    """
+    rule_set = (PricingRuleSet.objects
+                .filter(is_active=True)
+                .prefetch_related('base_prices', 'material_multipliers', 'precision_factors')
+                .first())
+    if rule_set is None:
+        return DEFAULT_RULES
+    return PricingRules(
+        version=rule_set.version,
+        base_prices={item.processing_type: item.price for item in rule_set.base_prices.all()},
+        default_base_price=rule_set.default_base_price,
+        material_multipliers={item.material: item.multiplier for item in rule_set.material_multipliers.all()},
+        default_material_multiplier=rule_set.default_material_multiplier,
+        precision_factors=[(item.marker, item.factor) for item in rule_set.precision_factors.all()],
+        aspect_ratio_threshold=rule_set.aspect_ratio_threshold,
+        aspect_ratio_factor=rule_set.aspect_ratio_factor,
+        min_radius_threshold=rule_set.min_radius_threshold,
+        min_radius_factor=rule_set.min_radius_factor,
+        price_range=(rule_set.price_range_low, rule_set.price_range_high),
+    )
+
+
+def get_pricing_rules():
+    """
+    当前使用的报价规则快照
+    :return: PricingRules
+    """
+    global _snapshot
+    revision = cache.get(PRICING_REVISION_KEY)
+    if revision is None:
+        revision = bump_pricing_revision()
+    snapshot = _snapshot
+    if snapshot is None or snapshot[0] != revision:
+        snapshot = _snapshot = (revision, load_active_rules())
+    return snapshot[1]
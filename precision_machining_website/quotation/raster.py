@@ -0,0 +1,138 @@
+"""
+NumPy软件光栅化
+不依赖GPU和OpenGL，把三角网格按等轴测视角渲染为带明暗的RGBA图像：
+三角面按屏幕包围盒大小分组，同组三角面在相同大小的像素窗口内批量做边函数测试，
+再按（像素, 深度）组成的键排序得到每个像素最近的三角面（z-buffer）
+"""
+
+import numpy as np
+
+# 等轴测视角的相机方向（从右前上方看向原点，Z轴向上）
+CAMERA_DIRECTION = np.array([1.0, -1.0, 1.0]) / np.sqrt(3.0)
+UP = np.array([0.0, 0.0, 1.0])
+# 光源方向（相对相机略偏左上）
+LIGHT_DIRECTION = np.array([0.3, -0.9, 1.0])
+BASE_COLOR = np.array([154, 164, 173], dtype=np.float64)
+AMBIENT = 0.35
+
+# 图像四周留白比例
+MARGIN = 0.06
+# 每批光栅化的最多片元数，控制内存占用
+MAX_BATCH_FRAGMENTS = 2 * 1024 * 1024
+
+
+def isometric_projection(vertices):
+    """
+    投影到等轴测视图
+    :return: (x, y, depth)，depth越大离相机越近
+    """
+    right = np.cross(UP, CAMERA_DIRECTION)
+    right /= np.linalg.norm(right)
+    up = np.cross(CAMERA_DIRECTION, right)
+    points = np.asarray(vertices, dtype=np.float64)
+    return points @ right, points @ up, points @ CAMERA_DIRECTION
+
+
+def face_shades(normals):
+    """
+    每个三角面的亮度（环境光 + 漫反射），法向方向不一致的网格按双面计算
+    """
+    light = LIGHT_DIRECTION / np.linalg.norm(LIGHT_DIRECTION)
+    diffuse = np.abs(np.asarray(normals, dtype=np.float64) @ light)
+    return AMBIENT + (1.0 - AMBIENT) * diffuse
+
+
+def _rasterize_batch(tri_x, tri_y, tri_z, x0, y0, window, size):
+    """
+    在 window×window 的像素窗口内测试像素中心是否落在三角面内
+    :return: (像素编号, 深度, 批内三角面序号)
+    """
+    offsets = np.arange(window)
+    px = (x0[:, None] + np.tile(offsets, window)[None, :]).astype(np.float64) + 0.5
+    py = (y0[:, None] + np.repeat(offsets, window)[None, :]).astype(np.float64) + 0.5
+
+    ax, bx, cx = tri_x[:, 0:1], tri_x[:, 1:2], tri_x[:, 2:3]
+    ay, by, cy = tri_y[:, 0:1], tri_y[:, 1:2], tri_y[:, 2:3]
+    area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    w0 = ((cx - bx) * (py - by) - (cy - by) * (px - bx)) / area
+    w1 = ((ax - cx) * (py - cy) - (ay - cy) * (px - cx)) / area
+    w2 = 1.0 - w0 - w1
+
+    inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (px < size) & (py < size)
+    rows, cols = np.nonzero(inside)
+    depth = w0[rows, cols] * tri_z[rows, 0] + w1[rows, cols] * tri_z[rows, 1] + w2[rows, cols] * tri_z[rows, 2]
+    pixel = py[rows, cols].astype(np.int64) * size + px[rows, cols].astype(np.int64)
+    return pixel, depth, rows
+
+
+def rasterize(vertices, faces, normals, size):
+    """
+    渲染等轴测视图
+    :param vertices: (V,3) 顶点坐标
+    :param faces: (F,3) 顶点索引
+    :param normals: (F,3) 三角面法向
+    :param size: 图像边长（像素）
+    :return: (size, size, 4) uint8 RGBA图像，背景透明
+    """
+    image = np.zeros((size, size, 4), dtype=np.uint8)
+    if len(faces) == 0:
+        return image
+
+    x, y, z = isometric_projection(vertices)
+    # 缩放到图像内并居中，图像行坐标向下
+    span = max(x.max() - x.min(), y.max() - y.min()) or 1.0
+    scale = size * (1.0 - 2 * MARGIN) / span
+    x = (x - (x.max() + x.min()) / 2.0) * scale + size / 2.0
+    y = size / 2.0 - (y - (y.max() + y.min()) / 2.0) * scale
+
+    faces = np.asarray(faces)
+    tri_x, tri_y, tri_z = x[faces], y[faces], z[faces]
+
+    # 覆盖到的像素中心范围
+    x0 = np.maximum(np.ceil(tri_x.min(axis=1) - 0.5), 0).astype(np.int64)
+    x1 = np.minimum(np.floor(tri_x.max(axis=1) - 0.5), size - 1).astype(np.int64)
+    y0 = np.maximum(np.ceil(tri_y.min(axis=1) - 0.5), 0).astype(np.int64)
+    y1 = np.minimum(np.floor(tri_y.max(axis=1) - 0.5), size - 1).astype(np.int64)
+    extent = np.maximum(x1 - x0, y1 - y0) + 1
+    area = (tri_x[:, 1] - tri_x[:, 0]) * (tri_y[:, 2] - tri_y[:, 0]) - \
+        (tri_y[:, 1] - tri_y[:, 0]) * (tri_x[:, 2] - tri_x[:, 0])
+    visible = (x1 >= x0) & (y1 >= y0) & (area != 0)
+
+    pixels, depths, owners = [], [], []
+    window = 1
+    lower = 0
+    while lower < size:
+        selected = np.flatnonzero(visible & (extent > lower) & (extent <= window))
+        batch = max(1, MAX_BATCH_FRAGMENTS // (window * window))
+        for start in range(0, len(selected), batch):
+            index = selected[start:start + batch]
+            pixel, depth, rows = _rasterize_batch(tri_x[index], tri_y[index], tri_z[index],
+                                                  x0[index], y0[index], window, size)
+            pixels.append(pixel)
+            depths.append(depth)
+            owners.append(index[rows])
+        lower = window
+        window *= 2
+
+    if not pixels:
+        return image
+    pixel = np.concatenate(pixels)
+    depth = np.concatenate(depths)
+    owner = np.concatenate(owners)
+    if len(pixel) == 0:
+        return image
+
+    # z-buffer：像素编号为高位、反转的量化深度为低位组成排序键，
+    # 排序后每个像素的第一个片元就是离相机最近的片元
+    depth_range = (depth.max() - depth.min()) or 1.0
+    depth_rank = ((depth.max() - depth) / depth_range * (2 ** 31 - 1)).astype(np.int64)
+    order = np.argsort((pixel << 32) | depth_rank)
+    pixel = pixel[order]
+    first = np.flatnonzero(np.diff(pixel, prepend=-1))
+    pixel, owner = pixel[first], owner[order][first]
+
+    colors = np.clip(BASE_COLOR[None, :] * face_shades(normals)[owner, None], 0, 255).astype(np.uint8)
+    flat = image.reshape(-1, 4)
+    flat[pixel, :3] = colors
+    flat[pixel, 3] = 255
+    return image
@@ -0,0 +1,30 @@
+"""
+报价规则变化时使进程内的规则快照失效；请求结束时写出本进程的性能指标
+"""
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .models import PricingBasePrice, PricingMaterialMultiplier, PricingPrecisionFactor, PricingRuleSet
+from .pricing_rules import schedule_pricing_revision_bump
+
+
+@receiver(post_save, sender=PricingRuleSet)
+@receiver(post_delete, sender=PricingRuleSet)
+@receiver(post_save, sender=PricingBasePrice)
+@receiver(post_delete, sender=PricingBasePrice)
+@receiver(post_save, sender=PricingMaterialMultiplier)
+@receiver(post_delete, sender=PricingMaterialMultiplier)
+@receiver(post_save, sender=PricingPrecisionFactor)
+@receiver(post_delete, sender=PricingPrecisionFactor)
+def invalidate_pricing_rules(sender, **kwargs):
+    schedule_pricing_revision_bump()
+
+
+@receiver(request_finished)
+def flush_metrics(sender, **kwargs):
+    # 限制写文件频率，未写出的数据在下次请求、/metrics 汇总或进程退出时写出
+    metrics.flush(min_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5))
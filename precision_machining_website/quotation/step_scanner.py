@@ -0,0 +1,357 @@
+"""
+STEP（ISO-10303-21）实体流式扫描
+不加载B-rep，按块读取文件，一遍统计DATA段中各实体类型的数量并提取圆柱面、圆环面、圆的半径，
+据此给出复杂度评分和最小拐角半径，cadquery未安装时也能快速估算STEP模型的加工特征；
+凹圆柱面中绕轴线完整一周的（孔、镗孔）与只占一段圆弧的内圆角分开统计
+"""
+
+import math
+import re
+from collections import Counter
+
+# 每次读取的字节数
+BLOCK_SIZE = 1024 * 1024
+
+# 字符串和注释需要整体跳过，其中可能出现 "#1=" 之类的文本
+_TOKEN = re.compile(
+    rb"'(?:[^']|'')*'"                                   # 字符串
+    rb"|/\*.*?\*/"                                       # 注释
+    rb"|#\d+\s*=\s*(\()?\s*([A-Za-z_][A-Za-z0-9_]*)",    # 实体实例：#12=NAME( 或复合实例 #12=(NAME(
+    re.DOTALL,
+)
+
+# 带半径参数的实体：CYLINDRICAL_SURFACE('',#位置,半径)、CIRCLE('',#位置,半径)、
+# TOROIDAL_SURFACE('',#位置,主半径,次半径)
+_RADIUS_RECORD = re.compile(
+    rb"#(\d+)\s*=\s*(CYLINDRICAL_SURFACE|TOROIDAL_SURFACE|CIRCLE)\s*\(\s*'(?:[^']|'')*'\s*,\s*#\d+\s*,"
+    rb"\s*([-+0-9.EeDd]+)\s*(?:,\s*([-+0-9.EeDd]+)\s*)?\)"
+)
+
+# 面记录：ADVANCED_FACE('',(边界),#曲面,.T./.F.)，最后的标志表示面法向是否与曲面法向一致
+_FACE_RECORD = re.compile(
+    rb"ADVANCED_FACE\s*\(\s*'(?:[^']|'')*'\s*,\s*\(([^)]*)\)\s*,\s*#(\d+)\s*,\s*\.([TF])\.\s*\)"
+)
+# 面的拓扑：FACE_(OUTER_)BOUND('',#环,.T.)、EDGE_LOOP('',(#有向边,...))、ORIENTED_EDGE('',*,*,#边,.T.)、
+# EDGE_CURVE('',#起点,#终点,#曲线,.T.)
+_BOUND_RECORD = re.compile(rb"#(\d+)\s*=\s*FACE(?:_OUTER)?_BOUND\s*\(\s*'(?:[^']|'')*'\s*,\s*#(\d+)")
+_LOOP_RECORD = re.compile(rb"#(\d+)\s*=\s*EDGE_LOOP\s*\(\s*'(?:[^']|'')*'\s*,\s*\(([^)]*)\)")
+_ORIENTED_EDGE_RECORD = re.compile(
+    rb"#(\d+)\s*=\s*ORIENTED_EDGE\s*\(\s*'(?:[^']|'')*'\s*,\s*\*\s*,\s*\*\s*,\s*#(\d+)"
+)
+_EDGE_CURVE_RECORD = re.compile(rb"#(\d+)\s*=\s*EDGE_CURVE\s*\(\s*'(?:[^']|'')*'\s*,\s*#(\d+)\s*,\s*#(\d+)")
+_REFERENCE = re.compile(rb'#(\d+)')
+
+# 长度单位（复合实例中含 LENGTH_UNIT() 的记录）
+_LENGTH_UNIT_RECORD = re.compile(rb"#(\d+)\s*=\s*\(([^;]*?LENGTH_UNIT\s*\(\s*\)[^;]*)\)\s*;")
+# 几何上下文使用的单位：GLOBAL_UNIT_ASSIGNED_CONTEXT((#长度单位,#角度单位,#立体角单位))
+_GLOBAL_UNITS = re.compile(rb"GLOBAL_UNIT_ASSIGNED_CONTEXT\s*\(\s*\(([^)]*)\)")
+_SI_LENGTH_UNIT = re.compile(rb"SI_UNIT\s*\(\s*(\$|\.[A-Z]+\.)\s*,\s*\.METRE\.\s*\)")
+_CONVERSION_UNIT = re.compile(rb"CONVERSION_BASED_UNIT\s*\(\s*'([^']*)'")
+
+# 长度单位换算为毫米
+SI_PREFIX_SCALE = {
+    b'$': 1000.0,
+    b'.KILO.': 1000000.0,
+    b'.CENTI.': 10.0,
+    b'.MILLI.': 1.0,
+    b'.MICRO.': 0.001,
+}
+CONVERSION_UNIT_SCALE = {
+    'INCH': 25.4,
+    'FOOT': 304.8,
+    'MILLIMETRE': 1.0,
+    'CENTIMETRE': 10.0,
+    'METRE': 1000.0,
+}
+
+# 小于该值 (mm) 的半径视为建模误差
+MIN_RADIUS_NOISE = 0.01
+
+# 圆角半径分布的分组上限 (mm)，最后一组为大于等于最后一个上限
+RADIUS_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0)
+
+# 实体记录以 ";" 加换行结束，按最后一个完整记录切分数据块
+_RECORD_END = re.compile(rb';[ \t]*\r?\n')
+
+# 曲面类型
+CURVED_SURFACES = (
+    'CYLINDRICAL_SURFACE',
+    'CONICAL_SURFACE',
+    'SPHERICAL_SURFACE',
+    'TOROIDAL_SURFACE',
+    'DEGENERATE_TOROIDAL_SURFACE',
+)
+FREEFORM_SURFACES = (
+    'B_SPLINE_SURFACE_WITH_KNOTS',
+    'B_SPLINE_SURFACE',
+    'RATIONAL_B_SPLINE_SURFACE',
+    'BEZIER_SURFACE',
+    'SURFACE_OF_REVOLUTION',
+    'SURFACE_OF_LINEAR_EXTRUSION',
+)
+SOLID_ENTITIES = (
+    'MANIFOLD_SOLID_BREP',
+    'BREP_WITH_VOIDS',
+)
+
+
+def _last_record_end(data):
+    """
+    返回最后一个完整记录结束的位置，没有完整记录时返回0
+    """
+    pos = len(data)
+    while True:
+        pos = data.rfind(b';', 0, pos)
+        if pos < 0:
+            return 0
+        match = _RECORD_END.match(data, pos)
+        if match:
+            return match.end()
+
+
+def iter_step_records(file_path, block_size=BLOCK_SIZE):
+    """
+    按块读取STEP文件，只产生以完整记录结尾的数据块
+    """
+    pending = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                if pending:
+                    yield pending
+                return
+            data = pending + data
+            cut = _last_record_end(data)
+            if cut == 0:
+                pending = data
+                continue
+            yield data[:cut]
+            pending = data[cut:]
+
+
+class StepScan:
+    """
+    一遍扫描STEP文件得到的实体统计和半径数据
+    """
+
+    def __init__(self):
+        self.histogram = Counter()
+        # 曲面编号 -> (实体类型, 半径)，圆环面取次半径（即圆角半径）
+        self.surface_radii = {}
+        self.circle_radii = []
+        # 曲面编号 -> 是否有面以相反方向使用该曲面
+        self.face_senses = {}
+        # 曲面编号 -> 是否有面绕轴线完整一周：有多个边界环，或边界中有首尾相接的闭合边（整圆）
+        # 面记录可能出现在边界和边的记录之前，先记下各面的边界编号，扫描结束后再判断
+        self.face_bounds = {}
+        self.bound_loops = {}
+        self.loop_edges = {}
+        self.oriented_edges = {}
+        self.closed_edges = set()
+        # 长度单位记录编号 -> (换算为毫米的比例, 是否为英寸等换算单位)
+        self.length_units = {}
+        self.global_unit_ids = []
+
+    def feed(self, block):
+        for match in _TOKEN.finditer(block):
+            name = match.group(2)
+            if name is not None:
+                self.histogram[name.decode('ascii').upper()] += 1
+
+        for match in _RADIUS_RECORD.finditer(block):
+            entity_id, name, first, second = match.groups()
+            try:
+                radius = abs(float((second or first).replace(b'D', b'E').replace(b'd', b'e')))
+            except ValueError:
+                continue
+            if name == b'CIRCLE':
+                self.circle_radii.append(radius)
+            else:
+                self.surface_radii[int(entity_id)] = (name.decode('ascii'), radius)
+
+        for match in _FACE_RECORD.finditer(block):
+            bounds, surface_id, sense = match.groups()
+            surface_id = int(surface_id)
+            reversed_face = sense == b'F'
+            self.face_senses[surface_id] = self.face_senses.get(surface_id, False) or reversed_face
+            if reversed_face:
+                self.face_bounds.setdefault(surface_id, []).append(
+                    [int(bound_id) for bound_id in _REFERENCE.findall(bounds)])
+
+        for match in _BOUND_RECORD.finditer(block):
+            self.bound_loops[int(match.group(1))] = int(match.group(2))
+        for match in _LOOP_RECORD.finditer(block):
+            self.loop_edges[int(match.group(1))] = [int(edge_id) for edge_id in _REFERENCE.findall(match.group(2))]
+        for match in _ORIENTED_EDGE_RECORD.finditer(block):
+            self.oriented_edges[int(match.group(1))] = int(match.group(2))
+        for match in _EDGE_CURVE_RECORD.finditer(block):
+            edge_id, start, end = match.groups()
+            if start == end:
+                self.closed_edges.add(int(edge_id))
+
+        for match in _LENGTH_UNIT_RECORD.finditer(block):
+            self.length_units[int(match.group(1))] = _length_unit_scale(match.group(2))
+
+        for match in _GLOBAL_UNITS.finditer(block):
+            self.global_unit_ids.extend(int(unit_id) for unit_id in re.findall(rb'#(\d+)', match.group(1)))
+
+    @property
+    def length_scale(self):
+        """
+        模型长度单位换算为毫米的比例
+        英寸等换算单位的文件同时含有作为换算基准的SI单位记录，优先使用几何上下文引用的单位，
+        没有上下文时使用换算单位
+        """
+        for unit_id in self.global_unit_ids:
+            if unit_id in self.length_units:
+                return self.length_units[unit_id][0]
+        units = sorted(self.length_units.values(), key=lambda unit: unit[1])
+        return units[-1][0] if units else 1.0
+
+    def _is_full_turn(self, bound_ids):
+        """
+        面是否绕曲面轴线完整一周
+        两端各有一个边界环（无接缝），或边界中有起点与终点相同的闭合边（有接缝时的整圆）
+        """
+        if len(bound_ids) >= 2:
+            return True
+        for bound_id in bound_ids:
+            for oriented_edge_id in self.loop_edges.get(self.bound_loops.get(bound_id), ()):
+                if self.oriented_edges.get(oriented_edge_id) in self.closed_edges:
+                    return True
+        return False
+
+    def radius_groups(self):
+        """
+        按面方向和弧长把圆柱面、圆环面半径分为内圆角、外圆角和孔
+        内圆角：凹面（面法向指向轴线）且只占一段圆弧，圆环面取次半径；
+        孔：绕轴线完整一周的凹圆柱面（孔、镗孔）；
+        分成多个半圆面导出的孔无法由单个面判断，仍按内圆角统计（估算的最小拐角半径偏小，报价偏保守）
+        :return: (内圆角半径列表, 外圆角半径列表, 孔半径列表)，单位mm
+        """
+        internal, external, holes = [], [], []
+        for surface_id, reversed_face in self.face_senses.items():
+            entry = self.surface_radii.get(surface_id)
+            if entry is None:
+                continue
+            radius = entry[1] * self.length_scale
+            if radius < MIN_RADIUS_NOISE:
+                continue
+            if not reversed_face:
+                external.append(radius)
+            elif entry[0] == 'CYLINDRICAL_SURFACE' and \
+                    any(self._is_full_turn(bound_ids) for bound_ids in self.face_bounds.get(surface_id, ())):
+                holes.append(radius)
+            else:
+                internal.append(radius)
+        return internal, external, holes
+
+
+def _length_unit_scale(unit_record):
+    """
+    :return: (换算为毫米的比例, 是否为换算单位)
+    """
+    match = _CONVERSION_UNIT.search(unit_record)
+    if match:
+        return CONVERSION_UNIT_SCALE.get(match.group(1).decode('ascii', 'replace').upper(), 1.0), True
+    match = _SI_LENGTH_UNIT.search(unit_record)
+    if match:
+        return SI_PREFIX_SCALE.get(match.group(1), 1.0), False
+    return 1.0, False
+
+
+def scan_step(file_path, block_size=BLOCK_SIZE):
+    """
+    扫描STEP文件
+    :return: StepScan
+    """
+    scan = StepScan()
+    for block in iter_step_records(file_path, block_size):
+        scan.feed(block)
+    return scan
+
+
+def scan_step_entities(file_path, block_size=BLOCK_SIZE):
+    """
+    统计STEP文件中各实体类型的数量
+    :return: Counter，键为大写的实体类型名
+    """
+    return scan_step(file_path, block_size).histogram
+
+
+def radius_histogram(radii):
+    """
+    按 RADIUS_BUCKETS 分组统计半径数量
+    :return: {分组标签: 数量}
+    """
+    labels = []
+    lower = 0.0
+    for upper in RADIUS_BUCKETS:
+        labels.append(f'<{upper:g}' if lower == 0 else f'{lower:g}-{upper:g}')
+        lower = upper
+    labels.append(f'>={lower:g}')
+
+    counts = dict.fromkeys(labels, 0)
+    for radius in radii:
+        index = sum(1 for upper in RADIUS_BUCKETS if radius >= upper)
+        counts[labels[index]] += 1
+    return counts
+
+
+def score_brep_complexity(face_count, curved_count=0, freeform_count=0, solid_count=1):
+    """
+    根据B-rep面数和曲面构成给出复杂度评分 (1-5分)
+    面数按对数刻度映射（约10个面为1分、1000个面为5分），自由曲面和曲面占比、多实体再适当加分
+    """
+    if face_count <= 0:
+        return 1.0
+    score = 1.0 + 4.0 * min(1.0, max(0.0, math.log10(face_count / 10.0) / 2.0))
+    score += 1.0 * freeform_count / face_count
+    score += 0.5 * curved_count / face_count
+    score += min(0.5, 0.25 * max(0, solid_count - 1))
+    return round(min(5.0, max(1.0, score)), 1)
+
+
+def step_complexity(histogram):
+    """
+    由实体统计计算复杂度评分
+    """
+    return score_brep_complexity(
+        face_count=histogram.get('ADVANCED_FACE', 0),
+        curved_count=sum(histogram.get(name, 0) for name in CURVED_SURFACES),
+        freeform_count=sum(histogram.get(name, 0) for name in FREEFORM_SURFACES),
+        solid_count=sum(histogram.get(name, 0) for name in SOLID_ENTITIES),
+    )
+
+
+def analyze_step(file_path):
+    """
+    扫描STEP文件并返回特征
+    内圆角（只占一段圆弧的凹圆柱面、凹圆环面）的最小半径限制了可用的最大刀具，作为最小拐角半径，
+    孔的半径单独统计；没有可判断方向的曲面时退而使用圆弧边的最小半径
+    """
+    scan = scan_step(file_path)
+    histogram = scan.histogram
+    if not histogram:
+        raise ValueError(f'STEP文件中没有实体数据: {file_path}')
+
+    features = {
+        'complexity_score': step_complexity(histogram),
+        'brep_face_count': histogram.get('ADVANCED_FACE', 0),
+        'solid_count': sum(histogram.get(name, 0) for name in SOLID_ENTITIES),
+        'entity_count': sum(histogram.values()),
+    }
+
+    internal, external, holes = scan.radius_groups()
+    if not internal and not external and not holes:
+        internal = [radius * scan.length_scale for radius in scan.circle_radii
+                    if radius * scan.length_scale >= MIN_RADIUS_NOISE]
+    if internal:
+        features['min_radius'] = min(internal)
+    features['radius_histogram'] = {
+        'internal': radius_histogram(internal),
+        'external': radius_histogram(external),
+        'holes': radius_histogram(holes),
+    }
+    return features
@@ -0,0 +1,142 @@
+"""
+STL流式读取
+二进制STL用 np.memmap 按50字节记录结构映射文件；文本STL按大块读取并批量解析顶点坐标。
+两种格式都分块产生 (n,3,3) 三角面数组送入几何内核，内存占用不随文件大小增长
+"""
+
+import os
+import re
+
+import numpy as np
+
+from .formats import FORMAT_STL_ASCII, FORMAT_STL_BINARY, STL_HEADER_SIZE, STL_RECORD_SIZE, sniff_file
+from .geometry import DEFAULT_CHUNK_SIZE, MeshGeometry, iter_chunks
+
+# 二进制STL三角面记录：法向量、3个顶点、属性字节数
+STL_RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])
+
+
+def binary_stl_triangle_count(file_path):
+    """
+    读取文件头中的三角面数，文件被截断时以实际长度为准
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size < STL_HEADER_SIZE:
+        return 0
+    with open(file_path, 'rb') as f:
+        f.seek(80)
+        declared = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+    return min(declared, (file_size - STL_HEADER_SIZE) // STL_RECORD_SIZE)
+
+
+def open_binary_stl(file_path):
+    """
+    以只读方式映射二进制STL的三角面记录
+    :return: 结构化记录数组（np.memmap），按需从磁盘分页读取
+    """
+    count = binary_stl_triangle_count(file_path)
+    if count == 0:
+        return np.zeros(0, dtype=STL_RECORD_DTYPE)
+    return np.memmap(file_path, dtype=STL_RECORD_DTYPE, mode='r',
+                     offset=STL_HEADER_SIZE, shape=(count,))
+
+
+def iter_binary_stl_triangles(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    按固定窗口遍历三角面顶点
+    :return: 生成 (n,3,3) float32 数组视图
+    """
+    records = open_binary_stl(file_path)
+    for window in iter_chunks(records, chunk_size):
+        yield window['vertices']
+
+
+def analyze_binary_stl(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    以恒定内存计算二进制STL的体积、表面积、包围盒和三角面数
+    :return: MeshGeometry实例
+    """
+    geometry = MeshGeometry()
+    for triangles in iter_binary_stl_triangles(file_path, chunk_size):
+        geometry.add(triangles)
+    return geometry
+
+
+# 文本STL每次读取的字节数
+ASCII_BLOCK_SIZE = 8 * 1024 * 1024
+
+# 匹配所有非vertex行（facet normal、outer loop、endloop、solid等），前导空白必须全部吃掉
+_NON_VERTEX_LINE = re.compile(rb'^[ \t]*(?![ \t]|vertex)[^\n]*', re.MULTILINE)
+
+
+def _parse_ascii_block(block):
+    """
+    从一块完整行文本中提取所有vertex坐标
+    先用正则整体删除非vertex行，再把剩余文本一次性转换为浮点数组，不逐行构造Python对象
+    """
+    text = _NON_VERTEX_LINE.sub(b'', block)
+    vertex_count = text.count(b'vertex')
+    if vertex_count == 0:
+        return np.zeros(0)
+    coords = np.fromstring(text.replace(b'vertex', b' '), sep=' ')
+    if len(coords) != vertex_count * 3:
+        raise ValueError('文本STL顶点格式错误')
+    return coords
+
+
+def iter_ascii_stl_triangles(file_path, block_size=ASCII_BLOCK_SIZE):
+    """
+    按大块读取文本STL并产生三角面顶点
+    :return: 生成 (n,3,3) float64 数组
+    """
+    pending_text = b''
+    pending_coords = np.zeros(0)
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if data:
+                # 只解析到最后一个完整行，剩余部分与下一块拼接
+                data = pending_text + data
+                cut = data.rfind(b'\n') + 1
+                block, pending_text = data[:cut], data[cut:]
+            else:
+                block, pending_text = pending_text, b''
+
+            coords = _parse_ascii_block(block)
+            if len(pending_coords):
+                coords = np.concatenate([pending_coords, coords])
+            # 一个三角面可能跨越两块，不足9个坐标的部分留到下一块
+            usable = len(coords) - len(coords) % 9
+            pending_coords = coords[usable:]
+            if usable:
+                yield coords[:usable].reshape(-1, 3, 3)
+
+            if not data:
+                break
+
+
+def iter_stl_triangles(file_path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    根据STL格式选择二进制或文本读取方式
+    """
+    file_format = file_format or sniff_file(file_path)
+    if file_format == FORMAT_STL_BINARY:
+        return iter_binary_stl_triangles(file_path, chunk_size)
+    if file_format == FORMAT_STL_ASCII:
+        return iter_ascii_stl_triangles(file_path)
+    raise ValueError(f'不是STL文件: {file_path}')
+
+
+def analyze_stl(file_path, file_format=None):
+    """
+    流式计算任意STL的体积、表面积、包围盒和三角面数
+    :return: MeshGeometry实例
+    """
+    geometry = MeshGeometry()
+    for triangles in iter_stl_triangles(file_path, file_format):
+        geometry.add_chunks(triangles)
+    return geometry
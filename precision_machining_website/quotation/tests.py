@@ -1,3 +1,1692 @@
-from django.test import TestCase
+import csv
+import functools
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import metrics, pricing_rules
+from .benchmark import torus_mesh, write_binary_stl
+from .bulk import build_price_sheet, collect_parts, create_batch, discard_parts, price_sheet_csv
+from .curvature import estimate_min_concave_radius
+from .engine import AnalysisEngine, is_module_installed
+from .feature_cache import compute_content_hash, get_cached_features, store_features
+from .formats import FORMAT_OBJ, FORMAT_STL_ASCII, FORMAT_STL_BINARY, sniff_file
+from .geometry import MeshGeometry
+from .isolation import FAILURE_CRASHED, FAILURE_TIMEOUT, AnalysisFailed, IsolatedAnalyzer, close_isolated
+from .jobs import apply_price, claim_next_job, enqueue_analysis, requeue_stale_jobs, run_job
+from .lod import (
+    build_lods, cluster_simplify, cluster_triangle_chunks, decode_preview, encode_preview, encoded_size,
+)
+from .mesh_cache import CanonicalMesh, load_mesh
+from .models import AnalysisCache, AnalysisJob, PricingRuleSet, QuotationBatch, QuotationBatchItem, QuotationRequest
+from .obj_reader import iter_obj_triangles, read_obj
+from .pricing import PRICING_FIELDS, PricingRules, batch_price_ranges, price_quote
+from .pricing_rules import get_pricing_rules
+from .previews import PREVIEW_LODS, preview_relative_path, preview_urls
+from .step_scanner import analyze_step, scan_step
+from .stl_reader import analyze_stl, iter_ascii_stl_triangles, iter_stl_triangles
+from .raster import rasterize
+from .thumbnails import THUMBNAIL_SIZE, build_thumbnail, thumbnail_relative_path, thumbnail_url
+from .upload_handlers import ModelFileUploadHandler, get_incoming_dir
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_quotation(**fields):
+    values = {
+        'name': '测试', 'email': 'test@example.com', 'phone': '13800000000',
+        'processing_type': 'cnc_milling', 'material': 'aluminum', 'quantity': 10,
+        'accuracy': '±0.05', 'surface_treatment': 'none',
+        'model_file': 'quotation_models/part.stl', 'content_hash': 'a' * 64, 'file_format': 'stl_binary',
+        'analysis_status': QuotationRequest.ANALYSIS_PENDING,
+    }
+    values.update(fields)
+    return QuotationRequest.objects.create(**values)
+
+
+def create_job(minutes_ago=0, **fields):
+    quotation = fields.pop('quotation', None) or create_quotation()
+    return AnalysisJob.objects.create(quotation=quotation,
+                                      created_at=timezone.now() - timedelta(minutes=minutes_ago), **fields)
+
+
+def finish(quotation, **features):
+    """把报价标记为分析完成并计算价格"""
+    for field, value in features.items():
+        setattr(quotation, field, value)
+    quotation.analysis_status = QuotationRequest.ANALYSIS_DONE
+    quotation.save(update_fields=['analysis_status', *features, *apply_price(quotation)])
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class ClaimNextJobTests(TestCase):
+    """领取分析任务"""
+
+    def test_claims_oldest_pending_job_first(self):
+        newer = create_job(minutes_ago=1)
+        oldest = create_job(minutes_ago=5)
+        create_job(minutes_ago=10, status=AnalysisJob.STATUS_DONE)
+
+        job = claim_next_job('worker-1')
+
+        self.assertEqual(job.id, oldest.id)
+        self.assertEqual(job.status, AnalysisJob.STATUS_RUNNING)
+        self.assertEqual(job.worker, 'worker-1')
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.started_at)
+        self.assertEqual(claim_next_job('worker-2').id, newer.id)
+
+    def test_each_job_is_claimed_once(self):
+        jobs = [create_job(minutes_ago=minutes) for minutes in (3, 2, 1)]
+
+        claimed = [claim_next_job(f'worker-{index}') for index in range(len(jobs))]
+
+        self.assertEqual([job.id for job in claimed], [job.id for job in jobs])
+        self.assertIsNone(claim_next_job('worker-x'))
+        self.assertEqual(AnalysisJob.objects.filter(status=AnalysisJob.STATUS_RUNNING, attempts=1).count(), 3)
+
+    def test_returns_none_for_empty_queue(self):
+        self.assertIsNone(claim_next_job('worker-1'))
+
+    def test_compare_and_swap_skips_job_claimed_by_another_worker(self):
+        """SQLite路径：读取任务ID和条件更新之间被其它进程领取时，改为领取下一个任务"""
+        contested = create_job(minutes_ago=2)
+        remaining = create_job(minutes_ago=1)
+        original_update = QuerySet.update
+        raced = []
+
+        def racing_update(queryset, **kwargs):
+            if not raced:
+                raced.append(True)
+                # 另一个工作进程抢先领取了同一个任务
+                original_update(AnalysisJob.objects.filter(id=contested.id),
+                                status=AnalysisJob.STATUS_RUNNING, worker='rival')
+            return original_update(queryset, **kwargs)
+
+        with mock.patch.object(connection.features, 'has_select_for_update_skip_locked', False), \
+                mock.patch.object(QuerySet, 'update', racing_update):
+            job = claim_next_job('worker-1')
+
+        self.assertEqual(job.id, remaining.id)
+        self.assertEqual(job.worker, 'worker-1')
+        contested.refresh_from_db()
+        self.assertEqual(contested.worker, 'rival')
+        self.assertEqual(contested.attempts, 0)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class RequeueStaleJobsTests(TestCase):
+    """回收超时任务"""
+
+    def running_job(self, attempts, minutes_ago):
+        return create_job(status=AnalysisJob.STATUS_RUNNING, attempts=attempts, worker='dead-worker',
+                          started_at=timezone.now() - timedelta(minutes=minutes_ago))
+
+    def test_requeues_stale_job_with_attempts_left(self):
+        job = self.running_job(attempts=1, minutes_ago=20)
+
+        self.assertEqual(requeue_stale_jobs(600), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_PENDING)
+        self.assertEqual(job.worker, '')
+
+    def test_leaves_recent_running_job_alone(self):
+        job = self.running_job(attempts=1, minutes_ago=1)
+
+        self.assertEqual(requeue_stale_jobs(600), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_RUNNING)
+
+    def test_fails_job_at_max_attempts_and_prices_quotation(self):
+        job = self.running_job(attempts=3, minutes_ago=20)
+
+        self.assertEqual(requeue_stale_jobs(600), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+        quotation = job.quotation
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_FAILED)
+        self.assertEqual(quotation.analysis_error['reason'], FAILURE_TIMEOUT)
+        # 没有模型特征时仍按表单参数补算价格
+        self.assertIsNotNone(quotation.price_min)
+        self.assertLess(quotation.price_min, quotation.price_max)
+        self.assertIsNotNone(quotation.price_breakdown)
+
+
+def crashing_task(task, file_path, file_format, content_hash):
+    """在分析子进程中代替 _run_task，按文件名模拟崩溃"""
+    name = os.path.basename(file_path)
+    if name == 'killed.stl':
+        os.kill(os.getpid(), signal.SIGKILL)
+    if name == 'exited.stl':
+        os._exit(3)
+    return {'task': task, 'pid': os.getpid()}
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class RunJobTests(TestCase):
+    """执行分析任务后的状态变化"""
+
+    def claimed_job(self, attempts=1):
+        create_job()
+        job = claim_next_job('worker-1')
+        if attempts != 1:
+            AnalysisJob.objects.filter(id=job.id).update(attempts=attempts)
+            job.refresh_from_db()
+        return job
+
+    def test_success_marks_job_done_and_prices_quotation(self):
+        job = self.claimed_job()
+        features = {'volume': 12.5, 'surface_area': 40.0, 'complexity_score': 2.0, 'face_count': 12}
+
+        with mock.patch('quotation.jobs.run_analysis', return_value=features):
+            self.assertTrue(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_DONE)
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_DONE)
+        self.assertEqual(quotation.volume, 12.5)
+        self.assertIsNotNone(quotation.price_min)
+
+    def test_unexpected_error_is_retried_while_attempts_remain(self):
+        job = self.claimed_job(attempts=1)
+
+        with mock.patch('quotation.jobs.analyze_quotation', side_effect=RuntimeError('数据库连接断开')), \
+                self.assertLogs('quotation.jobs', 'ERROR'):
+            self.assertFalse(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_PENDING)
+        self.assertEqual(job.worker, '')
+        self.assertIn('RuntimeError', job.error)
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_PENDING)
+        # 重新入队的任务可以再次领取
+        self.assertEqual(claim_next_job('worker-2').id, job.id)
+
+    def test_unexpected_error_fails_job_at_max_attempts(self):
+        job = self.claimed_job(attempts=3)
+
+        with mock.patch('quotation.jobs.analyze_quotation', side_effect=RuntimeError('数据库连接断开')), \
+                self.assertLogs('quotation.jobs', 'ERROR'):
+            self.assertFalse(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertIsNotNone(job.finished_at)
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_FAILED)
+        self.assertEqual(quotation.analysis_error['reason'], 'exception')
+        self.assertIsNotNone(quotation.price_min)
+
+    def test_analysis_failure_is_not_retried(self):
+        job = self.claimed_job(attempts=1)
+
+        with mock.patch('quotation.jobs.run_analysis',
+                        side_effect=AnalysisFailed(FAILURE_TIMEOUT, '分析超过120秒未完成')), \
+                self.assertLogs('quotation.jobs', 'WARNING'):
+            self.assertFalse(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.error, f'{FAILURE_TIMEOUT}: 分析超过120秒未完成')
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_FAILED)
+        self.assertEqual(quotation.analysis_error, {'reason': FAILURE_TIMEOUT, 'message': '分析超过120秒未完成'})
+        self.assertIsNone(claim_next_job('worker-2'))
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), '平台不支持fork')
+    @override_settings(ANALYSIS_ISOLATION=True, ANALYSIS_MEMORY_LIMIT_MB=0)
+    def test_crashed_child_is_recorded_with_exit_status(self):
+        create_job(quotation=create_quotation(model_file='quotation_models/killed.stl'))
+        job = claim_next_job('worker-1')
+
+        with mock.patch('quotation.isolation._run_task', crashing_task), \
+                self.assertLogs('quotation.jobs', 'WARNING'):
+            self.addCleanup(close_isolated)
+            self.assertFalse(run_job(job))
+
+        quotation = QuotationRequest.objects.get(id=job.quotation_id)
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_FAILED)
+        self.assertEqual(quotation.analysis_error, {
+            'reason': FAILURE_CRASHED, 'message': f'分析进程被SIGKILL终止 (exitcode={-signal.SIGKILL})',
+        })
+
+
+@unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), '平台不支持fork')
+class IsolatedAnalyzerTests(SimpleTestCase):
+    """分析子进程崩溃时记录真实的退出码或信号，下一个任务使用新的子进程"""
+
+    def setUp(self):
+        patcher = mock.patch('quotation.isolation._run_task', crashing_task)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.analyzer = IsolatedAnalyzer(timeout=30, memory_limit_mb=0)
+        self.addCleanup(self.analyzer.close)
+
+    def test_crash_reports_exit_status(self):
+        cases = {
+            'killed.stl': f'分析进程被SIGKILL终止 (exitcode={-signal.SIGKILL})',
+            'exited.stl': '分析进程异常退出 (exitcode=3)',
+        }
+        for file_path, message in cases.items():
+            with self.subTest(file_path):
+                with self.assertRaises(AnalysisFailed) as raised:
+                    self.analyzer.analyze(file_path)
+
+                self.assertEqual(raised.exception.to_dict(), {'reason': FAILURE_CRASHED, 'message': message})
+
+    def test_next_task_restarts_child(self):
+        first = self.analyzer.analyze('part.stl')
+        with self.assertRaises(AnalysisFailed):
+            self.analyzer.analyze('killed.stl')
+
+        second = self.analyzer.analyze('part.stl')
+
+        self.assertEqual(second['task'], 'analyze')
+        self.assertNotEqual(second['pid'], first['pid'])
+        self.assertNotEqual(second['pid'], os.getpid())
+
+
+# 10 x 20 x 30 mm 长方体，顶点按外法向逆时针排列
+BOX_SIZE = (10.0, 20.0, 30.0)
+BOX_VERTICES = np.array([[x, y, z] for x in (0, 10.0) for y in (0, 20.0) for z in (0, 30.0)])
+BOX_FACES = np.array([
+    [0, 1, 3], [0, 3, 2],  # x = 0
+    [4, 6, 7], [4, 7, 5],  # x = 10
+    [0, 4, 5], [0, 5, 1],  # y = 0
+    [2, 3, 7], [2, 7, 6],  # y = 20
+    [0, 2, 6], [0, 6, 4],  # z = 0
+    [1, 5, 7], [1, 7, 3],  # z = 30
+])
+# trimesh.creation.box(extents=BOX_SIZE) 的 volume (mm³) 和 area (mm²)
+BOX_VOLUME_MM3 = 6000.0
+BOX_AREA_MM2 = 2200.0
+
+TORUS_RADII = (40.0, 12.0)
+
+
+def tube_mesh(inner_radius, outer_radius, height, segments):
+    """
+    圆管网格：内孔面是半径为 inner_radius 的凹面，外圆柱面为凸面，端面与侧面成90°
+    :return: (顶点 (V,3), 三角面 (F,3))，法向朝外
+    """
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    ring = np.stack([np.cos(angles), np.sin(angles), np.zeros(segments)], axis=-1)
+    top = np.array([0.0, 0.0, height])
+    vertices = np.concatenate([ring * outer_radius, ring * outer_radius + top,
+                               ring * inner_radius, ring * inner_radius + top])
+    i = np.arange(segments)
+    j = (i + 1) % segments
+    # 外圆柱底、顶，内孔底、顶各一圈顶点
+    ob, ot, ib, it = i, i + segments, i + 2 * segments, i + 3 * segments
+    job, jot, jib, jit = j, j + segments, j + 2 * segments, j + 3 * segments
+    faces = np.concatenate([np.stack(corners, axis=-1) for corners in (
+        (ob, job, jot), (ob, jot, ot),  # 外圆柱面
+        (ib, jit, jib), (ib, it, jit),  # 内孔面
+        (ot, jot, jit), (ot, jit, it),  # 顶面
+        (ob, jib, job), (ob, ib, jib),  # 底面
+    )])
+    return vertices, faces
+
+
+def write_ascii_stl(path, vertices, faces, newline='\n'):
+    """
+    与常见CAD软件导出格式一致的文本STL（带缩进）
+    """
+    lines = ['solid part']
+    for triangle in vertices[faces]:
+        normal = np.cross(triangle[1] - triangle[0], triangle[2] - triangle[0])
+        normal /= np.linalg.norm(normal)
+        lines.append('  facet normal {:e} {:e} {:e}'.format(*normal))
+        lines.append('    outer loop')
+        lines.extend('      vertex {:e} {:e} {:e}'.format(*vertex) for vertex in triangle)
+        lines.append('    endloop')
+        lines.append('  endfacet')
+    lines.append('endsolid part')
+    with open(path, 'w', newline='') as f:
+        f.write(newline.join(lines) + newline)
+
+
+class TemporaryFilesMixin:
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class FeatureCacheTests(TemporaryFilesMixin, TestCase):
+    """特征缓存：相同内容的文件不再入队分析，分析器版本变化后缓存失效"""
+
+    FEATURES = {'volume': 12.5, 'surface_area': 40.0, 'complexity_score': 2.0, 'face_count': 12,
+                'radius_histogram': {'internal': [[0.5, 4]]}}
+
+    def test_content_hash(self):
+        path = self.path('part.stl')
+        with open(path, 'wb') as f:
+            f.write(b'solid part\n' * 1000)
+
+        self.assertEqual(compute_content_hash(path, chunk_size=64),
+                         hashlib.sha256(b'solid part\n' * 1000).hexdigest())
+
+    def test_store_keeps_cacheable_fields(self):
+        store_features('a' * 64, self.FEATURES)
+
+        features = get_cached_features('a' * 64)
+
+        self.assertEqual(features['volume'], 12.5)
+        self.assertIsNone(features['min_radius'])
+        self.assertEqual(features['radius_histogram'], {'internal': [[0.5, 4]]})
+        self.assertNotIn('face_count', features)
+        self.assertIsNone(get_cached_features(''))
+        self.assertIsNone(get_cached_features('b' * 64))
+
+    def test_hit_skips_job_creation(self):
+        store_features('a' * 64, self.FEATURES)
+        quotation = create_quotation()
+
+        self.assertIsNone(enqueue_analysis(quotation))
+
+        self.assertFalse(AnalysisJob.objects.exists())
+        quotation.refresh_from_db()
+        self.assertEqual(quotation.analysis_status, QuotationRequest.ANALYSIS_DONE)
+        self.assertEqual(quotation.volume, 12.5)
+        self.assertIsNotNone(quotation.price_min)
+        self.assertEqual(AnalysisCache.objects.get().hit_count, 1)
+
+    def test_miss_queues_job_and_result_is_cached(self):
+        first = create_quotation()
+        job = enqueue_analysis(first)
+        self.assertIsNotNone(job)
+        claimed = claim_next_job('worker-1')
+
+        with mock.patch('quotation.jobs.run_analysis', return_value=self.FEATURES) as run_analysis:
+            self.assertTrue(run_job(claimed))
+            # 相同内容的文件再次上传时直接使用缓存
+            second = create_quotation()
+            self.assertIsNone(enqueue_analysis(second))
+
+        run_analysis.assert_called_once()
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.analysis_status, QuotationRequest.ANALYSIS_DONE)
+        self.assertEqual(second.surface_area, 40.0)
+
+    def test_analyzer_version_bump_invalidates(self):
+        store_features('a' * 64, self.FEATURES)
+
+        with mock.patch('quotation.engine.ANALYZER_VERSION', 'next'):
+            self.assertIsNone(get_cached_features('a' * 64))
+            self.assertIsNotNone(enqueue_analysis(create_quotation()))
+            store_features('a' * 64, dict(self.FEATURES, volume=13.0))
+            self.assertEqual(get_cached_features('a' * 64)['volume'], 13.0)
+
+        # 各版本的结果分别保存，旧版本的记录不被覆盖
+        self.assertEqual(get_cached_features('a' * 64)['volume'], 12.5)
+        self.assertEqual(AnalysisCache.objects.count(), 2)
+
+
+class StlReaderTests(TemporaryFilesMixin, SimpleTestCase):
+    """STL读取：体积、表面积、包围盒与trimesh的结果一致"""
+
+    def assertBoxFeatures(self, features):
+        self.assertEqual(features['face_count'], 12)
+        self.assertAlmostEqual(features['volume'], BOX_VOLUME_MM3 / 1000.0, places=9)
+        self.assertAlmostEqual(features['surface_area'], BOX_AREA_MM2 / 100.0, places=9)
+        self.assertEqual((features['bounding_box_length'], features['bounding_box_width'],
+                          features['bounding_box_height']), BOX_SIZE)
+
+    def test_binary_box(self):
+        path = self.path('box.stl')
+        write_binary_stl(path, BOX_VERTICES, BOX_FACES)
+
+        self.assertEqual(sniff_file(path), FORMAT_STL_BINARY)
+        self.assertBoxFeatures(analyze_stl(path).to_features())
+
+    def test_ascii_box(self):
+        path = self.path('box.stl')
+        write_ascii_stl(path, BOX_VERTICES, BOX_FACES)
+
+        self.assertEqual(sniff_file(path), FORMAT_STL_ASCII)
+        self.assertBoxFeatures(analyze_stl(path).to_features())
+
+    def test_ascii_box_with_crlf_line_endings(self):
+        path = self.path('box.stl')
+        write_ascii_stl(path, BOX_VERTICES, BOX_FACES, newline='\r\n')
+
+        self.assertEqual(sniff_file(path), FORMAT_STL_ASCII)
+        self.assertBoxFeatures(analyze_stl(path).to_features())
+
+    def test_ascii_blocks_split_inside_facets(self):
+        """块边界落在三角面和数字中间时，结果与二进制读取相同"""
+        binary_path, ascii_path = self.path('box-binary.stl'), self.path('box-ascii.stl')
+        write_binary_stl(binary_path, BOX_VERTICES, BOX_FACES)
+        write_ascii_stl(ascii_path, BOX_VERTICES, BOX_FACES, newline='\r\n')
+
+        expected = np.concatenate(list(iter_stl_triangles(binary_path)))
+        for block_size in (7, 64, 333):
+            triangles = np.concatenate(list(iter_ascii_stl_triangles(ascii_path, block_size=block_size)))
+            np.testing.assert_allclose(triangles, expected)
+
+    def test_torus_matches_analytic_volume_and_area(self):
+        path = self.path('torus.stl')
+        write_binary_stl(path, *torus_mesh(20000, *TORUS_RADII))
+
+        features = analyze_stl(path).to_features()
+
+        major, minor = TORUS_RADII
+        # 网格内接于真实曲面，体积和面积略小
+        self.assertAlmostEqual(features['volume'], 2 * math.pi ** 2 * major * minor ** 2 / 1000.0,
+                               delta=0.005 * 113.7)
+        self.assertAlmostEqual(features['surface_area'], 4 * math.pi ** 2 * major * minor / 100.0,
+                               delta=0.005 * 189.5)
+
+    @unittest.skipUnless(is_module_installed('trimesh'), 'trimesh未安装')
+    def test_matches_trimesh(self):
+        import trimesh
+
+        vertices, faces = torus_mesh(20000, *TORUS_RADII)
+        for name, writer in (('binary.stl', write_binary_stl), ('ascii.stl', write_ascii_stl)):
+            path = self.path(name)
+            writer(path, vertices, faces)
+            mesh = trimesh.load(path, force='mesh')
+            features = analyze_stl(path).to_features()
+            self.assertAlmostEqual(features['volume'], mesh.volume / 1000.0, delta=1e-6 * mesh.volume)
+            self.assertAlmostEqual(features['surface_area'], mesh.area / 100.0, delta=1e-6 * mesh.area)
+            np.testing.assert_allclose(
+                [features['bounding_box_length'], features['bounding_box_width'], features['bounding_box_height']],
+                mesh.extents, rtol=1e-6)
+
+
+# 长方体的六个四边形面（OBJ索引从1开始）
+BOX_QUADS = [[1, 2, 4, 3], [5, 7, 8, 6], [1, 5, 6, 2], [3, 4, 8, 7], [1, 3, 7, 5], [2, 6, 8, 4]]
+
+
+def write_obj(path, vertex_lines, face_lines, newline='\n'):
+    lines = ['# test part', 'o part'] + vertex_lines + ['vn 0 0 1', 'vt 0 0', 's off'] + face_lines
+    with open(path, 'w', newline='') as f:
+        f.write(newline.join(lines) + newline)
+
+
+def obj_geometry(path):
+    geometry = MeshGeometry()
+    for triangles in iter_obj_triangles(path):
+        geometry.add(triangles)
+    return geometry.to_features()
+
+
+class ObjReaderTests(TemporaryFilesMixin, SimpleTestCase):
+    """OBJ读取：各种面索引写法得到相同的几何量"""
+
+    box_vertex_lines = ['v {:g} {:g} {:g}'.format(*vertex) for vertex in BOX_VERTICES]
+
+    def assertBox(self, path):
+        self.assertEqual(sniff_file(path), FORMAT_OBJ)
+        features = obj_geometry(path)
+        self.assertEqual(features['face_count'], 12)
+        self.assertAlmostEqual(features['volume'], BOX_VOLUME_MM3 / 1000.0, places=9)
+        self.assertAlmostEqual(features['surface_area'], BOX_AREA_MM2 / 100.0, places=9)
+        self.assertEqual((features['bounding_box_length'], features['bounding_box_width'],
+                          features['bounding_box_height']), BOX_SIZE)
+
+    def test_triangle_faces(self):
+        path = self.path('box.obj')
+        write_obj(path, self.box_vertex_lines, ['f {} {} {}'.format(*face) for face in BOX_FACES + 1])
+        self.assertBox(path)
+
+        vertices, faces = read_obj(path)
+        np.testing.assert_array_equal(vertices, BOX_VERTICES)
+        np.testing.assert_array_equal(faces, BOX_FACES)
+
+    def test_texture_and_normal_indices(self):
+        path = self.path('box.obj')
+        write_obj(path, self.box_vertex_lines,
+                  ['f ' + ' '.join(f'{index}/1/1' for index in face) for face in BOX_FACES + 1])
+        self.assertBox(path)
+
+    def test_quads_are_triangulated(self):
+        path = self.path('box.obj')
+        write_obj(path, self.box_vertex_lines, ['f ' + ' '.join(f'{index}//1' for index in quad)
+                                                for quad in BOX_QUADS])
+        self.assertBox(path)
+
+    def test_negative_indices_and_crlf(self):
+        path = self.path('box.obj')
+        write_obj(path, self.box_vertex_lines,
+                  ['f {} {} {}'.format(*face) for face in BOX_FACES - len(BOX_VERTICES)], newline='\r\n')
+        self.assertBox(path)
+
+    def test_vertex_colors_are_ignored(self):
+        path = self.path('box.obj')
+        vertex_lines = [line + ' 0.5 0.5 0.5' if index % 2 else line
+                        for index, line in enumerate(self.box_vertex_lines)]
+        write_obj(path, vertex_lines, ['f {} {} {}'.format(*face) for face in BOX_FACES + 1])
+        self.assertBox(path)
+
+    @unittest.skipUnless(is_module_installed('trimesh'), 'trimesh未安装')
+    def test_matches_trimesh(self):
+        import trimesh
+
+        vertices, faces = torus_mesh(20000, *TORUS_RADII)
+        path = self.path('torus.obj')
+        write_obj(path, ['v {:.6f} {:.6f} {:.6f}'.format(*vertex) for vertex in vertices],
+                  ['f {} {} {}'.format(*face) for face in faces + 1])
+        mesh = trimesh.load(path, force='mesh', process=False)
+        features = obj_geometry(path)
+        self.assertEqual(features['face_count'], len(mesh.faces))
+        self.assertAlmostEqual(features['volume'], mesh.volume / 1000.0, delta=1e-6 * mesh.volume)
+        self.assertAlmostEqual(features['surface_area'], mesh.area / 100.0, delta=1e-6 * mesh.area)
+
+
+# 带两个内圆柱面（孔）、一个外圆柱面和一个内圆角（圆环面）的STEP片段，{unit} 为长度单位记录
+STEP_TEMPLATE = """ISO-10303-21;
+HEADER;
+FILE_DESCRIPTION(('radius test /* #99=CIRCLE(\'\',#3,0.001); */'),'2;1');
+FILE_NAME('part.step','2024-01-01T00:00:00',(''),(''),'','','');
+FILE_SCHEMA(('AUTOMOTIVE_DESIGN'));
+ENDSEC;
+DATA;
+#1=CARTESIAN_POINT('',(0.,0.,0.));
+#2=DIRECTION('',(0.,0.,1.));
+#3=AXIS2_PLACEMENT_3D('',#1,#2,$);
+#10=CYLINDRICAL_SURFACE('hole',#3,0.125);
+#11=CYLINDRICAL_SURFACE('',#3,2.5E-1);
+#12=CYLINDRICAL_SURFACE('boss',#3,0.0625);
+#13=TOROIDAL_SURFACE('fillet',#3,2.,0.1);
+#14=PLANE('',#3);
+#15=CYLINDRICAL_SURFACE('fillet',#3,0.2);
+#20=ADVANCED_FACE('',(#30,#35),#10,.F.);
+#21=ADVANCED_FACE('',(#31),#11,.F.);
+#22=ADVANCED_FACE('',(#32),#12,.T.);
+#23=ADVANCED_FACE('',(#33),#13,.F.);
+#24=ADVANCED_FACE('',(#34),#14,.T.);
+#25=ADVANCED_FACE('',(#36),#15,.F.);
+#31=FACE_OUTER_BOUND('',#80,.T.);
+#36=FACE_OUTER_BOUND('',#90,.T.);
+#40=CIRCLE('',#3,0.01);
+#41=CIRCLE('',#3,0.2);
+#42=LINE('',#1,$);
+#80=EDGE_LOOP('',(#81,#82,#83,#84));
+#81=ORIENTED_EDGE('',*,*,#85,.T.);
+#82=ORIENTED_EDGE('',*,*,#86,.T.);
+#83=ORIENTED_EDGE('',*,*,#87,.F.);
+#84=ORIENTED_EDGE('',*,*,#86,.F.);
+#85=EDGE_CURVE('',#100,#100,#40,.T.);
+#86=EDGE_CURVE('',#100,#101,#42,.T.);
+#87=EDGE_CURVE('',#101,#101,#40,.T.);
+#90=EDGE_LOOP('',(#91,#92));
+#91=ORIENTED_EDGE('',*,*,#93,.T.);
+#92=ORIENTED_EDGE('',*,*,#94,.T.);
+#93=EDGE_CURVE('',#100,#101,#41,.T.);
+#94=EDGE_CURVE('',#101,#100,#42,.T.);
+#50=MANIFOLD_SOLID_BREP('',#51);
+{unit}
+ENDSEC;
+END-ISO-10303-21;
+"""
+# 英寸单位：换算单位引用作为基准的毫米单位（#63），几何上下文引用英寸单位（#60）
+STEP_INCH_UNIT = (
+    "#60=( CONVERSION_BASED_UNIT('INCH',#61) LENGTH_UNIT() NAMED_UNIT(#62) );\n"
+    "#61=LENGTH_MEASURE_WITH_UNIT(LENGTH_MEASURE(25.4),#63);\n"
+    "#63=( LENGTH_UNIT() NAMED_UNIT(*) SI_UNIT(.MILLI.,.METRE.) );\n"
+    "#70=( GEOMETRIC_REPRESENTATION_CONTEXT(3) GLOBAL_UNIT_ASSIGNED_CONTEXT((#60,#71,#72)) "
+    "REPRESENTATION_CONTEXT('','') );"
+)
+STEP_MILLIMETRE_UNIT = "#60=( LENGTH_UNIT() NAMED_UNIT(*) SI_UNIT(.MILLI.,.METRE.) );"
+STEP_METRE_UNIT = "#60=( LENGTH_UNIT() NAMED_UNIT(*) SI_UNIT($,.METRE.) );"
+
+
+class StepScannerTests(TemporaryFilesMixin, SimpleTestCase):
+    """STEP扫描：按面方向区分内外圆角，绕轴线一周的凹圆柱面为孔，半径按文件长度单位换算为毫米"""
+
+    def write_step(self, unit, newline='\n', name='part.step'):
+        path = self.path(name)
+        with open(path, 'w', newline='') as f:
+            f.write(STEP_TEMPLATE.format(unit=unit).replace('\n', newline))
+        return path
+
+    def test_inch_radii_are_converted_to_millimetres(self):
+        features = analyze_step(self.write_step(STEP_INCH_UNIT))
+
+        # 内圆角：0.1in 圆环面和 0.2in 圆弧面；0.125in、0.25in 是孔；0.0625in 的凸台是外圆角
+        self.assertAlmostEqual(features['min_radius'], 0.1 * 25.4)
+        histogram = features['radius_histogram']
+        self.assertEqual(sum(histogram['internal'].values()), 2)
+        self.assertEqual(histogram['internal']['2-5'], 1)
+        self.assertEqual(histogram['internal']['5-10'], 1)
+        self.assertEqual(sum(histogram['holes'].values()), 2)
+        self.assertEqual(histogram['holes']['2-5'], 1)
+        self.assertEqual(histogram['holes']['5-10'], 1)
+        self.assertEqual(histogram['external']['1-2'], 1)
+        self.assertEqual(features['brep_face_count'], 6)
+        self.assertEqual(features['solid_count'], 1)
+
+    def test_global_context_selects_length_unit(self):
+        """几何上下文引用的单位优先；没有上下文时换算单位优先于作为基准的SI单位"""
+        without_context = STEP_INCH_UNIT.rsplit('\n', 1)[0]
+        self.assertEqual(scan_step(self.write_step(without_context)).length_scale, 25.4)
+
+        millimetre_context = STEP_INCH_UNIT.replace('((#60,', '((#63,')
+        self.assertEqual(scan_step(self.write_step(millimetre_context)).length_scale, 1.0)
+
+    def test_millimetre_radii(self):
+        features = analyze_step(self.write_step(STEP_MILLIMETRE_UNIT))
+
+        self.assertAlmostEqual(features['min_radius'], 0.1)
+        self.assertEqual(features['radius_histogram']['internal']['<0.5'], 2)
+        self.assertEqual(features['radius_histogram']['holes']['<0.5'], 2)
+
+    def test_metre_radii(self):
+        scan = scan_step(self.write_step(STEP_METRE_UNIT))
+
+        self.assertEqual(scan.length_scale, 1000.0)
+        internal, external, holes = scan.radius_groups()
+        self.assertEqual(sorted(internal), [100.0, 200.0])
+        self.assertEqual(external, [62.5])
+        self.assertEqual(sorted(holes), [125.0, 250.0])
+
+    def test_small_blocks_and_crlf_give_same_scan(self):
+        expected = scan_step(self.write_step(STEP_INCH_UNIT))
+        crlf_path = self.write_step(STEP_INCH_UNIT, newline='\r\n', name='crlf.step')
+
+        for block_size in (16, 100, 1024 * 1024):
+            scan = scan_step(crlf_path, block_size=block_size)
+            self.assertEqual(scan.histogram, expected.histogram)
+            self.assertEqual(scan.length_scale, 25.4)
+            self.assertEqual([sorted(radii) for radii in scan.radius_groups()],
+                             [sorted(radii) for radii in expected.radius_groups()])
+
+    def test_falls_back_to_circle_radii_without_oriented_surfaces(self):
+        path = self.path('circles.step')
+        with open(path, 'w') as f:
+            f.write("ISO-10303-21;\nHEADER;\nENDSEC;\nDATA;\n"
+                    "#1=CARTESIAN_POINT('',(0.,0.,0.));\n"
+                    "#2=AXIS2_PLACEMENT_3D('',#1,$,$);\n"
+                    "#3=CIRCLE('',#2,0.75);\n#4=CIRCLE('',#2,0.2);\n#5=CIRCLE('',#2,0.0001);\n"
+                    + STEP_INCH_UNIT + "\nENDSEC;\nEND-ISO-10303-21;\n")
+
+        # 小于噪声阈值的圆被忽略
+        self.assertAlmostEqual(analyze_step(path)['min_radius'], 0.2 * 25.4)
+
+
+class CurvatureTests(SimpleTestCase):
+    """网格曲率：由凹边二面角估算的最小内圆角半径与生成网格的已知半径一致"""
+
+    def test_bore_radius(self):
+        for segments in (16, 48, 200):
+            with self.subTest(segments=segments):
+                vertices, faces = tube_mesh(2.5, 10.0, 30.0, segments)
+
+                features = estimate_min_concave_radius(vertices[faces])
+
+                # 外圆柱面为凸面，端面的90°棱边是尖角，只有内孔面的边是凹边
+                self.assertEqual(features['concave_fillet_edges'], segments)
+                self.assertAlmostEqual(features['min_radius'], 2.5, places=6)
+
+    def test_smallest_radius_wins(self):
+        small = tube_mesh(1.2, 4.0, 10.0, 36)
+        large = tube_mesh(6.0, 9.0, 10.0, 36)
+        triangles = np.concatenate([small[0][small[1]], large[0][large[1]] + [30.0, 0.0, 0.0]])
+
+        features = estimate_min_concave_radius(triangles)
+
+        self.assertEqual(features['concave_fillet_edges'], 72)
+        self.assertAlmostEqual(features['min_radius'], 1.2, places=6)
+
+    def test_torus_inner_equator(self):
+        major, minor = TORUS_RADII
+        vertices, faces = torus_mesh(20000, major, minor)
+
+        features = estimate_min_concave_radius(vertices[faces])
+
+        # 内侧赤道处沿环向的曲率半径最小，为 R - r
+        self.assertAlmostEqual(features['min_radius'], major - minor, delta=0.01 * (major - minor))
+
+    def test_convex_and_sharp_edges_are_ignored(self):
+        # 四边形截面的孔：二面角90°，是尖角而不是圆角
+        vertices, faces = tube_mesh(2.5, 10.0, 30.0, 4)
+        cases = {'长方体': BOX_VERTICES[BOX_FACES], '方孔': vertices[faces]}
+        for name, triangles in cases.items():
+            with self.subTest(name):
+                self.assertEqual(estimate_min_concave_radius(triangles), {'concave_fillet_edges': 0})
+        self.assertEqual(estimate_min_concave_radius(np.zeros((0, 3, 3))), {'concave_fillet_edges': 0})
+
+
+def baseline_price(quote):
+    """原报价视图中的计算公式（规则迁移到数据库之前），用于核对默认规则下的报价"""
+    base_price = {'cnc_milling': 100, 'cnc_turning': 80, '3d_printing': 50}.get(quote.processing_type, 100)
+    material_multiplier = {'aluminum': 1.0, 'steel': 1.5, 'stainless_steel': 1.8,
+                           'plastic': 0.8, 'other': 1.2}.get(quote.material, 1.0)
+    quantity_factor = max(0.8, 100 / (quote.quantity + 99))
+
+    model_factor = 1.0
+    if quote.volume:
+        model_factor *= 1 + quote.volume / 1000.0
+    if quote.surface_area:
+        model_factor *= 1 + quote.surface_area / 1000.0
+    if quote.complexity_score:
+        model_factor *= 1 + quote.complexity_score / 10.0
+    if quote.max_aspect_ratio and quote.max_aspect_ratio > 5:
+        model_factor *= 1.2
+    if '±0.01' in quote.accuracy:
+        model_factor *= 1.5
+    elif '±0.05' in quote.accuracy:
+        model_factor *= 1.2
+    elif '±0.1' in quote.accuracy:
+        model_factor *= 1.1
+    if quote.min_radius and quote.min_radius < 0.5:
+        model_factor *= 1.3
+    if quote.machining_difficulty:
+        model_factor *= 1 + quote.machining_difficulty / 10.0
+
+    estimated_price = base_price * material_multiplier * quantity_factor * quote.quantity * model_factor
+    return round(estimated_price * 0.9, 2), round(estimated_price * 1.1, 2)
+
+
+def pricing_cases():
+    """覆盖各加工方式、材料、精度、数量以及缺失特征和阈值两侧取值的报价组合"""
+    features = [
+        dict(volume=None, surface_area=None, complexity_score=None, max_aspect_ratio=None,
+             min_radius=None, machining_difficulty=None),
+        dict(volume=12.5, surface_area=40.0, complexity_score=3.2, max_aspect_ratio=2.0,
+             min_radius=0.3, machining_difficulty=4.5),
+        dict(volume=850.0, surface_area=0.0, complexity_score=7.0, max_aspect_ratio=8.5,
+             min_radius=0.7, machining_difficulty=None),
+        dict(volume=0.0, surface_area=1200.0, complexity_score=None, max_aspect_ratio=5.0,
+             min_radius=0.5, machining_difficulty=9.0),
+    ]
+    processing = [('cnc_milling', 'aluminum'), ('cnc_turning', 'steel'), ('3d_printing', 'plastic'),
+                  ('cnc_milling', 'stainless_steel'), ('cnc_turning', 'other')]
+    accuracies = ['±0.01mm', '±0.05mm', '±0.1mm', '±0.2mm', '']
+    quantities = [1, 10, 101, 5000]
+
+    cases = []
+    for index, feature in enumerate(features):
+        for processing_type, material in processing:
+            for accuracy in accuracies:
+                quantity = quantities[(index + len(cases)) % len(quantities)]
+                cases.append(SimpleNamespace(processing_type=processing_type, material=material,
+                                             quantity=quantity, accuracy=accuracy, **feature))
+    return cases
+
+
+class PricingTests(SimpleTestCase):
+    """单个报价计算、批量计算与原报价公式一致"""
+
+    def test_price_quote_matches_baseline_formula(self):
+        for quote in pricing_cases():
+            with self.subTest(quote=quote):
+                price_min, price_max, breakdown = price_quote(quote)
+                self.assertEqual((price_min, price_max), baseline_price(quote))
+                self.assertIsNone(breakdown['rule_version'])
+
+    def test_batch_price_ranges_match_price_quote(self):
+        cases = pricing_cases()
+        columns = {field: [getattr(quote, field) for quote in cases] for field in PRICING_FIELDS}
+
+        price_min, price_max = batch_price_ranges(columns)
+
+        self.assertEqual(len(price_min), len(cases))
+        for index, quote in enumerate(cases):
+            with self.subTest(quote=quote):
+                expected_min, expected_max, _ = price_quote(quote)
+                self.assertAlmostEqual(price_min[index], expected_min, places=6)
+                self.assertAlmostEqual(price_max[index], expected_max, places=6)
+
+    def test_batch_and_single_agree_for_custom_rules(self):
+        rules = PricingRules(version=3, base_prices={'cnc_milling': 120}, default_base_price=90,
+                             material_multipliers={'steel': 2.0}, precision_factors=[('±0.02', 1.4)],
+                             aspect_ratio_threshold=3, min_radius_threshold=1.0, price_range=(0.8, 1.3))
+        cases = pricing_cases()
+        columns = {field: [getattr(quote, field) for quote in cases] for field in PRICING_FIELDS}
+
+        price_min, price_max = batch_price_ranges(columns, rules)
+
+        for index, quote in enumerate(cases):
+            with self.subTest(quote=quote):
+                expected_min, expected_max, breakdown = price_quote(quote, rules)
+                self.assertAlmostEqual(price_min[index], expected_min, places=6)
+                self.assertAlmostEqual(price_max[index], expected_max, places=6)
+                self.assertEqual(breakdown['rule_version'], 3)
+
+    def test_empty_batch(self):
+        price_min, price_max = batch_price_ranges({field: [] for field in PRICING_FIELDS})
+
+        self.assertEqual(len(price_min), 0)
+        self.assertEqual(len(price_max), 0)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class PricingRulesSnapshotTests(TestCase):
+    """数据库报价规则：记录规则版本，启用新版本后进程内快照失效"""
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(pricing_rules, '_snapshot', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_apply_price_records_rule_version(self):
+        quotation = create_quotation(volume=20.0, surface_area=80.0, complexity_score=2.0)
+
+        apply_price(quotation)
+
+        self.assertEqual(quotation.pricing_version, 1)
+        self.assertEqual(quotation.price_breakdown['rule_version'], 1)
+        self.assertEqual((quotation.price_min, quotation.price_max), baseline_price(quotation))
+
+    def test_snapshot_is_reused_until_revision_changes(self):
+        rules = get_pricing_rules()
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_pricing_rules(), rules)
+
+    def test_activating_new_rule_set_invalidates_snapshot(self):
+        old_rules = get_pricing_rules()
+        quotation = create_quotation()
+        apply_price(quotation)
+        old_price = quotation.price_min
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule_set = PricingRuleSet.objects.get(is_active=True).copy()
+            rule_set.base_prices.filter(processing_type='cnc_milling').update(price=200)
+            rule_set.is_active = True
+            rule_set.save()
+            # 事务提交之前仍使用旧快照
+            self.assertIs(get_pricing_rules(), old_rules)
+
+        rules = get_pricing_rules()
+        self.assertIsNot(rules, old_rules)
+        self.assertEqual(rules.version, 2)
+        self.assertEqual(rules.base_prices['cnc_milling'], 200)
+
+        apply_price(quotation)
+        self.assertEqual(quotation.pricing_version, 2)
+        self.assertAlmostEqual(quotation.price_min, old_price * 2, places=1)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class QuotationAdminTests(TestCase):
+    """后台修改报价请求后重新计算保存的价格"""
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def change_form(self, quotation, **changes):
+        data = {field: getattr(quotation, field) for field in (
+            'name', 'email', 'phone', 'processing_type', 'material', 'quantity', 'accuracy',
+            'surface_treatment', 'description', 'volume', 'surface_area', 'bounding_box_length',
+            'bounding_box_width', 'bounding_box_height', 'min_radius', 'max_aspect_ratio', 'complexity_score',
+            'min_tool_diameter', 'machining_difficulty',
+        )}
+        data['radius_histogram'] = 'null'
+        data.update(changes)
+        return {key: '' if value is None else value for key, value in data.items()}
+
+    def post_change(self, quotation, **changes):
+        url = reverse('admin:quotation_quotationrequest_change', args=[quotation.id])
+        response = self.client.post(url, self.change_form(quotation, **changes))
+        self.assertEqual(response.status_code, 302)
+        quotation.refresh_from_db()
+
+    def test_changing_pricing_input_reprices(self):
+        quotation = create_quotation(analysis_status=QuotationRequest.ANALYSIS_DONE, volume=15.0)
+        quotation.save(update_fields=apply_price(quotation))
+        old_price = quotation.price_min
+
+        self.post_change(quotation, quantity=20, material='steel')
+
+        self.assertEqual(quotation.quantity, 20)
+        self.assertEqual((quotation.price_min, quotation.price_max), baseline_price(quotation))
+        self.assertNotEqual(quotation.price_min, old_price)
+        self.assertEqual(quotation.price_breakdown['quantity'], 20)
+        self.assertEqual(quotation.pricing_version, 1)
+
+    def test_other_changes_keep_stored_price(self):
+        quotation = create_quotation(analysis_status=QuotationRequest.ANALYSIS_DONE, volume=15.0)
+        quotation.save(update_fields=apply_price(quotation))
+        QuotationRequest.objects.filter(id=quotation.id).update(price_min=1.0)
+
+        self.post_change(quotation, description='已电话联系')
+
+        self.assertEqual(quotation.description, '已电话联系')
+        self.assertEqual(quotation.price_min, 1.0)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='', QUOTATION_API_TOKEN='test-token')
+class QuoteApiTests(TestCase):
+    """报价JSON接口：令牌、强ETag与条件请求、游标分页"""
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'Bearer test-token'
+
+    def create_priced_quotation(self, **fields):
+        quotation = create_quotation(analysis_status=QuotationRequest.ANALYSIS_DONE, volume=15.0, **fields)
+        quotation.save(update_fields=apply_price(quotation))
+        return quotation
+
+    def change_price(self, quotation):
+        QuotationRequest.objects.filter(id=quotation.id).update(price_min=quotation.price_min + 1)
+
+    def test_token_required(self):
+        url = reverse('quotation:api_quotes')
+
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        with override_settings(QUOTATION_API_TOKEN=''):
+            self.assertEqual(self.client.get(url).status_code, 503)
+
+    def test_unsupported_method(self):
+        quotation = self.create_priced_quotation()
+
+        response = self.client.post(reverse('quotation:api_quote', args=[quotation.id]))
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+
+    def test_detail_etag_is_strong_and_stable(self):
+        quotation = self.create_priced_quotation()
+        url = reverse('quotation:api_quote', args=[quotation.id])
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['price']['rule_version'], 1)
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_detail_if_none_match(self):
+        quotation = self.create_priced_quotation()
+        url = reverse('quotation:api_quote', args=[quotation.id])
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.change_price(quotation)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_detail_etag_changes_with_non_price_fields(self):
+        quotation = self.create_priced_quotation()
+        url = reverse('quotation:api_quote', args=[quotation.id])
+
+        for changes in ({'surface_treatment': 'anodizing'}, {'bounding_box_length': 42.0},
+                        {'file_size': 2048}, {'radius_histogram': {'internal': [[1.0, 2]]}}):
+            with self.subTest(changes=changes):
+                etag = self.client.get(url)['ETag']
+                QuotationRequest.objects.filter(id=quotation.id).update(**changes)
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_if_none_match(self):
+        quotation = self.create_priced_quotation()
+        url = reverse('quotation:api_quotes')
+        first = self.client.get(url, {'email': quotation.email})
+        etag = first['ETag']
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, {'email': quotation.email})['ETag'], etag)
+        self.assertEqual(self.client.get(url, {'email': quotation.email}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.change_price(quotation)
+        response = self.client.get(url, {'email': quotation.email}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_cursor_round_trip(self):
+        ids = [self.create_priced_quotation().id for _ in range(5)]
+        url = reverse('quotation:api_quotes')
+
+        first = self.client.get(url, {'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+
+        self.assertEqual([quote['id'] for quote in first['results']], ids[::-1][:2])
+        self.assertEqual([quote['id'] for quote in second['results']], ids[::-1][2:4])
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_tampered_cursor_is_rejected(self):
+        self.create_priced_quotation()
+        url = reverse('quotation:api_quotes')
+
+        for params in ({'after': 'abc'}, {'after': '123-x'}, {'before': '1700000000000000'}, {'after': '-'}):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+BATCH_FORM = {
+    'name': '测试', 'email': 'test@example.com', 'phone': '13800000000', 'processing_type': 'cnc_milling',
+    'material': 'aluminum', 'quantity': 5, 'accuracy': '±0.05', 'surface_treatment': 'none', 'description': '',
+}
+
+
+def zip_upload(name, members):
+    """
+    :param members: [(成员名, 内容)]，内容为None时写入目录项
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for member_name, content in members:
+            if content is None:
+                archive.writestr(zipfile.ZipInfo(member_name), b'')
+            else:
+                archive.writestr(member_name, content)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='application/zip')
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class BulkQuotationTests(TemporaryFilesMixin, TestCase):
+    """批量报价：压缩包流式暂存、按内容去重、跳过的文件、合计与CSV导出"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        media = override_settings(MEDIA_ROOT=self.path('media'))
+        media.enable()
+        self.addCleanup(media.disable)
+        self.box = self.stl_bytes(BOX_VERTICES)
+        self.large_box = self.stl_bytes(BOX_VERTICES * 2)
+
+    def stl_bytes(self, vertices):
+        path = self.path('part.stl')
+        write_binary_stl(path, vertices, BOX_FACES)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def staged_files(self):
+        incoming_dir = self.path(os.path.join('media', 'quotation_models', '.incoming'))
+        return os.listdir(incoming_dir) if os.path.isdir(incoming_dir) else []
+
+    def new_batch(self):
+        return QuotationBatch(**BATCH_FORM)
+
+    def test_zip_members_are_staged_and_deduplicated(self):
+        uploaded = zip_upload('parts.zip', [
+            ('a.stl', self.box),
+            ('sub/', None),
+            ('sub/b.stl', self.box),
+            ('sub/c.stl', self.large_box),
+            ('__MACOSX/sub/._c.stl', b'resource fork'),
+            ('.hidden.stl', self.box),
+            ('notes.txt', b'hello'),
+            ('fake.stl', b'hello world this is not a model'),
+        ])
+
+        parts, skipped = collect_parts([uploaded, SimpleUploadedFile('loose.stl', self.box)])
+
+        self.assertEqual([(name, model_file is None) for name, _, model_file in parts],
+                         [('a.stl', False), ('sub/b.stl', True), ('sub/c.stl', False), ('loose.stl', True)])
+        self.assertEqual(parts[0][1], parts[1][1])
+        self.assertEqual(parts[0][1], parts[3][1])
+        self.assertNotEqual(parts[0][1], parts[2][1])
+        self.assertEqual(parts[0][2].size, len(self.box))
+        self.assertEqual(parts[0][2].detected_format, FORMAT_STL_BINARY)
+        self.assertEqual([item['file_name'] for item in skipped], ['notes.txt', 'fake.stl'])
+        self.assertIn('只允许上传以下格式的文件', skipped[0]['reason'])
+        self.assertIn('无法识别文件内容', skipped[1]['reason'])
+        # 只有不同的零件留在暂存目录
+        self.assertEqual(len(self.staged_files()), 2)
+
+        discard_parts(parts)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_oversized_corrupt_and_excess_files_are_skipped(self):
+        with mock.patch('quotation.bulk.MAX_MODEL_FILE_SIZE', len(self.box)), \
+                mock.patch('quotation.bulk.MAX_BATCH_FILES', 1):
+            parts, skipped = collect_parts([
+                # 单独上传的文件在写入时检查大小，压缩包成员先按文件头中的大小检查
+                SimpleUploadedFile('big-loose.stl', self.box + b'\0'),
+                zip_upload('parts.zip', [('small.stl', self.box), ('big.stl', self.box + b'\0')]),
+                SimpleUploadedFile('broken.zip', b'not a zip archive'),
+                SimpleUploadedFile('extra.stl', self.large_box[:len(self.box)]),
+            ])
+
+        self.assertEqual([name for name, _, _ in parts], ['small.stl'])
+        self.assertEqual(skipped, [
+            {'file_name': 'big-loose.stl', 'reason': '文件大小不能超过50MB'},
+            {'file_name': 'big.stl', 'reason': '文件大小不能超过50MB'},
+            {'file_name': 'broken.zip', 'reason': '压缩包已损坏或不是zip格式'},
+            {'file_name': 'extra.stl', 'reason': '超过单次批量报价的文件数上限（1个）'},
+        ])
+        self.assertEqual(len(self.staged_files()), 1)
+
+    def test_create_batch_saves_one_quotation_per_distinct_part(self):
+        parts, skipped = collect_parts([zip_upload('parts.zip', [
+            ('a.stl', self.box), ('b.stl', self.large_box), ('copy-of-a.stl', self.box), ('notes.txt', b'x'),
+        ])])
+
+        batch = create_batch(self.new_batch(), parts, skipped)
+
+        items = list(batch.items.select_related('quotation'))
+        self.assertEqual([item.file_name for item in items], ['a.stl', 'b.stl', 'copy-of-a.stl'])
+        self.assertEqual(items[0].quotation_id, items[2].quotation_id)
+        self.assertEqual(QuotationRequest.objects.count(), 2)
+        self.assertEqual(AnalysisJob.objects.count(), 2)
+        self.assertEqual(batch.skipped_files, skipped)
+        for item in items:
+            self.assertEqual(item.quotation.quantity, 5)
+            self.assertEqual(item.quotation.analysis_status, QuotationRequest.ANALYSIS_PENDING)
+            self.assertTrue(os.path.isfile(item.quotation.model_file.path))
+        # 暂存文件已重命名到最终路径
+        self.assertEqual(self.staged_files(), [])
+
+    def test_failed_batch_leaves_no_files(self):
+        parts, skipped = collect_parts([SimpleUploadedFile('a.stl', self.box),
+                                        SimpleUploadedFile('b.stl', self.large_box)])
+
+        with mock.patch.object(QuotationBatchItem.objects, 'bulk_create', side_effect=RuntimeError('db')):
+            with self.assertRaises(RuntimeError):
+                create_batch(self.new_batch(), parts, skipped)
+        discard_parts(parts)
+
+        self.assertEqual(QuotationRequest.objects.count(), 0)
+        self.assertEqual(QuotationBatch.objects.count(), 0)
+        model_dir = self.path(os.path.join('media', 'quotation_models'))
+        self.assertEqual(os.listdir(model_dir), ['.incoming'])
+        self.assertEqual(self.staged_files(), [])
+
+    def test_price_sheet_totals(self):
+        parts, skipped = collect_parts([zip_upload('parts.zip', [
+            ('a.stl', self.box), ('b.stl', self.large_box), ('c.stl', self.box),
+        ])])
+        batch = create_batch(self.new_batch(), parts, skipped)
+        first, second = QuotationRequest.objects.order_by('id')
+
+        finish(first, volume=6.0)
+        sheet = build_price_sheet(batch)
+
+        self.assertFalse(sheet['complete'])
+        self.assertEqual(sheet['totals']['pending'], 1)
+        self.assertEqual([row['duplicate_of'] for row in sheet['rows']], [None, None, 1])
+        self.assertIsNone(sheet['rows'][1]['price_min'])
+        # 相同的零件在每个文件行都计入合计
+        self.assertAlmostEqual(sheet['totals']['price_min'], round(first.price_min * 2, 2))
+
+        finish(second, volume=48.0)
+        sheet = build_price_sheet(batch)
+
+        self.assertTrue(sheet['complete'])
+        self.assertEqual(sheet['totals'], {
+            'parts': 3, 'unique_parts': 2, 'pending': 0,
+            'price_min': round(first.price_min * 2 + second.price_min, 2),
+            'price_max': round(first.price_max * 2 + second.price_max, 2),
+        })
+
+    def test_csv_export_escapes_formula_cells(self):
+        parts, skipped = collect_parts([zip_upload('parts.zip', [
+            ('=HYPERLINK("http://example.com").stl', self.box), ('+cmd.stl', self.large_box),
+            ('@sum.txt', b'x'), ('-part.stl', self.box),
+        ])])
+        batch = create_batch(self.new_batch(), parts, skipped)
+        for quotation in QuotationRequest.objects.all():
+            finish(quotation, volume=6.0)
+
+        rows = list(csv.reader(io.StringIO(price_sheet_csv(build_price_sheet(batch)).lstrip('﻿'))))
+
+        self.assertEqual(rows[0][:2], ['序号', '文件名'])
+        self.assertEqual([row[1] for row in rows[1:4]],
+                         ['\'=HYPERLINK("http://example.com").stl', "'+cmd.stl", "'-part.stl"])
+        self.assertEqual(rows[3][-1], '1')
+        self.assertEqual(rows[5][:2], ['合计', '3个文件（2个不同零件）'])
+        self.assertEqual(rows[6][:2], ['未处理', "'@sum.txt"])
+
+    def test_bulk_request_view(self):
+        response = self.client.post(reverse('quotation:bulk_request'), dict(BATCH_FORM, files=[
+            zip_upload('parts.zip', [('a.stl', self.box), ('b.stl', self.box)]),
+            SimpleUploadedFile('c.stl', self.large_box),
+        ]))
+
+        batch = QuotationBatch.objects.get()
+        self.assertRedirects(response, reverse('quotation:bulk_result', args=[batch.id]))
+        self.assertEqual(batch.items.count(), 3)
+        self.assertEqual(QuotationRequest.objects.count(), 2)
+
+        response = self.client.get(reverse('quotation:bulk_sheet', args=[batch.id, 'csv']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+    def test_bulk_request_without_model_files(self):
+        response = self.client.post(reverse('quotation:bulk_request'),
+                                    dict(BATCH_FORM, files=[SimpleUploadedFile('notes.txt', b'x')]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '没有可以报价的模型文件')
+        self.assertEqual(QuotationBatch.objects.count(), 0)
+
+
+class LodTests(SimpleTestCase):
+    """预览网格：量化编码可还原，各级不超过字节预算，索引按顶点数使用uint16或uint32"""
+
+    def setUp(self):
+        self.vertices, self.faces = torus_mesh(20000, *TORUS_RADII)
+
+    def test_encode_decode_round_trip(self):
+        data = encode_preview(self.vertices, self.faces)
+
+        vertices, faces = decode_preview(data)
+
+        self.assertEqual(len(data), encoded_size(len(self.vertices), len(self.faces)))
+        np.testing.assert_array_equal(faces, self.faces)
+        # 量化误差不超过半个量化步长（加float32舍入）
+        step = (self.vertices.max(axis=0) - self.vertices.min(axis=0)) / 65535.0
+        self.assertTrue(np.all(np.abs(vertices - self.vertices) <= step / 2 + 1e-4))
+
+    def test_flat_axis_and_odd_vertex_count(self):
+        # 厚度为0的方向缩放按1处理；3个顶点的坐标占18字节，补齐到4字节边界
+        vertices = np.array([[0.0, 0.0, 5.0], [10.0, 0.0, 5.0], [0.0, 20.0, 5.0]])
+        data = encode_preview(vertices, [[0, 1, 2]])
+
+        decoded, faces = decode_preview(data)
+
+        np.testing.assert_allclose(decoded, vertices, atol=1e-3)
+        np.testing.assert_array_equal(faces, [[0, 1, 2]])
+        self.assertEqual(len(data), 40 + 20 + 6)
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            decode_preview(b'\0' * 64)
+
+    def test_index_type_follows_vertex_count(self):
+        for vertex_count, index_size in ((0xFFFF, 2), (0x10000, 4)):
+            with self.subTest(vertex_count=vertex_count):
+                vertices = np.zeros((vertex_count, 3))
+                vertices[:, 0] = np.arange(vertex_count)
+                faces = np.array([[0, 1, vertex_count - 1], [vertex_count - 1, 2, 0]])
+
+                data = encode_preview(vertices, faces)
+                decoded, decoded_faces = decode_preview(data)
+
+                self.assertEqual(decoded_faces.dtype.itemsize, index_size)
+                self.assertEqual(len(data), encoded_size(vertex_count, 2))
+                self.assertEqual(len(data) - encoded_size(vertex_count, 0), 6 * index_size)
+                np.testing.assert_array_equal(decoded_faces, faces)
+
+    def test_lods_fit_budgets(self):
+        budgets = [('lod0', 8 * 1024), ('lod1', 50 * 1024), ('lod2', 500 * 1024), ('lod3', 5000 * 1024)]
+
+        lods = build_lods(self.vertices, self.faces, budgets)
+
+        # 原网格已能放入lod2的预算，不再生成lod3
+        self.assertEqual([name for name, _ in lods], ['lod0', 'lod1', 'lod2'])
+        face_counts = []
+        for (name, data), (_, budget) in zip(lods, budgets):
+            with self.subTest(name):
+                self.assertLessEqual(len(data), budget)
+                vertices, faces = decode_preview(data)
+                face_counts.append(len(faces))
+                # 简化后外形不变
+                np.testing.assert_allclose(vertices.min(axis=0), self.vertices.min(axis=0), atol=2.0)
+                np.testing.assert_allclose(vertices.max(axis=0), self.vertices.max(axis=0), atol=2.0)
+        self.assertEqual(face_counts, sorted(face_counts))
+        self.assertGreater(face_counts[0], 100)
+        self.assertEqual(face_counts[-1], len(self.faces))
+
+    def test_streaming_clustering_matches_cluster_simplify(self):
+        triangles = self.vertices[self.faces]
+        chunks = [triangles[start:start + 3000] for start in range(0, len(triangles), 3000)]
+
+        streamed = cluster_triangle_chunks(chunks, self.vertices.min(axis=0), self.vertices.max(axis=0), 32)
+        expected = cluster_simplify(self.vertices, self.faces, 32)
+
+        np.testing.assert_allclose(streamed[0], expected[0], atol=1e-4)
+        np.testing.assert_array_equal(streamed[1], expected[1])
+
+
+class ThumbnailTests(TemporaryFilesMixin, SimpleTestCase):
+    """缩略图：软件光栅化的尺寸、前景和输出字节稳定"""
+
+    def setUp(self):
+        super().setUp()
+        self.mesh = CanonicalMesh(BOX_VERTICES.astype(np.float32), BOX_FACES.astype(np.int32))
+
+    def render(self, size=64):
+        return rasterize(self.mesh.vertices, self.mesh.faces, self.mesh.normals, size)
+
+    def test_rasterize_box(self):
+        image = self.render()
+
+        self.assertEqual(image.shape, (64, 64, 4))
+        self.assertEqual(image.dtype, np.uint8)
+        foreground = image[:, :, 3] == 255
+        self.assertGreater(foreground.sum(), 64 * 64 // 5)
+        # 四周留白透明，前景没有超出图像
+        self.assertFalse(image[:, :, 3][[0, -1], :].any())
+        self.assertFalse(image[:, :, 3][:, [0, -1]].any())
+        self.assertTrue(set(np.unique(image[:, :, 3])) <= {0, 255})
+        # 等轴测视角可见长方体的三个面，亮度各不相同
+        self.assertEqual(len(np.unique(image[foreground][:, :3], axis=0)), 3)
+        np.testing.assert_array_equal(self.render(), image)
+
+    def test_empty_mesh(self):
+        image = rasterize(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int32), np.zeros((0, 3)), 32)
+
+        self.assertEqual(image.shape, (32, 32, 4))
+        self.assertFalse(image.any())
+
+    @unittest.skipUnless(is_module_installed('PIL'), 'Pillow未安装')
+    def test_build_thumbnail(self):
+        from PIL import Image
+
+        contents = []
+        for media_root in ('first', 'second'):
+            with override_settings(MEDIA_ROOT=self.path(media_root), MEDIA_URL='/media/'):
+                self.assertIsNone(thumbnail_url('b' * 64))
+                path = build_thumbnail('b' * 64, self.mesh)
+                self.assertEqual(thumbnail_url('b' * 64), '/media/' + thumbnail_relative_path('b' * 64))
+                # 已存在时不重新渲染
+                with mock.patch('quotation.raster.rasterize') as render:
+                    self.assertEqual(build_thumbnail('b' * 64, self.mesh), path)
+                render.assert_not_called()
+            with open(path, 'rb') as f:
+                contents.append(f.read())
+
+            with Image.open(path) as image:
+                self.assertEqual(image.format, 'PNG')
+                self.assertEqual(image.mode, 'RGBA')
+                self.assertEqual(image.size, (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+                self.assertIsNotNone(image.getchannel('A').getbbox())
+
+        self.assertEqual(contents[0], contents[1])
+        self.assertIsNone(thumbnail_url(''))
+
+
+class AnalysisEngineMeshTests(TemporaryFilesMixin, SimpleTestCase):
+    """标准网格：超过三角面数上限时流式简化，不把整个网格读入内存"""
+
+    def setUp(self):
+        super().setUp()
+        media = override_settings(MEDIA_ROOT=self.path('media'), METRICS_DIR='')
+        media.enable()
+        self.addCleanup(media.disable)
+        vertices, faces = torus_mesh(20000, *TORUS_RADII)
+        self.face_count = len(faces)
+        self.stl_path = self.path('torus.stl')
+        write_binary_stl(self.stl_path, vertices, faces)
+        self.content_hash = 'c' * 64
+
+    def analyze(self):
+        engine = AnalysisEngine(self.stl_path, FORMAT_STL_BINARY, self.content_hash)
+        return engine, engine.analyze()
+
+    def test_full_mesh_below_limit(self):
+        with override_settings(ANALYSIS_MESH_MAX_TRIANGLES=self.face_count):
+            engine, features = self.analyze()
+
+        mesh = engine.mesh()
+        self.assertFalse(mesh.simplified)
+        self.assertEqual(mesh.face_count, self.face_count)
+        self.assertIsNotNone(load_mesh(self.content_hash))
+        self.assertIn('concave_fillet_edges', features)
+        self.assertEqual(len(preview_urls(self.content_hash)), len(PREVIEW_LODS))
+        self.assertIsNotNone(thumbnail_url(self.content_hash))
+
+    def test_large_mesh_is_streamed_and_simplified(self):
+        with override_settings(ANALYSIS_MESH_MAX_TRIANGLES=self.face_count // 4), \
+                mock.patch('quotation.engine.SIMPLIFIED_MESH_RESOLUTION', 32), \
+                mock.patch('quotation.curvature.stack_triangles') as stack_triangles, \
+                mock.patch('quotation.curvature.estimate_min_concave_radius') as estimate:
+            engine, features = self.analyze()
+
+        mesh = engine.mesh()
+        self.assertTrue(mesh.simplified)
+        self.assertLess(mesh.face_count, self.face_count)
+        # 没有合并整个三角面数组，也没有估算曲率或写入标准网格缓存
+        stack_triangles.assert_not_called()
+        estimate.assert_not_called()
+        self.assertNotIn('concave_fillet_edges', features)
+        self.assertIsNone(load_mesh(self.content_hash))
+        self.assertEqual(features['face_count'], self.face_count)
+        # 几何特征仍由流式读取得到，预览和缩略图由简化网格生成
+        self.assertAlmostEqual(features['bounding_box_length'], 2 * sum(TORUS_RADII), places=3)
+        self.assertTrue(preview_urls(self.content_hash))
+        self.assertIsNotNone(thumbnail_url(self.content_hash))
+        with open(os.path.join(settings.MEDIA_ROOT, preview_relative_path(self.content_hash, 'lod0')), 'rb') as f:
+            _, faces = decode_preview(f.read())
+        self.assertGreater(len(faces), 0)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR='')
+class ModelFileUploadTests(TemporaryFilesMixin, TestCase):
+    """模型文件流式上传：边接收边写入暂存目录、计算哈希、识别格式，保存时重命名到最终路径"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        media = override_settings(MEDIA_ROOT=self.path('media'))
+        media.enable()
+        self.addCleanup(media.disable)
+        path = self.path('box.stl')
+        write_binary_stl(path, BOX_VERTICES, BOX_FACES)
+        with open(path, 'rb') as f:
+            self.box = f.read()
+        write_ascii_stl(path, BOX_VERTICES, BOX_FACES)
+        with open(path, 'rb') as f:
+            self.ascii_box = f.read()
+
+    def staged_files(self):
+        return os.listdir(get_incoming_dir())
+
+    def post(self, name, content):
+        return self.client.post(reverse('quotation:request'),
+                                dict(BATCH_FORM, model_file=SimpleUploadedFile(name, content)))
+
+    def test_upload_is_hashed_sniffed_and_moved_into_place(self):
+        # 小分块，哈希和格式识别跨越多个分块
+        with mock.patch.object(ModelFileUploadHandler, 'chunk_size', 64):
+            response = self.post('part.stl', self.box)
+
+        quotation = QuotationRequest.objects.get()
+        self.assertRedirects(response, reverse('quotation:result', args=[quotation.id]),
+                             fetch_redirect_response=False)
+        self.assertEqual(quotation.content_hash, hashlib.sha256(self.box).hexdigest())
+        self.assertEqual(quotation.file_format, FORMAT_STL_BINARY)
+        self.assertEqual(quotation.file_size, len(self.box))
+        self.assertTrue(quotation.model_file.name.startswith('quotation_models/part'))
+        with open(quotation.model_file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.box)
+        self.assertEqual(self.staged_files(), [])
+        self.assertEqual(AnalysisJob.objects.filter(quotation=quotation).count(), 1)
+
+    def test_ascii_stl_is_detected(self):
+        self.post('part.stl', self.ascii_box)
+
+        quotation = QuotationRequest.objects.get()
+        self.assertEqual(quotation.file_format, FORMAT_STL_ASCII)
+        self.assertEqual(quotation.content_hash, hashlib.sha256(self.ascii_box).hexdigest())
+
+    def test_content_not_matching_extension_is_rejected(self):
+        response = self.post('part.obj', self.box)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '文件内容与扩展名.obj不符')
+        self.assertEqual(QuotationRequest.objects.count(), 0)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_oversized_upload_is_rejected(self):
+        limit = len(self.box) - 1
+        with mock.patch('quotation.views.ModelFileUploadHandler',
+                        functools.partial(ModelFileUploadHandler, max_size=limit)), \
+                mock.patch('quotation.forms.MAX_MODEL_FILE_SIZE', limit):
+            response = self.post('part.stl', self.box)
+
+        self.assertContains(response, '文件大小不能超过50MB')
+        self.assertEqual(QuotationRequest.objects.count(), 0)
+        self.assertEqual(self.staged_files(), [])
+
+    def test_handler_stops_writing_past_size_limit(self):
+        handler = ModelFileUploadHandler(max_size=100)
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('model_file', 'part.stl', 'application/octet-stream', None)
+        size = len(self.box)
+        for start in range(0, size, 64):
+            self.assertIsNone(handler.receive_data_chunk(self.box[start:start + 64], start))
+
+        model_file = handler.file_complete(size)
+
+        self.assertTrue(model_file.truncated)
+        self.assertEqual(model_file.size, size)
+        self.assertEqual(model_file.content_hash, '')
+        # 超过上限的部分没有写入磁盘
+        self.assertEqual(os.path.getsize(model_file.temporary_file_path()), 64)
+        model_file.close()
+        self.assertEqual(self.staged_files(), [])
+
+    def test_interrupted_upload_removes_staged_file(self):
+        handler = ModelFileUploadHandler()
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('model_file', 'part.stl', 'application/octet-stream', None)
+        handler.receive_data_chunk(self.box[:100], 0)
+        self.assertEqual(len(self.staged_files()), 1)
+
+        handler.upload_interrupted()
+
+        self.assertEqual(self.staged_files(), [])
+
+    def test_other_fields_are_left_to_default_handlers(self):
+        handler = ModelFileUploadHandler()
+        handler.new_file('attachment', 'notes.txt', 'text/plain', None)
+
+        self.assertEqual(handler.receive_data_chunk(b'data', 0), b'data')
+        self.assertIsNone(handler.file_complete(4))
+        self.assertEqual(self.staged_files(), [])
+
+
+class MetricsTests(TemporaryFilesMixin, SimpleTestCase):
+    """性能指标：各进程写入自己的文件，已退出进程的文件并入累计文件，输出Prometheus文本格式"""
+
+    def setUp(self):
+        super().setUp()
+        metrics._reset()
+        self.addCleanup(metrics._reset)
+        self.metrics_dir = self.path('metrics')
+        directory = override_settings(METRICS_DIR=self.metrics_dir)
+        directory.enable()
+        self.addCleanup(directory.disable)
+
+    def dead_process_file(self, data):
+        process = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                 capture_output=True, text=True, check=True)
+        name = f'{socket.gethostname()}-{process.stdout.strip()}-1700000000.json'
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        metrics._write_json(os.path.join(self.metrics_dir, name), data)
+        return name
+
+    def test_flush_writes_process_file_only_when_dirty(self):
+        metrics.inc('quotation_feature_cache_total', result='hit')
+        metrics.observe('quotation_stage_seconds', 0.02, stage='pricing')
+
+        metrics.flush()
+
+        name = f'{socket.gethostname()}-{os.getpid()}-{metrics._started}.json'
+        self.assertEqual(os.listdir(self.metrics_dir), [name])
+        os.remove(os.path.join(self.metrics_dir, name))
+        # 没有新数据时不重写
+        metrics.flush()
+        self.assertEqual(os.listdir(self.metrics_dir), [])
+
+        metrics.inc('quotation_feature_cache_total', result='hit')
+        metrics.flush(min_interval=3600)
+        self.assertEqual(os.listdir(self.metrics_dir), [])
+
+    def test_collect_merges_process_files(self):
+        metrics.inc('quotation_feature_cache_total', 2, result='hit')
+        os.makedirs(self.metrics_dir)
+        # 其它主机的文件无法判断进程是否存在，总是保留
+        metrics._write_json(os.path.join(self.metrics_dir, 'other-host-1-1700000000.json'), {
+            'counters': [['quotation_feature_cache_total', {'result': 'hit'}, 3]],
+            'histograms': [],
+        })
+
+        total = metrics.collect()
+
+        self.assertEqual(total['counters'], {('quotation_feature_cache_total', (('result', 'hit'),)): 5})
+        self.assertIn('other-host-1-1700000000.json', os.listdir(self.metrics_dir))
+
+    @unittest.skipIf(metrics.fcntl is None, '平台不支持fcntl，不合并已退出进程的文件')
+    def test_dead_process_files_are_compacted(self):
+        buckets = len(metrics.SECONDS_BUCKETS)
+        entry = [0] * (buckets + 2)
+        entry[3], entry[-2], entry[-1] = 2, 0.08, 2
+        first = self.dead_process_file({
+            'counters': [['quotation_analysis_jobs_total', {'result': 'done'}, 4]],
+            'histograms': [['quotation_stage_seconds', {'stage': 'db_save'}, entry]],
+        })
+        second = self.dead_process_file({
+            'counters': [['quotation_analysis_jobs_total', {'result': 'done'}, 1]],
+            'histograms': [],
+        })
+        metrics.inc('quotation_analysis_jobs_total', result='done')
+
+        for _ in range(2):
+            total = metrics.collect()
+
+            self.assertEqual(total['counters'], {('quotation_analysis_jobs_total', (('result', 'done'),)): 6})
+            self.assertEqual(total['histograms'][('quotation_stage_seconds', (('stage', 'db_save'),))], entry)
+            files = os.listdir(self.metrics_dir)
+            self.assertIn(metrics.CUMULATIVE_FILE, files)
+            self.assertNotIn(first, files)
+            self.assertNotIn(second, files)
+
+    def test_render_prometheus(self):
+        metrics.inc('quotation_backend_failures_total', backend='step "v2"\n')
+        metrics.observe('quotation_stage_seconds', 0.003, stage='pricing')
+        metrics.observe('quotation_stage_seconds', 0.2, stage='pricing')
+        metrics.observe('quotation_stage_seconds', 500, stage='pricing')
+
+        lines = metrics.render_prometheus().splitlines()
+
+        self.assertIn('# TYPE quotation_stage_seconds histogram', lines)
+        self.assertIn('# TYPE quotation_backend_failures_total counter', lines)
+        self.assertIn('quotation_backend_failures_total{backend="step \\"v2\\"\\n"} 1', lines)
+        self.assertIn('quotation_stage_seconds_bucket{stage="pricing",le="0.005"} 1', lines)
+        self.assertIn('quotation_stage_seconds_bucket{stage="pricing",le="0.1"} 1', lines)
+        self.assertIn('quotation_stage_seconds_bucket{stage="pricing",le="0.25"} 2', lines)
+        self.assertIn('quotation_stage_seconds_bucket{stage="pricing",le="120"} 2', lines)
+        self.assertIn('quotation_stage_seconds_bucket{stage="pricing",le="+Inf"} 3', lines)
+        self.assertIn('quotation_stage_seconds_sum{stage="pricing"} 500.203', lines)
+        self.assertIn('quotation_stage_seconds_count{stage="pricing"} 3', lines)
@@ -0,0 +1,61 @@
+"""
+3D模型缩略图
+分析时由标准网格软件光栅化生成等轴测PNG缩略图，按文件内容哈希缓存在MEDIA_ROOT下，
+报价结果页和后台报价列表直接引用
+"""
+
+import os
+
+from django.conf import settings
+
+# 缩略图边长（像素），先按倍数放大渲染再缩小以抗锯齿
+THUMBNAIL_SIZE = 256
+SUPERSAMPLE = 2
+
+# 缩略图格式版本，视角或着色变化时需要递增
+THUMBNAIL_FORMAT_VERSION = 1
+
+THUMBNAIL_SUBDIR = 'thumbnails'
+
+
+def thumbnail_relative_path(content_hash):
+    """
+    缩略图相对MEDIA_ROOT的路径
+    """
+    return f'{THUMBNAIL_SUBDIR}/{content_hash[:2]}/{content_hash}.v{THUMBNAIL_FORMAT_VERSION}.png'
+
+
+def thumbnail_url(content_hash):
+    """
+    已生成的缩略图URL，未生成时返回None
+    """
+    if not content_hash:
+        return None
+    relative_path = thumbnail_relative_path(content_hash)
+    if not os.path.exists(os.path.join(settings.MEDIA_ROOT, relative_path)):
+        return None
+    return settings.MEDIA_URL + relative_path
+
+
+def build_thumbnail(content_hash, mesh):
+    """
+    渲染并保存缩略图，已存在时跳过
+    :param mesh: CanonicalMesh
+    :return: 缩略图路径
+    """
+    path = os.path.join(settings.MEDIA_ROOT, thumbnail_relative_path(content_hash))
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image
+
+    from .raster import rasterize
+
+    pixels = rasterize(mesh.vertices, mesh.faces, mesh.normals, THUMBNAIL_SIZE * SUPERSAMPLE)
+    image = Image.fromarray(pixels, 'RGBA').resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(temp_path, format='PNG', optimize=True)
+    os.replace(temp_path, path)
+    return path
@@ -0,0 +1,122 @@
+"""
+3D模型文件上传处理器
+边接收边写入MEDIA_ROOT下的暂存目录，同时计算SHA-256、识别真实格式并统计字节数，
+保存时由存储后端直接重命名到最终路径，后续的去重、分析和校验不需要再完整读取文件
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from . import metrics
+from .formats import SNIFF_SIZE, sniff_format
+
+# 超过该大小的部分不再写入磁盘，只继续计数，由表单给出大小错误
+MAX_MODEL_FILE_SIZE = 50 * 1024 * 1024
+
+
+def get_incoming_dir():
+    """
+    上传暂存目录，与最终存储路径位于同一文件系统，保存时只需重命名
+    """
+    incoming_dir = getattr(settings, 'MODEL_UPLOAD_INCOMING_DIR', None) or os.path.join(
+        settings.MEDIA_ROOT, 'quotation_models', '.incoming'
+    )
+    os.makedirs(incoming_dir, exist_ok=True)
+    return incoming_dir
+
+
+class StreamedModelFile(UploadedFile):
+    """
+    已写入暂存目录的模型文件，附带上传过程中得到的哈希、格式和字节数
+    """
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=get_incoming_dir())
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.content_hash = ''
+        self.detected_format = ''
+        self.truncated = False
+
+    def temporary_file_path(self):
+        """
+        存储后端检测到该方法时会直接移动文件而不是复制内容
+        """
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # 文件已被移动到最终路径
+            pass
+
+
+class ModelFileUploadHandler(FileUploadHandler):
+    """
+    只处理 model_file 字段，其它字段交给Django默认的上传处理器
+    """
+    chunk_size = 1024 * 1024
+
+    def __init__(self, request=None, field_name='model_file', max_size=MAX_MODEL_FILE_SIZE):
+        super().__init__(request)
+        self.target_field = field_name
+        self.max_size = max_size
+        self.activated = False
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.activated = field_name == self.target_field
+        if not self.activated:
+            return
+        self.file = StreamedModelFile(self.file_name, self.content_type, 0,
+                                      self.charset, self.content_type_extra)
+        self.digest = hashlib.sha256()
+        self.head = b''
+        self.bytes_received = 0
+        # 只累计写入磁盘和计算哈希的时间，不包括等待客户端发送数据的时间
+        self.write_seconds = 0.0
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activated:
+            return raw_data
+
+        self.bytes_received += len(raw_data)
+        if self.bytes_received > self.max_size:
+            self.file.truncated = True
+            return None
+
+        started = time.perf_counter()
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+        if len(self.head) < SNIFF_SIZE:
+            self.head += raw_data[:SNIFF_SIZE - len(self.head)]
+        self.write_seconds += time.perf_counter() - started
+        return None
+
+    def file_complete(self, file_size):
+        if not self.activated:
+            return None
+        self.activated = False
+
+        start = time.perf_counter()
+        self.file.flush()
+        metrics.observe('quotation_stage_seconds', self.write_seconds + time.perf_counter() - start,
+                        stage='upload_write')
+        self.file.seek(0)
+        self.file.size = file_size
+        if not self.file.truncated:
+            self.file.content_hash = self.digest.hexdigest()
+            self.file.detected_format = sniff_format(self.head, file_size)
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
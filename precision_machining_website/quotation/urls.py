@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'quotation'
 
@@ -7,4 +7,9 @@ urlpatterns = [
     path('', views.quotation_home, name='home'),
     path('request/', views.quotation_request, name='request'),
     path('result/<int:quotation_id>/', views.quotation_result, name='result'),
+    path('bulk/', views.bulk_quotation_request, name='bulk_request'),
+    path('bulk/<int:batch_id>/', views.bulk_quotation_result, name='bulk_result'),
+    path('bulk/<int:batch_id>/sheet.<str:sheet_format>', views.bulk_price_sheet, name='bulk_sheet'),
+    path('api/quotes/', api.quote_collection, name='api_quotes'),
+    path('api/quotes/<int:quote_id>/', api.quote_detail, name='api_quote'),
 ]
\ No newline at end of file
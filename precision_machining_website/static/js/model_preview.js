@@ -0,0 +1,125 @@
+// 3D模型网页预览
+// 预览文件为服务端生成的量化网格（格式见 quotation/lod.py），按从粗到细的顺序加载，
+// 先显示最粗的级别，后续级别下载完成后替换显示
+
+import * as THREE from 'three';
+import { OrbitControls } from 'three/addons/controls/OrbitControls.js';
+
+const HEADER_SIZE = 40;
+const MAGIC = 'JGPM';
+
+function decodePreview(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== MAGIC) {
+        throw new Error('不是预览网格数据');
+    }
+    const vertexCount = view.getUint32(8, true);
+    const faceCount = view.getUint32(12, true);
+    const origin = [0, 1, 2].map((i) => view.getFloat32(16 + i * 4, true));
+    const scale = [0, 1, 2].map((i) => view.getFloat32(28 + i * 4, true));
+
+    const quantized = new Uint16Array(buffer, HEADER_SIZE, vertexCount * 3);
+    const positions = new Float32Array(vertexCount * 3);
+    for (let i = 0; i < positions.length; i++) {
+        positions[i] = origin[i % 3] + quantized[i] * scale[i % 3];
+    }
+
+    const indexOffset = HEADER_SIZE + Math.ceil(vertexCount * 6 / 4) * 4;
+    const IndexArray = vertexCount > 0xFFFF ? Uint32Array : Uint16Array;
+    const indices = new IndexArray(buffer, indexOffset, faceCount * 3);
+
+    let geometry = new THREE.BufferGeometry();
+    geometry.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+    geometry.setIndex(new THREE.BufferAttribute(indices, 1));
+    // 机加工零件以平面和棱边为主，展开为独立三角面按面法向着色
+    geometry = geometry.toNonIndexed();
+    geometry.computeVertexNormals();
+    return geometry;
+}
+
+function createViewer(container) {
+    const width = container.clientWidth;
+    const height = container.clientHeight || 360;
+
+    const renderer = new THREE.WebGLRenderer({ antialias: true });
+    renderer.setPixelRatio(window.devicePixelRatio);
+    renderer.setSize(width, height);
+    container.appendChild(renderer.domElement);
+
+    const scene = new THREE.Scene();
+    scene.background = new THREE.Color(0xf5f5f5);
+    scene.add(new THREE.HemisphereLight(0xffffff, 0x888888, 1.2));
+    const light = new THREE.DirectionalLight(0xffffff, 1.5);
+    scene.add(light);
+
+    const camera = new THREE.PerspectiveCamera(35, width / height, 0.1, 100000);
+    const controls = new OrbitControls(camera, renderer.domElement);
+    controls.enableDamping = true;
+
+    const material = new THREE.MeshStandardMaterial({ color: 0x9aa4ad, metalness: 0.4, roughness: 0.5 });
+    const mesh = new THREE.Mesh(new THREE.BufferGeometry(), material);
+    scene.add(mesh);
+
+    function fitCamera(geometry) {
+        geometry.computeBoundingSphere();
+        const { center, radius } = geometry.boundingSphere;
+        controls.target.copy(center);
+        camera.position.copy(center).add(new THREE.Vector3(1, 0.8, 1.2).normalize().multiplyScalar(radius * 3.2));
+        camera.near = radius / 100;
+        camera.far = radius * 100;
+        camera.updateProjectionMatrix();
+    }
+
+    function animate() {
+        requestAnimationFrame(animate);
+        controls.update();
+        light.position.copy(camera.position);
+        renderer.render(scene, camera);
+    }
+    animate();
+
+    window.addEventListener('resize', () => {
+        const newWidth = container.clientWidth;
+        camera.aspect = newWidth / height;
+        camera.updateProjectionMatrix();
+        renderer.setSize(newWidth, height);
+    });
+
+    return {
+        show(geometry, first) {
+            mesh.geometry.dispose();
+            mesh.geometry = geometry;
+            if (first) {
+                fitCamera(geometry);
+            }
+        },
+    };
+}
+
+async function loadPreview(container) {
+    const urls = JSON.parse(container.dataset.lods);
+    const status = container.querySelector('.model-preview-status');
+    const viewer = createViewer(container);
+
+    for (let i = 0; i < urls.length; i++) {
+        const response = await fetch(urls[i]);
+        if (!response.ok) {
+            break;
+        }
+        viewer.show(decodePreview(await response.arrayBuffer()), i === 0);
+        if (status) {
+            status.textContent = i < urls.length - 1 ? '正在加载精细模型…' : '';
+        }
+    }
+}
+
+document.querySelectorAll('.model-preview[data-lods]').forEach((container) => {
+    loadPreview(container).catch((error) => {
+        const status = container.querySelector('.model-preview-status');
+        if (status) {
+            status.textContent = '模型预览加载失败';
+        }
+        console.error(error);
+    });
+});